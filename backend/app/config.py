@@ -29,9 +29,106 @@ class Settings(BaseSettings):
     # API key para RAWG
     RAWG_API_KEY: str = os.getenv("RAWG_API_KEY", "")
     
+    # Clave para las operaciones de administración (cabecera X-Admin-Key); vacía las deshabilita
+    ADMIN_API_KEY: str = os.getenv("ADMIN_API_KEY", "")
+    
     # API key para Google AI
     GOOGLE_AI_API_KEY: str = os.getenv("GOOGLE_AI_API_KEY", "")
     
+    # Resiliencia de las llamadas a RAWG (timeouts, reintentos y circuit breaker)
+    RAWG_TIMEOUT_SECONDS: float = float(os.getenv("RAWG_TIMEOUT_SECONDS", "10"))
+    RAWG_MAX_RETRIES: int = int(os.getenv("RAWG_MAX_RETRIES", "2"))
+    RAWG_RETRY_BASE_DELAY: float = float(os.getenv("RAWG_RETRY_BASE_DELAY", "0.5"))
+    RAWG_RETRY_MAX_DELAY: float = float(os.getenv("RAWG_RETRY_MAX_DELAY", "4"))
+    RAWG_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("RAWG_BREAKER_FAILURE_THRESHOLD", "5"))
+    RAWG_BREAKER_RECOVERY_SECONDS: float = float(os.getenv("RAWG_BREAKER_RECOVERY_SECONDS", "30"))
+    RAWG_FALLBACK_CACHE_SIZE: int = int(os.getenv("RAWG_FALLBACK_CACHE_SIZE", "256"))
+    RAWG_MAX_REQUESTS_PER_SECOND: float = float(os.getenv("RAWG_MAX_REQUESTS_PER_SECOND", "5"))
+    RAWG_RATE_LIMIT_MAX_WAIT_SECONDS: float = float(os.getenv("RAWG_RATE_LIMIT_MAX_WAIT_SECONDS", "2"))
+    
+    # Caché de detalles de juegos y descarga concurrente de varios juegos
+    RAWG_DETAIL_CACHE_TTL_SECONDS: int = int(os.getenv("RAWG_DETAIL_CACHE_TTL_SECONDS", "3600"))
+    RAWG_DETAIL_CACHE_SIZE: int = int(os.getenv("RAWG_DETAIL_CACHE_SIZE", "1000"))
+    RAWG_MULTIGET_CONCURRENCY: int = int(os.getenv("RAWG_MULTIGET_CONCURRENCY", "5"))
+    
+    # Réplica local del catálogo de RAWG
+    RAWG_CATALOG_ENABLED: bool = os.getenv("RAWG_CATALOG_ENABLED", "true").lower() in ("1", "true", "yes")
+    RAWG_CATALOG_SYNC_PAGE_SIZE: int = int(os.getenv("RAWG_CATALOG_SYNC_PAGE_SIZE", "40"))
+    RAWG_CATALOG_SYNC_MAX_PAGES: int = int(os.getenv("RAWG_CATALOG_SYNC_MAX_PAGES", "250"))
+    
+    # Veredictos de moderación mantenidos en memoria (además de en la BD)
+    MODERATION_MEMORY_CACHE_SIZE: int = int(os.getenv("MODERATION_MEMORY_CACHE_SIZE", "10000"))
+    
+    # Envío concurrente de lotes al clasificador de IA. Los lotes se llenan hasta el
+    # presupuesto de tokens estimado, con un máximo de MODERATION_BATCH_SIZE juegos.
+    MODERATION_BATCH_SIZE: int = int(os.getenv("MODERATION_BATCH_SIZE", "40"))
+    MODERATION_BATCH_TOKEN_BUDGET: int = int(os.getenv("MODERATION_BATCH_TOKEN_BUDGET", "3000"))
+    MODERATION_MAX_CONCURRENCY: int = int(os.getenv("MODERATION_MAX_CONCURRENCY", "4"))
+    MODERATION_DEADLINE_SECONDS: float = float(os.getenv("MODERATION_DEADLINE_SECONDS", "20"))
+    
+    # Modo de moderación: "blocking" espera a la IA, "async" responde solo con veredictos
+    # conocidos y modera el resto en segundo plano. En modo sombra no se oculta nada.
+    MODERATION_MODE: str = os.getenv("MODERATION_MODE", "blocking").lower()
+    MODERATION_SHADOW_MODE: bool = os.getenv("MODERATION_SHADOW_MODE", "false").lower() in ("1", "true", "yes")
+    MODERATION_WORKER_BATCH_SIZE: int = int(os.getenv("MODERATION_WORKER_BATCH_SIZE", "50"))
+    
+    # Scraping de Steam: peticiones simultáneas por host y separación mínima entre peticiones
+    STEAM_MAX_CONCURRENCY_PER_HOST: int = int(os.getenv("STEAM_MAX_CONCURRENCY_PER_HOST", "4"))
+    STEAM_MIN_REQUEST_INTERVAL: float = float(os.getenv("STEAM_MIN_REQUEST_INTERVAL", "0.75"))
+    STEAM_REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("STEAM_REQUEST_TIMEOUT_SECONDS", "20"))
+    
+    # Fuente del scraper de Steam: "html" (páginas de la tienda), "json" (búsqueda JSON y
+    # API appdetails) o "fixtures" (backend JSON servido desde STEAM_FIXTURES_DIR, sin red)
+    STEAM_SCRAPER_BACKEND: str = os.getenv("STEAM_SCRAPER_BACKEND", "html").lower()
+    STEAM_FIXTURES_DIR: str = os.getenv("STEAM_FIXTURES_DIR", "fixtures/steam")
+    
+    # Refresco incremental de precios de Steam: juegos por ejecución, IDs por petición a
+    # appdetails, antigüedad mínima (horas) del precio para volver a comprobarlo y región
+    STEAM_PRICE_REFRESH_MAX_GAMES: int = int(os.getenv("STEAM_PRICE_REFRESH_MAX_GAMES", "2000"))
+    STEAM_PRICE_REFRESH_BATCH_SIZE: int = int(os.getenv("STEAM_PRICE_REFRESH_BATCH_SIZE", "100"))
+    STEAM_PRICE_REFRESH_MIN_AGE_HOURS: int = int(os.getenv("STEAM_PRICE_REFRESH_MIN_AGE_HOURS", "24"))
+    STEAM_PRICE_COUNTRY: str = os.getenv("STEAM_PRICE_COUNTRY", "es")
+    
+    # Días durante los que no se vuelve a descargar un juego de Steam descartado por el scraper
+    STEAM_REJECTION_TTL_DAYS: int = int(os.getenv("STEAM_REJECTION_TTL_DAYS", "30"))
+    
+    # Días tras los que un juego de Steam ya guardado se vuelve a descargar (y actualizar)
+    # cuando el scraper lo encuentra de nuevo
+    STEAM_REFRESH_TTL_DAYS: int = int(os.getenv("STEAM_REFRESH_TTL_DAYS", "30"))
+    
+    # Procesos entre los que se reparte un scraping masivo por defecto (1 = en el mismo
+    # proceso que ejecuta el trabajo); los límites por host se dividen entre ellos
+    STEAM_SCRAPE_WORKERS: int = int(os.getenv("STEAM_SCRAPE_WORKERS", "1"))
+    
+    # Quién ejecuta los scrapings masivos: "worker" (proceso aparte, `python -m app.utils.scrape_jobs`,
+    # que consulta la cola cada STEAM_SCRAPE_POLL_SECONDS) o "thread" (un hilo del proceso de la API)
+    STEAM_SCRAPE_RUNNER: str = os.getenv("STEAM_SCRAPE_RUNNER", "worker").lower()
+    STEAM_SCRAPE_POLL_SECONDS: float = float(os.getenv("STEAM_SCRAPE_POLL_SECONDS", "5"))
+    
+    # Etapas del scraping masivo: tareas que recorren páginas de búsqueda, tareas que
+    # descargan detalles, tamaño de las colas entre etapas y páginas por escritura en BD
+    STEAM_PIPELINE_LISTING_WORKERS: int = int(os.getenv("STEAM_PIPELINE_LISTING_WORKERS", "2"))
+    STEAM_PIPELINE_DETAIL_WORKERS: int = int(os.getenv("STEAM_PIPELINE_DETAIL_WORKERS", os.getenv("STEAM_MAX_CONCURRENCY_PER_HOST", "4")))
+    STEAM_PIPELINE_QUEUE_SIZE: int = int(os.getenv("STEAM_PIPELINE_QUEUE_SIZE", "50"))
+    STEAM_PIPELINE_WRITE_BATCH_PAGES: int = int(os.getenv("STEAM_PIPELINE_WRITE_BATCH_PAGES", "5"))
+    
+    # Procesos dedicados a parsear el HTML de Steam (0 = parsear en el proceso de la API)
+    STEAM_PARSER_WORKERS: int = int(os.getenv("STEAM_PARSER_WORKERS", "2"))
+    
+    # Caché en disco del HTML de Steam: "off", "on" (peticiones condicionales) o
+    # "replay" (sin red; solo se usan las páginas ya guardadas). Las rutas relativas se
+    # resuelven desde backend/; la caché se poda por encima de STEAM_HTML_CACHE_MAX_MB
+    STEAM_HTML_CACHE_MODE: str = os.getenv("STEAM_HTML_CACHE_MODE", "off").lower()
+    STEAM_HTML_CACHE_DIR: str = os.getenv("STEAM_HTML_CACHE_DIR", "cache/steam_html")
+    STEAM_HTML_CACHE_MAX_MB: int = int(os.getenv("STEAM_HTML_CACHE_MAX_MB", "500"))
+    
+    # TTL blando (segundos) de las instantáneas stale-while-revalidate
+    TRENDING_SOFT_TTL_SECONDS: int = int(os.getenv("TRENDING_SOFT_TTL_SECONDS", "300"))
+    GENRES_SOFT_TTL_SECONDS: int = int(os.getenv("GENRES_SOFT_TTL_SECONDS", "86400"))
+    # Precargar las instantáneas al arrancar (consulta RAWG en cada arranque); por defecto
+    # la API arranca sin peticiones salientes
+    SWR_WARM_UP_ON_STARTUP: bool = os.getenv("SWR_WARM_UP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+    
     class Config:
         env_file = ".env"
         extra = "ignore"  # Permitir variables extra en .env
@@ -4,12 +4,29 @@ from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
-from .routes import users, steam_games, favorite_games, auth, recommendations, rawg_games, games
-from .database import engine, Base
+from .utils.swr_cache import swr_cache
+from .config import settings
+import importlib
+import logging
 import os
+import time
 
-# Crear las tablas en la base de datos
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+# El esquema de la base de datos no se crea al importar: se aplica con las migraciones
+# (python -m scripts.migrate), así arrancar un worker no ejecuta DDL
+
+# Módulos de rutas, en el orden en que se registran. Se importan uno a uno para medir
+# cuánto tarda cada uno; cada tiempo incluye las dependencias que ese módulo importa
+# por primera vez, así que es acumulativo en este orden.
+ROUTER_MODULES = ("users", "steam_games", "favorite_games", "auth", "recommendations", "rawg_games", "games", "admin")
+
+router_import_times = {}
+routers = []
+for _name in ROUTER_MODULES:
+    _start = time.perf_counter()
+    routers.append(importlib.import_module(f".routes.{_name}", __package__).router)
+    router_import_times[_name] = time.perf_counter() - _start
 
 # Inicializar la aplicación FastAPI con metadata mejorada
 app = FastAPI(
@@ -102,6 +119,10 @@ tags_metadata = [
         "name": "steam-games",
         "description": "Datos de juegos de Steam para recomendaciones.",
     },
+    {
+        "name": "admin",
+        "description": "Diagnóstico interno: estado de los servicios externos.",
+    },
 ]
 
 # Personalizar el esquema OpenAPI
@@ -147,13 +168,23 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 # Incluir las rutas en la aplicación
-app.include_router(users.router, prefix="/api")
-app.include_router(steam_games.router, prefix="/api")
-app.include_router(favorite_games.router, prefix="/api")
-app.include_router(auth.router, prefix="/api")
-app.include_router(recommendations.router, prefix="/api")
-app.include_router(rawg_games.router, prefix="/api")
-app.include_router(games.router, prefix="/api")  # Nuevas rutas de juegos
+for router in routers:
+    app.include_router(router, prefix="/api")
+
+# Informe del tiempo de importación de cada módulo de rutas
+@app.on_event("startup")
+def report_router_import_times():
+    total = sum(router_import_times.values())
+    details = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in router_import_times.items())
+    logger.info(f"Rutas importadas en {total * 1000:.0f} ms ({details})")
+
+# Precargar en segundo plano las instantáneas de los listados más visitados. Cada carga
+# consulta RAWG, así que solo se hace si SWR_WARM_UP_ON_STARTUP está activado; si no, cada
+# instantánea se carga en la primera petición que la necesita
+@app.on_event("startup")
+def warm_up_listings():
+    if settings.SWR_WARM_UP_ON_STARTUP:
+        swr_cache.warm_up()
 
 # Documentación personalizada usando HTML directo
 @app.get("/api/custom-redoc", response_class=HTMLResponse, include_in_schema=False)
@@ -186,23 +217,10 @@ async def custom_redoc_html():
     """
     return html_content
 
-# Servir archivos estáticos (opcional, para personalizar ReDoc)
-if os.path.exists("static"):
+# Servir archivos estáticos (opcional, para personalizar ReDoc). El directorio y el favicon
+# forman parte del repositorio; no se crean al arrancar
+if os.path.isdir("static"):
     app.mount("/static", StaticFiles(directory="static"), name="static")
-else:
-    os.makedirs("static", exist_ok=True)
-    app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Crear un favicon básico si no existe
-if not os.path.exists("static/favicon.ico"):
-    try:
-        import base64
-        favicon_data = b'AAABAAEAEBAAAAEAIABoBAAAFgAAACgAAAAQAAAAIAAAAAEAIAAAAAAAAAQAAAAAAAAAAAAAAAAAAAAAAAD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A9v/7AOvgtgD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////APL/+ADw/vQF69+zQuvfsm7r37F4////AP///wD///8A////AP///wD///8A////AP///wD///8A////APD9+QHs4rgK697Bhurf0fDq3tD/6t/P2+vew7Dq38+y////AP///wD///8A////AP///wD///8A////AP///wD///8A697LPerd0fns5+T/9vPy//j29f/r39D/6t/T/+rfz//q3s1Z////AP///wD///8A////AP///wD///8A////AOvdzSbq3c//8e3r//39/f/39/f/+Pb1//f19P/z7+3/6+DS/+vezP/q3s9g////AP///wD///8A////AP///wD///8A////AP///wD///8A692+N+re0v/19PP/+ff3//n39//49/f/+Pf3//j39//49/f/+ff3/+vg1P/q3sYn////AP///wD///8A////AP///wD///8A////AP///wDq3suS7OXe//j4+P/49/f/+Pf3//j39//49/f/+Pf3//n39//u5+H/697Mav///wD///8A////AP///wD///8A////AP///wD///8A6t7LTOrezv/q4NT/7+nm//Xz8//08e//7eXh/+vh1v/q3cvs////AP///wD///8A////AP///wD///8A////AP///wD///8A6t3LaOrd0cXq3tHo6t7S/urezv/q3c3/6t3MqP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A//8AAP//AAD//wAA//8AAP//AADn/wAAw/8AAIH/AAAAfwAAAD8AAAB/AAAAfwAAAP8AAAH/AAAD/wAA//8AAA=='
-        favicon_bytes = base64.b64decode(favicon_data)
-        with open("static/favicon.ico", "wb") as f:
-            f.write(favicon_bytes)
-    except Exception as e:
-        print(f"No se pudo crear favicon: {e}")
 
 # Ruta de inicio para redirigir a la documentación
 @app.get("/", include_in_schema=False)
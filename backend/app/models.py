@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Table, ForeignKey, Text, ARRAY
+from sqlalchemy import Column, Integer, String, Float, Boolean, Table, ForeignKey, Text, ARRAY, Date, DateTime, JSON, Index, text
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import relationship
 from .database import Base
+from datetime import datetime
 
 # Tabla de relación entre Usuario y JuegosFavoritos
 usuario_juegos_favoritos = Table(
@@ -34,6 +36,15 @@ class JuegosScrapeadoDeSteamParaRecomendaiones(Base):
     descripcion = Column(Text)
     tags = Column(ARRAY(String))
     imagen_principal = Column(String)
+    steam_app_id = Column(Integer, unique=True, index=True)  # ID de la aplicación en Steam (nulo en altas manuales)
+    descuento = Column(Integer, default=0)  # Porcentaje de descuento en la última comprobación
+    precio_actualizado_en = Column(DateTime, index=True)  # Última comprobación del precio en Steam
+    scrapeado_en = Column(DateTime, index=True)  # Última descarga de la ficha completa por el scraper
+    
+    # Resultado de la moderación calculado al guardar el juego (approved / blocked / pending)
+    moderation_status = Column(String, index=True)
+    moderation_model = Column(String)
+    moderation_version = Column(String)
 
 class JuegosFavoritosDeUsuarioQueProvienenDeRawg(Base):
     __tablename__ = "juegos_favoritos"
@@ -45,7 +56,112 @@ class JuegosFavoritosDeUsuarioQueProvienenDeRawg(Base):
     generos = Column(ARRAY(String))
     tags = Column(ARRAY(String))
     
+    # Resultado de la moderación calculado al guardar el juego (approved / blocked / pending)
+    moderation_status = Column(String, index=True)
+    moderation_model = Column(String)
+    moderation_version = Column(String)
+    
     # Relación con usuarios
     usuarios = relationship("Usuario", 
                            secondary=usuario_juegos_favoritos,
                            back_populates="juegos_favoritos")
+
+class JuegoCatalogoRawg(Base):
+    """Réplica local del listado de juegos de RAWG, sincronizada de forma incremental"""
+    __tablename__ = "catalogo_rawg"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=False)  # Mismo ID que en RAWG
+    nombre = Column(String, index=True)
+    slug = Column(String, index=True)
+    generos = Column(JSON)  # [{"id", "name", "slug"}] tal y como los devuelve RAWG
+    genero_ids = Column(postgresql.ARRAY(Integer))
+    plataformas = Column(JSON)  # [{"platform": {"id", "name", "slug"}}]
+    plataforma_ids = Column(postgresql.ARRAY(Integer))
+    rating = Column(Float, index=True)
+    lanzamiento = Column(Date, index=True)
+    imagen_fondo = Column(String)
+    actualizado_rawg = Column(DateTime, index=True)  # Campo "updated" de RAWG
+    sincronizado_en = Column(DateTime)
+    
+    __table_args__ = (
+        # Índices GIN para filtrar por género/plataforma con el operador de contención
+        Index("ix_catalogo_rawg_genero_ids", "genero_ids", postgresql_using="gin"),
+        Index("ix_catalogo_rawg_plataforma_ids", "plataforma_ids", postgresql_using="gin"),
+        # Índice de trigramas (pg_trgm) para las búsquedas con ILIKE '%texto%'
+        Index("ix_catalogo_rawg_nombre_trgm", "nombre", postgresql_using="gin",
+              postgresql_ops={"nombre": "gin_trgm_ops"}),
+    )
+
+class SincronizacionCatalogoRawg(Base):
+    """Progreso de la sincronización del catálogo de RAWG (una única fila, id = 1)"""
+    __tablename__ = "sincronizacion_catalogo_rawg"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    pagina = Column(Integer, nullable=False, default=1)  # Siguiente página del recorrido en curso
+    marca = Column(DateTime)  # Campo "updated" más reciente del último recorrido completo
+    marca_en_curso = Column(DateTime)  # Campo "updated" más reciente al empezar el recorrido en curso
+    completo = Column(Boolean, nullable=False, default=False)  # Se ha recorrido el catálogo entero al menos una vez
+    actualizado_en = Column(DateTime)
+
+class VeredictoModeracion(Base):
+    """Veredicto de moderación de un juego de RAWG para un contenido concreto"""
+    __tablename__ = "veredictos_moderacion"
+    
+    # Clave compuesta: el hash cambia si cambia el nombre/descripción o el modelo
+    rawg_id = Column(Integer, primary_key=True, autoincrement=False)
+    hash_contenido = Column(String(64), primary_key=True)
+    es_sexual = Column(Boolean, nullable=False)
+    modelo = Column(String)
+    creado_en = Column(DateTime, default=datetime.utcnow)
+
+class TrabajoScraping(Base):
+    """Trabajo de scraping masivo de Steam ejecutado en segundo plano"""
+    __tablename__ = "trabajos_scraping"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    estado = Column(String, index=True, nullable=False, default="queued")  # queued / running / completed / failed / cancelled
+    min_juegos_nuevos = Column(Integer, nullable=False)
+    trabajadores = Column(Integer, nullable=False, default=1)  # Procesos entre los que se reparten los términos
+    contadores = Column(JSON, default=dict)  # total_consultados, juegos_validos, juegos_guardados...
+    mensaje = Column(Text)
+    cancelar = Column(Boolean, nullable=False, default=False)
+    creado_en = Column(DateTime, default=datetime.utcnow)
+    iniciado_en = Column(DateTime)
+    actualizado_en = Column(DateTime)  # Latido del proceso que ejecuta el trabajo
+    finalizado_en = Column(DateTime)
+    
+    __table_args__ = (
+        # Como mucho un trabajo activo (en cola o en curso): un segundo INSERT activo falla
+        Index(
+            "ux_trabajos_scraping_activo",
+            text("(estado IN ('queued', 'running'))"),
+            unique=True,
+            postgresql_where=text("estado IN ('queued', 'running')"),
+        ),
+    )
+
+class CursorScraping(Base):
+    """Página por la que continuar el scraping masivo de Steam para cada término de búsqueda"""
+    __tablename__ = "cursores_scraping"
+    
+    termino = Column(String, primary_key=True)
+    pagina = Column(Integer, nullable=False, default=1)  # Siguiente página a consultar
+    agotado = Column(Boolean, nullable=False, default=False)  # Se llegó al final de los resultados
+    actualizado_en = Column(DateTime, default=datetime.utcnow)
+    reclamado_por = Column(String)  # Trabajador que está recorriendo el término (nulo si está libre)
+
+class ReclamacionSteam(Base):
+    """ID de Steam reservado por un trabajador de un scraping repartido, para no descargarlo dos veces"""
+    __tablename__ = "reclamaciones_steam"
+    
+    trabajo_id = Column(Integer, ForeignKey("trabajos_scraping.id", ondelete="CASCADE"), primary_key=True)
+    steam_app_id = Column(Integer, primary_key=True, autoincrement=False)
+    reclamado_en = Column(DateTime, default=datetime.utcnow)
+
+class RechazoSteam(Base):
+    """Juego de Steam descartado por el scraper, para no volver a descargarlo hasta que caduque"""
+    __tablename__ = "rechazos_steam"
+    
+    steam_app_id = Column(Integer, primary_key=True, autoincrement=False)
+    motivo = Column(String)  # excluido (no indie o tags excluidos) / duplicado
+    rechazado_en = Column(DateTime, default=datetime.utcnow, index=True)
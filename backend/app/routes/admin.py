@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from typing import Dict, Any, Optional
+import secrets
+from ..utils.rawg_api import rawg_api
+from ..utils.moderation import moderation_worker, moderation_backfill
+from ..config import settings
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+def require_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """
+    Dependencia para las operaciones de administración: exige la cabecera `X-Admin-Key`
+    con el valor de ADMIN_API_KEY. Si la clave no está configurada, las operaciones
+    quedan deshabilitadas.
+    """
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operación de administración deshabilitada")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Clave de administración no válida")
+
+@router.get("/upstreams", response_model=Dict[str, Any])
+def get_upstreams_status():
+    """
+    Muestra el estado de los circuit breakers de los servicios externos.
+    
+    Para cada endpoint de RAWG indica si el circuito está cerrado, abierto o
+    semiabierto, cuántos fallos consecutivos lleva y cuántas llamadas se han
+    rechazado sin contactar con RAWG.
+    
+    Returns:
+        Diccionario con el estado de cada circuito, agrupado por servicio
+    """
+    return {
+        "rawg": rawg_api.breakers.snapshot(),
+    }
+
+@router.get("/moderation", response_model=Dict[str, Any])
+def get_moderation_status():
+    """
+    Muestra el modo de moderación y el estado de la cola en segundo plano.
+    
+    Returns:
+        Diccionario con el modo activo, si está en modo sombra, los contadores de la cola
+        y el estado del último backfill
+    """
+    return {
+        "modo": settings.MODERATION_MODE,
+        "sombra": settings.MODERATION_SHADOW_MODE,
+        "cola": moderation_worker.stats(),
+        "backfill": moderation_backfill.status(),
+    }
+
+@router.post(
+    "/moderation/backfill",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_admin_key)],
+)
+def backfill_stored_moderation(
+    max_games: int = Query(1000, ge=1, le=10000, description="Número máximo de juegos a moderar por tabla")
+):
+    """
+    Lanza en segundo plano el cálculo de `moderation_status` para los juegos guardados
+    sin moderar o pendientes.
+    
+    Requiere la cabecera `X-Admin-Key`. Recorre juegos_steam y juegos_favoritos en lotes;
+    útil tras añadir las columnas de moderación o cuando la IA no estaba disponible
+    durante la ingesta. El progreso y el resultado se consultan en `/admin/moderation`.
+    
+    Returns:
+        Si se ha lanzado el backfill o ya había uno en marcha en este proceso
+    """
+    started = moderation_backfill.start(max_games)
+    return {
+        "iniciado": started,
+        "mensaje": "Backfill lanzado" if started else "Ya hay un backfill en marcha",
+    }
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
 from .. import models, schemas
 from ..utils.rawg_api import rawg_api  # Add this import
+from ..utils.moderation import moderation_statuses, moderation_columns, stored_game_for_moderation, visible_filter
 
 router = APIRouter(
     prefix="/favorite-games",
@@ -20,8 +21,11 @@ def create_favorite_game(game: schemas.JuegoFavoritoCreate, db: Session = Depend
     if db_game:
         return db_game
     
-    # Crear nuevo juego
-    db_game = models.JuegosFavoritosDeUsuarioQueProvienenDeRawg(**game.dict())
+    # Crear nuevo juego con su veredicto de moderación
+    status_value, decided_by = moderation_statuses([
+        stored_game_for_moderation(game.nombre, game.descripcion, game.generos, game.tags)
+    ])[0]
+    db_game = models.JuegosFavoritosDeUsuarioQueProvienenDeRawg(**game.dict(), **moderation_columns(status_value, decided_by))
     
     db.add(db_game)
     db.commit()
@@ -30,7 +34,9 @@ def create_favorite_game(game: schemas.JuegoFavoritoCreate, db: Session = Depend
 
 @router.get("/", response_model=List[schemas.JuegoFavorito])
 def read_favorite_games(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    games = db.query(models.JuegosFavoritosDeUsuarioQueProvienenDeRawg).offset(skip).limit(limit).all()
+    games = db.query(models.JuegosFavoritosDeUsuarioQueProvienenDeRawg).filter(
+        visible_filter(models.JuegosFavoritosDeUsuarioQueProvienenDeRawg)
+    ).offset(skip).limit(limit).all()
     return games
 
 @router.post("/add-favorite", status_code=status.HTTP_200_OK)
@@ -57,6 +63,10 @@ def add_favorite_to_user(favorite: schemas.FavoritoAdd, db: Session = Depends(ge
             generos = [genre["name"] for genre in game_data.get("genres", [])]
             tags = [tag["name"] for tag in game_data.get("tags", [])] if "tags" in game_data else []
             
+            status_value, decided_by = moderation_statuses([stored_game_for_moderation(
+                game_data["name"], game_data.get("description", ""), generos, tags, rawg_id=favorite.juego_id
+            )])[0]
+            
             # Crear el juego en nuestra base de datos
             game = models.JuegosFavoritosDeUsuarioQueProvienenDeRawg(
                 id=favorite.juego_id,  # Usar el mismo ID que en RAWG
@@ -64,7 +74,8 @@ def add_favorite_to_user(favorite: schemas.FavoritoAdd, db: Session = Depends(ge
                 imagen=game_data.get("background_image", ""),
                 descripcion=game_data.get("description", ""),
                 generos=generos,
-                tags=tags
+                tags=tags,
+                **moderation_columns(status_value, decided_by)
             )
             
             db.add(game)
@@ -120,6 +131,10 @@ def add_steam_favorite_to_user(favorite_data: dict, db: Session = Depends(get_db
             generos = game_data.get("generos", [])
             tags = game_data.get("tags", [])
             
+            status_value, decided_by = moderation_statuses([stored_game_for_moderation(
+                game_data.get("nombre", "Juego de Steam"), game_data.get("descripcion", ""), generos, tags
+            )])[0]
+            
             # Crear el juego en nuestra base de datos
             game = models.JuegosFavoritosDeUsuarioQueProvienenDeRawg(
                 id=juego_id,
@@ -127,7 +142,8 @@ def add_steam_favorite_to_user(favorite_data: dict, db: Session = Depends(get_db
                 imagen=game_data.get("imagen", ""),
                 descripcion=game_data.get("descripcion", ""),
                 generos=generos,
-                tags=tags
+                tags=tags,
+                **moderation_columns(status_value, decided_by)
             )
             
             db.add(game)
@@ -175,14 +191,34 @@ def remove_favorite_from_user(favorite: schemas.FavoritoAdd, db: Session = Depen
     return {"message": "Juego eliminado de favoritos"}
 
 @router.get("/user/{user_id}", response_model=List[schemas.JuegoFavorito])
-def get_user_favorites(user_id: int, db: Session = Depends(get_db)):
+def get_user_favorites(
+    user_id: int,
+    hidratar: bool = Query(False, description="Completar imagen y descripción vacías con los datos de RAWG"),
+    db: Session = Depends(get_db)
+):
     user = db.query(models.Usuario).filter(models.Usuario.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     favorites = user.juegos_favoritos
     if not favorites:
         return []  # Return an empty list if no favorites
-    return favorites
+    if not hidratar:
+        return favorites
+    
+    # Los favoritos incompletos se completan con una única descarga de varios juegos;
+    # solo se usa el detalle si el nombre coincide (los favoritos de Steam no tienen ID de RAWG)
+    result = [
+        {"id": game.id, "nombre": game.nombre, "imagen": game.imagen or "", "descripcion": game.descripcion or "",
+         "generos": game.generos or [], "tags": game.tags or []}
+        for game in favorites
+    ]
+    incomplete = [game for game in result if not game["imagen"] or not game["descripcion"]]
+    details = rawg_api.get_games_by_ids([game["id"] for game in incomplete])
+    for game, detail in zip(incomplete, details):
+        if detail and detail.get("name") == game["nombre"]:
+            game["imagen"] = game["imagen"] or detail.get("background_image") or ""
+            game["descripcion"] = game["descripcion"] or detail.get("description_raw") or detail.get("description") or ""
+    return result
 
 @router.get("/check/{user_id}/{game_id}", response_model=bool)
 def check_game_is_favorite(user_id: int, game_id: int, db: Session = Depends(get_db)):
@@ -4,7 +4,10 @@ from typing import List, Optional, Dict, Any
 from ..database import get_db
 from .. import models, schemas
 from ..utils.rawg_api import rawg_api
-from ..utils.google_ai import classify_games_sexual_content
+from ..utils.rawg_catalog import rawg_catalog
+from ..utils.rawg_projection import project_games
+from ..utils.moderation import moderate_games, sexual_keyword_matcher
+from ..utils.swr_cache import swr_cache
 from jose import jwt
 from fastapi.security import OAuth2PasswordBearer
 from ..config import settings
@@ -20,22 +23,6 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-# Lista común de palabras clave sexuales
-sexual_keywords = [
-    "sexual", "nudity", "adult", "erotic", "porn", "hentai", "ecchi", 
-    "fetish", "provocative", "explicit", "mature", "xxx", "nsfw", "ntr", 
-    "sensual", "seductive", "intimate", "suggestive", "lewd", "obscene",
-    # Términos adicionales
-    "girlfriend", "boyfriend", "dating", "romance", "sexy", "hot",
-    "love", "kiss", "touching", "strip", "undress", "lingerie", "bra",
-    "underwear", "bikini", "swimsuit", "pleasure", "desire", "passion",
-    "flirt", "seduce", "lust", "fantasy", "waifu", "huniepop", "dream daddy",
-    "hatoful", "boob", "breast", "butt", "ass", "grope", "panty", "thong",
-    "dating sim", "visual novel", "relationship", "body", "naked", "shower",
-    "bath", "beach", "model", "pose", "tease", "tempt", "virgin", "virgin*",
-    "hookup", "affair", "50 shades", "topless", "onlyfans", "dress up"
-]
-
 # Nueva función para verificar si un juego tiene contenido sexual
 def has_sexual_content(game):
     """
@@ -50,46 +37,36 @@ def has_sexual_content(game):
     Returns:
         Boolean: True si se detecta contenido sexual, False en caso contrario
     """
-    # Verificar explícitamente el título (prioridad alta)
-    if game.get("name"):
-        game_name = game.get("name", "").lower()
-        if any(keyword in game_name for keyword in sexual_keywords):
-            return True
-    
-    # Verificar la descripción completa
-    if game.get("description"):
-        game_desc = game.get("description", "").lower()
-        if any(keyword in game_desc for keyword in sexual_keywords):
-            return True
-    
-    # Verificar la combinación de título y descripción
-    combined_text = (game.get("name", "").lower() + " " + game.get("description", "").lower())
-    if any(keyword in combined_text for keyword in sexual_keywords):
-        return True
-    
-    return False
+    # Título y descripción se recorren juntos en una sola pasada
+    return sexual_keyword_matcher.search_games([game])[0]
 
 @router.get("/", response_model=Dict[str, Any])
 def get_games(
     page: int = Query(1, description="Número de página"),
     page_size: int = Query(12, description="Elementos por página"),
     genre: Optional[int] = Query(None, description="ID del género para filtrar"),
+    fields: Optional[str] = Query(None, description="Campos a incluir separados por comas (por defecto, los de GameResult)"),
     db: Session = Depends(get_db)
 ):
     """
     Obtiene una lista paginada de juegos.
     
     Si se proporciona un ID de género, filtra los juegos por ese género.
+    Cada juego se reduce a los campos de GameResult salvo que se pidan otros con `fields`.
     """
     try:
-        # Para este endpoint, utilizaremos la API de RAWG para obtener juegos
-        # ya que probablemente tiene más datos que nuestra base de datos local
+        # Primero intentamos responder desde la réplica local del catálogo de RAWG
+        result = rawg_catalog.query_games(
+            db, page=page, page_size=page_size, genres=[genre] if genre else None
+        )
         
-        # Si hay un género especificado, usamos un endpoint diferente
-        if genre:
-            result = rawg_api.get_games_by_genre(genre, page, page_size)
-        else:
-            result = rawg_api.get_games(page, page_size)
+        # Si la réplica no puede responder, consultamos la API de RAWG en vivo
+        if not result:
+            # Si hay un género especificado, usamos un endpoint diferente
+            if genre:
+                result = rawg_api.get_games_by_genre(genre, page, page_size)
+            else:
+                result = rawg_api.get_games(page, page_size)
         
         # Ensure RAWG API response is valid
         if not result or "results" not in result:
@@ -114,16 +91,14 @@ def get_games(
         # Filtrar juegos con contenido sexual usando la IA
         games = result.get("results", [])
         if games:
-            games_for_ai = [
-                {"name": g.get("name", ""), "description": g.get("description", "")} for g in games
-            ]
             try:
-                flags = classify_games_sexual_content(games_for_ai)
+                flags = moderate_games(games)
                 result["results"] = [g for g, is_sexual in zip(games, flags) if not is_sexual]
             except Exception:
                 result["results"] = []
         else:
             result["results"] = []
+        result["results"] = project_games(result["results"], fields)
         return result
         
     except Exception as e:
@@ -172,8 +147,12 @@ def filter_games(
         if sort_by:
             params["ordering"] = sort_by
         
-        # Obtener juegos con los filtros aplicados
-        result = rawg_api.get_games_with_filters(params)
+        # Obtener juegos con los filtros aplicados, desde la réplica local si es posible
+        result = rawg_catalog.query_games(
+            db, page=page, page_size=page_size, genres=genres, platforms=platforms, ordering=sort_by
+        )
+        if not result:
+            result = rawg_api.get_games_with_filters(params)
         
         if not result:
             raise HTTPException(status_code=503, detail="Error al conectar con RAWG API")
@@ -182,11 +161,8 @@ def filter_games(
         filtered_results = []
         games = result.get("results", [])
         if games:
-            games_for_ai = [
-                {"name": g.get("name", ""), "description": g.get("description", "")} for g in games
-            ]
             try:
-                flags = classify_games_sexual_content(games_for_ai)
+                flags = moderate_games(games)
                 for g, is_sexual in zip(games, flags):
                     if is_sexual:
                         continue
@@ -259,16 +235,14 @@ def get_similar_games(
                 all_results.append(game)
         
         # Filtrar juegos con contenido sexual
-        all_results = [
-            game for game in all_results
-            if not has_sexual_content(game)
-        ]
+        flags = sexual_keyword_matcher.search_games(all_results)
+        all_results = [game for game, is_sexual in zip(all_results, flags) if not is_sexual]
         
         # Aplicar paginación
         start_idx = (page - 1) * limit
         end_idx = start_idx + limit
         paged_results = all_results[start_idx:end_idx]
-        
+
         # Añadir flag para indicar si hay más resultados
         has_more = end_idx < len(all_results)
         for game in paged_results:
@@ -372,23 +346,38 @@ def add_game_review(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al añadir reseña: {str(e)}")
 
+def _load_genres():
+    """
+    Obtiene los géneros desde RAWG (solo id y nombre).
+    
+    Solo se ejecuta desde la caché stale-while-revalidate (refresco o carga en frío).
+    Devuelve None si RAWG falla para conservar la última instantánea válida.
+    """
+    genres = rawg_api.get_genres()
+    
+    if not genres or "results" not in genres:
+        return None
+    
+    # Retornar solo los datos necesarios (id y nombre)
+    return [{"id": genre["id"], "name": genre["name"]} for genre in genres.get("results", [])]
+
+# Precargar los géneros al arrancar
+swr_cache.register_warmup("games-genres", _load_genres)
+
 @router.get("/genres", response_model=List[Dict[str, Any]])
 def get_genres(db: Session = Depends(get_db)):
     """
     Obtiene la lista de géneros de juegos disponibles.
+    
+    Se sirve desde la última instantánea válida y se refresca en segundo plano
+    (stale-while-revalidate); solo espera a RAWG si todavía no hay ninguna instantánea.
     """
-    try:
-        # Obtener géneros desde RAWG
-        genres = rawg_api.get_genres()
-        
-        if not genres or "results" not in genres:
-            return []
-        
-        # Retornar solo los datos necesarios (id y nombre)
-        return [{"id": genre["id"], "name": genre["name"]} for genre in genres.get("results", [])]
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener géneros: {str(e)}")
+    return swr_cache.get(
+        "games-genres",
+        _load_genres,
+        soft_ttl=settings.GENRES_SOFT_TTL_SECONDS,
+        default=[],
+    )
 
 @router.get("/by-genre", response_model=schemas.PaginatedGames)
 def get_games_by_genre(
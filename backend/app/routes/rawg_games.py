@@ -5,29 +5,21 @@ from typing import List, Optional
 from ..database import get_db
 from .. import models, schemas
 from ..utils.rawg_api import rawg_api
-from ..utils.google_ai import classify_games_sexual_content
+from ..utils.rawg_catalog import rawg_catalog
+from ..utils.rawg_projection import project_games
+from ..utils.moderation import (
+    moderate_games, has_explicit_keywords, flag_explicit_games,
+    moderation_statuses, moderation_columns, stored_game_for_moderation,
+)
+from ..utils.swr_cache import swr_cache
+from ..config import settings
+from .admin import require_admin_key
 
 router = APIRouter(
     prefix="/rawg",
     tags=["rawg-games"],
 )
 
-# Lista común de palabras clave sexuales
-sexual_keywords = [
-    "sexual", "nudity", "adult", "erotic", "porn", "hentai", "ecchi", 
-    "fetish", "provocative", "explicit", "mature", "xxx", "nsfw", "ntr", 
-    "sensual", "seductive", "intimate", "suggestive", "lewd", "obscene",
-    # Términos adicionales
-    "girlfriend", "boyfriend", "dating", "romance", "sexy", "hot",
-    "love", "kiss", "touching", "strip", "undress", "lingerie", "bra",
-    "underwear", "bikini", "swimsuit", "pleasure", "desire", "passion",
-    "flirt", "seduce", "lust", "fantasy", "waifu", "huniepop", "dream daddy",
-    "hatoful", "boob", "breast", "butt", "ass", "grope", "panty", "thong",
-    "dating sim", "visual novel", "relationship", "body", "naked", "shower",
-    "bath", "beach", "model", "pose", "tease", "tempt", "virgin", "virgin*",
-    "hookup", "affair", "50 shades", "topless", "onlyfans", "dress up"
-]
-
 # Modificación de la función para ser menos estricta
 def has_sexual_content(game):
     """
@@ -43,41 +35,15 @@ def has_sexual_content(game):
     Returns:
         Boolean: True si se detecta contenido sexual, False en caso contrario
     """
-    # Lista de juegos conocidos que son seguros para mostrar 
-    safe_game_ids = [3328, 4200, 5286, 12020, 22509, 28, 4291, 32, 802, 58175]
-    
-    # Si el juego está en nuestra lista segura, permitirlo
-    if game.get("id") in safe_game_ids:
-        return False
-    
-    # Lista de palabras clave de alta prioridad - si aparecen en el título, bloquear
-    high_priority_keywords = [
-        "porn", "hentai", "xxx", "nsfw", "erotic", "sexual content",
-        "nudity", "adult only", "strip", "sex"
-    ]
-    
-    # Verificar explícitamente el título (prioridad alta)
-    if game.get("name"):
-        game_name = game.get("name", "").lower()
-        if any(keyword in game_name for keyword in high_priority_keywords):
-            return True
-    
-    # Para la descripción, sólo verificar coincidencias exactas de palabras clave de alta prioridad
-    if game.get("description"):
-        game_desc = game.get("description", "").lower()
-        # Solo bloquear si hay múltiples coincidencias o coincidencias exactas
-        matches = sum(1 for keyword in high_priority_keywords if keyword in game_desc)
-        if matches >= 2:  # Requiere al menos 2 coincidencias para bloquear
-            return True
-    
-    # Solo bloquear si hay coincidencias claras
-    return False
+    return has_explicit_keywords(game)
 
 @router.get("/search", response_model=dict)
 def search_rawg_games(
     query: str = Query(..., description="Texto para buscar juegos"),
     page: int = Query(1, description="Número de página"),
-    page_size: int = Query(20, description="Elementos por página")
+    page_size: int = Query(20, description="Elementos por página"),
+    fields: Optional[str] = Query(None, description="Campos a incluir separados por comas (por defecto, los de GameResult)"),
+    db: Session = Depends(get_db)
 ):
     """
     Busca juegos en la API de RAWG por nombre.
@@ -90,6 +56,8 @@ def search_rawg_games(
         query: Término de búsqueda
         page: Número de página para paginación
         page_size: Número de resultados por página
+        fields: Campos de cada juego a devolver (por defecto, los de GameResult)
+        db: Sesión de base de datos (réplica local del catálogo)
         
     Returns:
         Diccionario con resultados paginados de la búsqueda
@@ -97,27 +65,60 @@ def search_rawg_games(
     Raises:
         HTTPException 503: Si hay un error al conectar con la API de RAWG
     """
-    result = rawg_api.search_games(query, page, page_size)
+    # Buscar primero en la réplica local y solo consultar RAWG si no hay coincidencias
+    result = rawg_catalog.query_games(db, page=page, page_size=page_size, search=query)
+    if not result:
+        result = rawg_api.search_games(query, page, page_size)
     if not result:
         raise HTTPException(status_code=503, detail="Error al conectar con RAWG API")
     
     # Filtrar juegos con contenido sexual usando Google AI
     games = result.get("results", [])
     if games:
-        # Preparamos solo los campos relevantes para el prompt
-        games_for_ai = [
-            {"name": g.get("name", ""), "description": g.get("description", "")} for g in games
-        ]
         try:
-            flags = classify_games_sexual_content(games_for_ai)
+            flags = moderate_games(games)
             filtered_results = [g for g, is_sexual in zip(games, flags) if not is_sexual]
         except Exception:
             filtered_results = []
     else:
         filtered_results = []
-    result["results"] = filtered_results
+    result["results"] = project_games(filtered_results, fields)
     return result
 
+@router.get("/games", response_model=dict)
+def get_rawg_games_by_ids(
+    ids: str = Query(..., description="IDs de juegos de RAWG separados por comas (máx. 40)")
+):
+    """
+    Obtiene los detalles de varios juegos de RAWG en una sola petición.
+    
+    Sustituye N llamadas a `/rawg/game/{game_id}`: los juegos se sirven desde la caché
+    de detalles cuando es posible y los restantes se descargan de forma concurrente.
+    Los juegos con contenido inapropiado se omiten igual que en el endpoint individual.
+    
+    Args:
+        ids: Lista de IDs separados por comas, por ejemplo `3328,4200,5286`
+        
+    Returns:
+        Diccionario con los juegos encontrados (en el orden pedido) y los IDs no encontrados
+        
+    Raises:
+        HTTPException 400: Si la lista de IDs no es válida o supera el máximo
+    """
+    try:
+        game_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="La lista de IDs debe contener solo números")
+    if not game_ids or len(game_ids) > 40:
+        raise HTTPException(status_code=400, detail="Se deben indicar entre 1 y 40 IDs")
+    
+    games = rawg_api.get_games_by_ids(game_ids)
+    found = [game for game in games if game]
+    results = [game for game, is_sexual in zip(found, flag_explicit_games(found)) if not is_sexual]
+    missing = [game_id for game_id, game in zip(game_ids, games) if not game]
+    
+    return {"count": len(results), "results": results, "missing": missing}
+
 @router.get("/game/{game_id}", response_model=dict)
 def get_rawg_game(game_id: int):
     """
@@ -191,13 +192,18 @@ def add_rawg_game_to_favorites(
         generos = [genre["name"] for genre in game_data.get("genres", [])]
         tags = [tag["name"] for tag in game_data.get("tags", [])]
         
-        # Crear objeto de juego
+        status_value, decided_by = moderation_statuses([stored_game_for_moderation(
+            game_data["name"], game_data.get("description", ""), generos, tags, rawg_id=game_id
+        )])[0]
+        
+        # Crear objeto de juego con su veredicto de moderación
         db_game = models.JuegosFavoritosDeUsuarioQueProvienenDeRawg(
             nombre=game_data["name"],
             imagen=game_data.get("background_image", ""),
             descripcion=game_data.get("description", ""),
             generos=generos,
-            tags=tags
+            tags=tags,
+            **moderation_columns(status_value, decided_by)
         )
         
         db.add(db_game)
@@ -217,11 +223,39 @@ def add_rawg_game_to_favorites(
     
     return db_game
 
+def _load_trending_games(page: int, page_size: int, max_pages: int):
+    """
+    Obtiene juegos en tendencia de RAWG ya filtrados con IA.
+    
+    Solo se ejecuta desde la caché stale-while-revalidate (refresco o carga en frío).
+    Devuelve None si RAWG falla para conservar la última instantánea válida.
+    """
+    result = rawg_api.get_trending_games(page, page_size, max_pages)
+    if not result:
+        return None
+    # Filtrar con IA
+    games = result.get("results", [])
+    if games:
+        try:
+            flags = moderate_games(games)
+            filtered_results = [g for g, is_sexual in zip(games, flags) if not is_sexual]
+        except Exception:
+            # Sin clasificación no publicamos una instantánea nueva
+            return None
+    else:
+        filtered_results = []
+    result["results"] = filtered_results
+    return result
+
+# Precargar la portada de tendencias (parámetros por defecto) al arrancar
+swr_cache.register_warmup(("rawg-trending", 1, 20, 1), lambda: _load_trending_games(1, 20, 1))
+
 @router.get("/trending", response_model=dict)
 def get_trending_games(
     page: int = Query(1, description="Número de página inicial"),
     page_size: int = Query(20, description="Elementos por página (máx. 40 recomendado)"),
-    max_pages: int = Query(1, description="Número de páginas a recuperar (aumenta la cantidad de juegos)", ge=1, le=5)
+    max_pages: int = Query(1, description="Número de páginas a recuperar (aumenta la cantidad de juegos)", ge=1, le=5),
+    fields: Optional[str] = Query(None, description="Campos a incluir separados por comas (por defecto, los de GameResult)")
 ):
     """
     Obtiene juegos populares o tendencia desde RAWG.
@@ -229,43 +263,36 @@ def get_trending_games(
     Esta función permite recuperar más juegos en tendencia combinando resultados de múltiples páginas.
     Los resultados son filtrados automáticamente para excluir contenido inapropiado.
     
+    La respuesta se sirve siempre desde la última instantánea válida (stale-while-revalidate):
+    cuando caduca se refresca en segundo plano, sin que la petición espere a RAWG. La primera
+    petición con unos parámetros sin instantánea la carga (una sola vez aunque haya varias a la vez);
+    si RAWG falla se devuelve una lista vacía.
+    
     Args:
         page: Página inicial para la búsqueda
         page_size: Número de juegos por página (máximo recomendado: 40)
         max_pages: Número de páginas a recuperar (1-5)
+        fields: Campos de cada juego a devolver (por defecto, los de GameResult)
         
     Returns:
         Diccionario con juegos en tendencia paginados y filtrados
         
-    Raises:
-        HTTPException 503: Si hay un error al conectar con la API de RAWG
-        
     Ejemplo: Para obtener 100 juegos en tendencia, puedes usar page_size=20 y max_pages=5
     """
-    result = rawg_api.get_trending_games(page, page_size, max_pages)
-    if not result:
-        raise HTTPException(status_code=503, detail="Error al conectar con RAWG API")
-    # Filtrar con IA
-    games = result.get("results", [])
-    if games:
-        # Preparamos solo los campos relevantes para el prompt
-        games_for_ai = [
-            {"name": g.get("name", ""), "description": g.get("description", "")} for g in games
-        ]
-        try:
-            flags = classify_games_sexual_content(games_for_ai)
-            filtered_results = [g for g, is_sexual in zip(games, flags) if not is_sexual]
-        except Exception:
-            filtered_results = []
-    else:
-        filtered_results = []
-    result["results"] = filtered_results
-    return result
+    snapshot = swr_cache.get(
+        ("rawg-trending", page, page_size, max_pages),
+        lambda: _load_trending_games(page, page_size, max_pages),
+        soft_ttl=settings.TRENDING_SOFT_TTL_SECONDS,
+        default={"count": 0, "next": None, "results": []},
+    )
+    # La instantánea es compartida: se proyecta sobre una copia
+    return {**snapshot, "results": project_games(snapshot["results"], fields)}
 
 @router.get("/random", response_model=dict)
 def get_random_games(
     count: int = Query(10, description="Número de juegos aleatorios a recuperar", ge=1, le=50),
-    _t: str = Query(None, description="Timestamp parameter to prevent caching")
+    _t: str = Query(None, description="Timestamp parameter to prevent caching"),
+    db: Session = Depends(get_db)
 ):
     """
     Obtiene una selección verdaderamente aleatoria de juegos.
@@ -280,6 +307,7 @@ def get_random_games(
     Args:
         count: Número de juegos aleatorios a recuperar (entre 1 y 50)
         _t: Parámetro de timestamp para evitar caché (generado automáticamente)
+        db: Sesión de base de datos (réplica local del catálogo)
         
     Returns:
         Diccionario con juegos aleatorios filtrados y con precios
@@ -306,12 +334,15 @@ def get_random_games(
         selected_ordering = random.choice(orderings)
         print(f"Selected ordering: {selected_ordering}")
         
-        # Select random page numbers
-        page_numbers = random.sample(range(1, 20), min(5, count))
+        # Use the local catalog mirror when it has enough games
+        catalog_games = rawg_catalog.random_games(db, count)
+        
+        # Select random page numbers (none are needed if the local catalog answered)
+        page_numbers = [] if catalog_games else random.sample(range(1, 20), min(5, count))
         print(f"Selected pages: {page_numbers}")
         
         # Collect games from different pages with the selected ordering
-        all_games = []
+        all_games = list(catalog_games or [])
         for page in page_numbers:
             try:
                 # Use RAWG API to fetch games with specific parameters
@@ -395,11 +426,8 @@ def get_random_games(
         final_games = unique_games[:count]
         # Filtrar con IA
         if final_games:
-            games_for_ai = [
-                {"name": g.get("name", ""), "description": g.get("description", "")} for g in final_games
-            ]
             try:
-                flags = classify_games_sexual_content(games_for_ai)
+                flags = moderate_games(final_games)
                 final_games = [g for g, is_sexual in zip(final_games, flags) if not is_sexual]
             except Exception:
                 final_games = []
@@ -434,3 +462,36 @@ def get_game_screenshots(game_id: int):
         return screenshots
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Error al obtener capturas: {str(e)}")
+
+@router.post("/catalog/sync", status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(require_admin_key)])
+def sync_rawg_catalog(
+    max_pages: Optional[int] = Query(None, ge=1, description="Número máximo de páginas a recorrer")
+):
+    """
+    Lanza en segundo plano una sincronización de la réplica local del catálogo de RAWG.
+    
+    Requiere la cabecera `X-Admin-Key`. La sincronización no se ejecuta dentro de la
+    petición: su progreso se consulta en `/rawg/catalog/status`. Para sincronizar de forma
+    periódica es preferible programar `python -m app.utils.rawg_catalog`.
+    
+    Args:
+        max_pages: Número máximo de páginas a recorrer (por defecto, el configurado)
+        
+    Returns:
+        Si se ha lanzado la sincronización o ya había una en marcha en este proceso
+    """
+    started = rawg_catalog.start_background_sync(max_pages=max_pages)
+    return {
+        "iniciada": started,
+        "mensaje": "Sincronización lanzada" if started else "Ya hay una sincronización en marcha",
+    }
+
+@router.get("/catalog/status", status_code=status.HTTP_200_OK)
+def get_rawg_catalog_status(db: Session = Depends(get_db)):
+    """
+    Obtiene el estado de la réplica local del catálogo de RAWG.
+    
+    Returns:
+        Número de juegos replicados y fechas de la última sincronización
+    """
+    return rawg_catalog.status(db)
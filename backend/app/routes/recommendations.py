@@ -8,6 +8,8 @@ from ..database import get_db
 from .. import models, schemas
 from ..utils.recommendation_engine import recommendation_engine
 from ..utils.rawg_api import rawg_api
+from ..utils.swr_cache import swr_cache
+from ..utils.moderation import visible_filter
 from ..config import settings  # Asumiendo que tienes esta configuración para JWT
 import random
 
@@ -138,8 +140,10 @@ def get_recommendations_by_genres(
     import random  # Add import for randomization
     
     try:
-        # Obtener juegos dentro del presupuesto
-        query = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones)
+        # Obtener juegos dentro del presupuesto y no bloqueados por moderación
+        query = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones).filter(
+            visible_filter(models.JuegosScrapeadoDeSteamParaRecomendaiones)
+        )
         
         if max_price is not None and max_price > 0:
             query = query.filter(models.JuegosScrapeadoDeSteamParaRecomendaiones.precio <= max_price)
@@ -260,6 +264,48 @@ def get_recommendations_similar_to_game(
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Error al obtener recomendaciones: {str(e)}")
 
+def _load_trending_recommendations(limit: int):
+    """
+    Convierte los juegos en tendencia de RAWG al formato de recomendaciones.
+    
+    Solo se ejecuta desde la caché stale-while-revalidate (refresco o carga en frío).
+    Devuelve None si RAWG falla para conservar la última instantánea válida.
+    """
+    # Obtener juegos en tendencia desde RAWG
+    trending_games = rawg_api.get_trending_games(1, limit)
+    
+    if not trending_games or "results" not in trending_games:
+        return None
+    
+    # Los listados de RAWG no traen descripción: se completa con los detalles de todos
+    # los juegos en una sola descarga concurrente
+    games = trending_games.get("results", [])[:limit]
+    details = rawg_api.get_games_by_ids([game["id"] for game in games])
+    
+    # Convertir al formato de recomendaciones
+    recommendations = []
+    for game, detail in zip(games, details):
+        # Extraer géneros
+        genres = [genre["name"] for genre in game.get("genres", [])]
+        
+        # Crear objeto de recomendación
+        rec = {
+            "id": game["id"],
+            "nombre": game["name"],
+            "generos": genres,
+            "precio": round(15 + game.get("rating", 0) * 2, 2),  # Precio simulado
+            "descripcion": (detail or {}).get("description_raw") or game.get("description", ""),
+            "imagen_principal": game.get("background_image", ""),
+            "puntuacion": min(1.0, game.get("rating", 0) / 5)  # Convertir a escala 0-1
+        }
+        
+        recommendations.append(rec)
+    
+    return recommendations
+
+# Precargar las tendencias con el límite por defecto al arrancar
+swr_cache.register_warmup(("recommendations-trending", 10), lambda: _load_trending_recommendations(10))
+
 @router.get("/trending", response_model=List[schemas.JuegoRecomendado])
 def get_trending_recommendations(
     limit: int = Query(10, ge=1, le=50, description="Número máximo de recomendaciones"),
@@ -267,36 +313,17 @@ def get_trending_recommendations(
 ):
     """
     Obtiene juegos en tendencia como recomendaciones.
+    
+    Se sirve desde la última instantánea válida y se refresca en segundo plano
+    (stale-while-revalidate); solo espera a RAWG si todavía no hay ninguna instantánea
+    para ese límite.
     """
-    try:
-        # Obtener juegos en tendencia desde RAWG
-        trending_games = rawg_api.get_trending_games(1, limit)
-        
-        if not trending_games or "results" not in trending_games:
-            return []
-        
-        # Convertir al formato de recomendaciones
-        recommendations = []
-        for game in trending_games.get("results", [])[:limit]:
-            # Extraer géneros
-            genres = [genre["name"] for genre in game.get("genres", [])]
-            
-            # Crear objeto de recomendación
-            rec = {
-                "id": game["id"],
-                "nombre": game["name"],
-                "generos": genres,
-                "precio": round(15 + game.get("rating", 0) * 2, 2),  # Precio simulado
-                "descripcion": game.get("description", ""),
-                "imagen_principal": game.get("background_image", ""),
-                "puntuacion": min(1.0, game.get("rating", 0) / 5)  # Convertir a escala 0-1
-            }
-            
-            recommendations.append(rec)
-        
-        return recommendations
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Error al obtener tendencias: {str(e)}")  # Corregido paréntesis
+    return swr_cache.get(
+        ("recommendations-trending", limit),
+        lambda: _load_trending_recommendations(limit),
+        soft_ttl=settings.TRENDING_SOFT_TTL_SECONDS,
+        default=[],
+    )
 
 @router.get("/personalized", response_model=List[schemas.JuegoRecomendado])
 def get_personalized_recommendations(
@@ -3,8 +3,11 @@ from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from ..database import get_db
 from .. import models, schemas
-from ..utils.steam_scraper import steam_scraper
-from ..utils.google_ai import classify_games_sexual_content
+from ..utils.scrape_jobs import scrape_job_runner, job_to_dict, ScrapeJobConflict
+from ..utils.steam_prices import steam_price_refresher
+from ..utils.moderation import (
+    moderation_statuses, moderation_columns, stored_game_for_moderation, visible_filter, MODERATION_BLOCKED
+)
 from pydantic import BaseModel
 import logging
 import json
@@ -36,8 +39,11 @@ def create_steam_game(game: schemas.JuegoSteamCreate, db: Session = Depends(get_
     if db_game:
         raise HTTPException(status_code=400, detail="Juego ya registrado")
     
-    # Crear nuevo juego
-    db_game = models.JuegosScrapeadoDeSteamParaRecomendaiones(**game.dict())
+    # Crear nuevo juego con su veredicto de moderación
+    status_value, decided_by = moderation_statuses([
+        stored_game_for_moderation(game.nombre, game.descripcion, game.generos, game.tags)
+    ])[0]
+    db_game = models.JuegosScrapeadoDeSteamParaRecomendaiones(**game.dict(), **moderation_columns(status_value, decided_by))
     
     db.add(db_game)
     db.commit()
@@ -56,7 +62,9 @@ def read_steam_games(skip: int = 0, limit: int = 100, db: Session = Depends(get_
     Returns:
         Lista de juegos de Steam.
     """
-    games = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones).offset(skip).limit(limit).all()
+    games = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones).filter(
+        visible_filter(models.JuegosScrapeadoDeSteamParaRecomendaiones)
+    ).offset(skip).limit(limit).all()
     return games
 
 @router.get("/{game_id}", response_model=schemas.JuegoSteam)
@@ -74,7 +82,7 @@ def read_steam_game(game_id: int, db: Session = Depends(get_db)):
         models.JuegosScrapeadoDeSteamParaRecomendaiones.id == game_id
     ).first()
     
-    if game is None:
+    if game is None or game.moderation_status == MODERATION_BLOCKED:
         raise HTTPException(status_code=404, detail="Juego no encontrado")
     return game
 
@@ -100,25 +108,18 @@ def delete_steam_game(game_id: int, db: Session = Depends(get_db)):
     db.commit()
     return None
 
-@router.post("/scrape-bulk", status_code=status.HTTP_200_OK)
+@router.post("/scrape-bulk", status_code=status.HTTP_202_ACCEPTED)
 def scrape_bulk_steam_games(
     min_new_games: int = Query(100, description="Número mínimo de juegos NUEVOS a añadir"),
+    workers: int = Query(None, ge=1, le=16, description="Procesos entre los que repartir los términos de búsqueda"),
     db: Session = Depends(get_db)
 ):
     """
-    Scrapea juegos indies de Steam de forma masiva y los guarda en la base de datos.
-
-    - **min_new_games**: Número mínimo de juegos nuevos a añadir
-    - **db**: Sesión de la base de datos
-
-    Returns:
-        Estadísticas del proceso de scraping.
-    """
-    """
-    Scrapea juegos indies de Steam de forma masiva y sincrónica.
+    Encola un scraping masivo de juegos indies de Steam.
     
-    Este endpoint inicia un proceso sincrónico para scrapear juegos indies de Steam
-    directamente desde la página web (no usa API).
+    El scraping se ejecuta fuera de la petición HTTP, en el proceso trabajador
+    (`python -m app.utils.scrape_jobs`); este endpoint solo crea el trabajo y devuelve su ID.
+    El progreso se consulta en `GET /steam-games/scrape-jobs/{job_id}`.
     
     Características:
     - Scrapea juegos que aparecen en la página de tags de Indie de Steam
@@ -128,78 +129,79 @@ def scrape_bulk_steam_games(
     - Excluye juegos con tags de contenido adulto ("Sexual Content", "Nudity", etc.)
     - Almacena los juegos en la base de datos para recomendaciones
     
-    Nota: Este es un proceso sincrónico que puede tardar varios minutos.
-    Para bases de datos grandes se recomienda ejecutar en horario de bajo tráfico.
+    Solo puede haber un scraping masivo en curso a la vez. Con `workers` > 1 los términos
+    de búsqueda se reparten entre varios procesos que se coordinan a través de la base de
+    datos, de modo que ningún juego se descarga dos veces.
+    
+    - **min_new_games**: Número mínimo de juegos nuevos a añadir
+    - **workers**: Número de procesos (por defecto STEAM_SCRAPE_WORKERS); se limita a
+      STEAM_MAX_CONCURRENCY_PER_HOST para no superar las peticiones simultáneas a Steam
     
     Returns:
-        Estadísticas del proceso de scraping y número de juegos añadidos a la BD
+        ID y estado del trabajo creado
+        
+    Raises:
+        HTTPException 409: Si ya hay un scraping masivo en curso
     """
     try:
-        # Obtener los nombres de juegos que ya existen en la BD para evitar duplicados
-        existing_games = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones.nombre).all()
-        existing_names = [game[0] for game in existing_games]
-        
-        logging.info(f"Ya existen {len(existing_names)} juegos en la base de datos")
-        
-        # Iniciar el scraping, pasándole la lista de nombres existentes
-        logging.info(f"Iniciando scraping de al menos {min_new_games} juegos NUEVOS desde la web de Steam...")
-        scrape_results = steam_scraper.scrape_bulk_indie_games(
-            min_new_games=min_new_games, 
-            existing_names=existing_names
-        )
-        
-        games_to_add = scrape_results["results"]
-        stats = scrape_results["stats"]
-        
-        if len(games_to_add) == 0:
-            return {
-                "status": "warning",
-                "message": "No se encontraron juegos nuevos para añadir",
-                "estadisticas_scraping": stats,
-                "juegos_nuevos": 0,
-                "juegos_actuales": len(existing_names)
-            }
-        
-        # Contar juegos añadidos con éxito
-        added_count = 0
-        
-        # Añadir juegos a la base de datos en lotes para mejor rendimiento
-        batch_size = 50
-        for i in range(0, len(games_to_add), batch_size):
-            batch = games_to_add[i:i+batch_size]
-            
-            for game_data in batch:
-                try:
-                    # Crear nuevo juego en la BD
-                    new_game = models.JuegosScrapeadoDeSteamParaRecomendaiones(**game_data)
-                    db.add(new_game)
-                    added_count += 1
-                        
-                except Exception as e:
-                    logging.error(f"Error añadiendo juego {game_data.get('nombre', 'desconocido')}: {str(e)}")
-            
-            # Commit por lotes para evitar problemas de memoria
-            db.commit()
-            logging.info(f"Guardados {added_count} juegos en la base de datos hasta ahora")
-        
-        # Obtener el recuento final después de añadir juegos
-        final_count = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones).count()
-        
-        return {
-            "status": "success",
-            "message": f"Proceso de scraping completado. Añadidos {added_count} juegos nuevos.",
-            "estadisticas_scraping": stats,
-            "juegos_nuevos": added_count,
-            "juegos_actuales": final_count
-        }
-        
+        job = scrape_job_runner.start(db, min_new_games, workers)
+    except ScrapeJobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"job_id": job.id, "estado": job.estado}
+
+@router.get("/scrape-jobs/{job_id}", status_code=status.HTTP_200_OK)
+def get_scrape_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Obtiene el estado y los contadores en vivo de un trabajo de scraping masivo.
+    
+    Los contadores (`total_consultados`, `juegos_validos`, `juegos_duplicados`,
+    `juegos_excluidos`, `errores`, `juegos_guardados`...) se actualizan mientras el
+    trabajo está en marcha; `trabajadores` los desglosa por proceso, con su ritmo y
+    las métricas de cada etapa.
+    
+    Raises:
+        HTTPException 404: Si el trabajo no existe
+    """
+    job = db.query(models.TrabajoScraping).filter(models.TrabajoScraping.id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job_to_dict(job)
+
+@router.post("/scrape-jobs/{job_id}/cancel", status_code=status.HTTP_200_OK)
+def cancel_scrape_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Solicita la cancelación de un trabajo de scraping masivo.
+    
+    El trabajo se detiene tras el lote en curso y guarda los juegos obtenidos hasta entonces.
+    
+    Raises:
+        HTTPException 404: Si el trabajo no existe
+    """
+    job = scrape_job_runner.cancel(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job_to_dict(job)
+
+@router.post("/prices/refresh", status_code=status.HTTP_200_OK)
+def refresh_steam_prices(
+    max_games: int = Query(None, ge=1, description="Número máximo de juegos a comprobar"),
+    db: Session = Depends(get_db)
+):
+    """
+    Refresca el precio y el descuento de los juegos de Steam guardados.
+    
+    Solo se comprueban los juegos cuyo precio tiene más de STEAM_PRICE_REFRESH_MIN_AGE_HOURS
+    horas, empezando por los que son candidatos para más usuarios. Pensado para lanzarse
+    periódicamente (también disponible como `python -m app.utils.steam_prices`).
+    
+    Returns:
+        Estadísticas del refresco
+    """
+    try:
+        return steam_price_refresher.refresh(db, max_games=max_games)
     except Exception as e:
         db.rollback()
-        logging.error(f"Error en el proceso de scraping: {str(e)}")
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Error en el proceso de scraping: {str(e)}"
-        )
+        raise HTTPException(status_code=500, detail=f"Error refrescando precios: {str(e)}")
 
 @router.get("/count", status_code=status.HTTP_200_OK)
 def get_steam_games_count(db: Session = Depends(get_db)):
@@ -249,8 +251,10 @@ def recommend_steam_games_ai(
         raise HTTPException(status_code=404, detail="Usuario no encontrado o sin favoritos")
     fav_games = [{"name": g.nombre, "description": g.descripcion} for g in user.juegos_favoritos]
 
-    # Obtener todos los juegos de Steam
-    steam_games = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones).all()
+    # Obtener todos los juegos de Steam no bloqueados por moderación
+    steam_games = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones).filter(
+        visible_filter(models.JuegosScrapeadoDeSteamParaRecomendaiones)
+    ).all()
     if not steam_games:
         return []
 
@@ -31,6 +31,8 @@ class JuegoSteamCreate(JuegoSteamBase):
 
 class JuegoSteam(JuegoSteamBase):
     id: int
+    steam_app_id: Optional[int] = None
+    descuento: Optional[int] = None
     
     class Config:
         orm_mode = True
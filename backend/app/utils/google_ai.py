@@ -1,55 +1,166 @@
 import os
 import requests
 import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from ..config import settings
+
+logger = logging.getLogger(__name__)
 
 GOOGLE_AI_API_KEY = os.environ.get("GOOGLE_AI_API_KEY")
 
-def classify_games_sexual_content(games: list) -> list:
+# Modelo usado para moderar; forma parte de la clave de los veredictos cacheados
+MODERATION_MODEL = "gemini-pro"
+
+# Límite global de peticiones simultáneas a Gemini, compartido por todas las llamadas y sus hilos
+_request_slots = threading.BoundedSemaphore(max(1, settings.MODERATION_MAX_CONCURRENCY))
+
+# Aproximación de tokens por carácter para texto mixto español/inglés en JSON
+_CHARS_PER_TOKEN = 4
+_PROMPT_OVERHEAD_TOKENS = 80
+
+def _estimate_tokens(game) -> int:
+    return len(json.dumps(game, ensure_ascii=False)) // _CHARS_PER_TOKEN + 1
+
+def _pack_batches(games: list, token_budget: int, max_games: int) -> list:
+    """
+    Agrupa los juegos en lotes consecutivos sin superar el presupuesto de tokens estimado.
+
+    Un juego que por sí solo supera el presupuesto va en un lote propio.
+    """
+    batches = []
+    current, current_tokens = [], _PROMPT_OVERHEAD_TOKENS
+    for game in games:
+        tokens = _estimate_tokens(game)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_games):
+            batches.append(current)
+            current, current_tokens = [], _PROMPT_OVERHEAD_TOKENS
+        current.append(game)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _request_batch(batch: list, timeout: float):
+    """
+    Envía un lote a Gemini.
+
+    Returns:
+        Lista de veredictos, o None si la respuesta no contiene una lista del tamaño del lote
+
+    Raises:
+        Exception: Si falla la llamada HTTP
+    """
+    prompt = (
+        "Te paso una lista de juegos en formato JSON. "
+        "Devuélveme una lista JSON de booleanos (true si el juego tiene contenido sexual, false si es seguro para todos los públicos). "
+        "Solo responde la lista JSON, sin explicación ni texto extra. "
+        "Ejemplo de respuesta: [false, true, false]. "
+        "Lista de juegos: "
+        + json.dumps(batch, ensure_ascii=False)
+    )
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{MODERATION_MODEL}:generateContent"
+    headers = {"Content-Type": "application/json"}
+    data = {
+        "contents": [{"parts": [{"text": prompt}]}]
+    }
+    params = {"key": GOOGLE_AI_API_KEY}
+    resp = requests.post(url, headers=headers, params=params, json=data, timeout=timeout)
+    resp.raise_for_status()
+    text = resp.json()["candidates"][0]["content"]["parts"][0]["text"]
+    # Buscar la primera lista JSON en la respuesta
+    start = text.find('[')
+    end = text.find(']', start)
+    if start == -1 or end == -1:
+        return None
+    try:
+        batch_result = json.loads(text[start:end+1])
+    except Exception:
+        return None
+    if isinstance(batch_result, list) and len(batch_result) == len(batch):
+        return batch_result
+    return None
+
+def _classify_batch(batch: list, fallback, deadline_at: float) -> list:
+    """
+    Clasifica un lote; si la respuesta no cuadra con el lote, lo parte en dos y reintenta cada mitad.
+
+    Solo se vuelve a partir la mitad que vuelve a fallar. Los errores HTTP asignan
+    `fallback` a todo el lote y el plazo agotado, None (sin veredicto). La espera por un
+    hueco del límite global de peticiones también cuenta para el plazo.
+    """
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0 or not _request_slots.acquire(timeout=remaining):
+        return [None] * len(batch)
+    try:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            return [None] * len(batch)
+        result = _request_batch(batch, min(30, remaining))
+    except Exception:
+        return [fallback] * len(batch)
+    finally:
+        _request_slots.release()
+    if result is not None:
+        return result
+    if len(batch) == 1:
+        return [fallback]
+
+    middle = len(batch) // 2
+    logger.info(f"Respuesta de moderación con tamaño incorrecto; reintentando el lote de {len(batch)} en dos mitades")
+    return _classify_batch(batch[:middle], fallback, deadline_at) + _classify_batch(batch[middle:], fallback, deadline_at)
+
+def ai_moderation_available() -> bool:
+    """Indica si el clasificador de IA se puede usar (hay API key)"""
+    return bool(GOOGLE_AI_API_KEY)
+
+def classify_games_sexual_content(games: list, fallback=None, deadline: float = None) -> list:
     """
     Usa Google AI Studio (Gemini) para clasificar si los juegos tienen contenido sexual.
-    Devuelve una lista de booleanos (True = sexual, False = seguro).
-    Si la IA falla, devuelve todos como False (seguros).
+    Devuelve una lista alineada con `games`: True = sexual, False = seguro, None = sin veredicto.
+
+    Los lotes se forman por presupuesto de tokens estimado (MODERATION_BATCH_TOKEN_BUDGET, con un
+    máximo de MODERATION_BATCH_SIZE juegos) y se envían en paralelo con un plazo total de `deadline`
+    segundos (MODERATION_DEADLINE_SECONDS por defecto). Cada llamada usa sus propios hilos, pero
+    las peticiones a Gemini de todas las llamadas comparten un límite global de
+    MODERATION_MAX_CONCURRENCY; un lote que no consigue hueco antes del plazo queda sin veredicto.
+    Si la IA falla en un lote sus juegos reciben `fallback`; los que no responden a tiempo
+    quedan siempre sin veredicto (None), nunca como seguros.
     """
     if not GOOGLE_AI_API_KEY:
         raise Exception("GOOGLE_AI_API_KEY no configurada")
+    if deadline is None:
+        deadline = settings.MODERATION_DEADLINE_SECONDS
     # Limitar tamaño de lote para evitar problemas de tokens
-    batch_size = 10
+    batches = _pack_batches(games, settings.MODERATION_BATCH_TOKEN_BUDGET, settings.MODERATION_BATCH_SIZE)
+
+    started = time.monotonic()
+    deadline_at = started + deadline
+    executor = ThreadPoolExecutor(
+        max_workers=min(settings.MODERATION_MAX_CONCURRENCY, len(batches)) or 1,
+        thread_name_prefix="gemini-moderation",
+    )
+    try:
+        futures = [executor.submit(_classify_batch, batch, fallback, deadline_at) for batch in batches]
+        wait(futures, timeout=deadline)
+    finally:
+        # Los lotes sin empezar se cancelan; los que están en curso terminan solos, ya que
+        # no envían nada nuevo una vez pasado el plazo
+        executor.shutdown(wait=False, cancel_futures=True)
+
     results = []
-    for i in range(0, len(games), batch_size):
-        batch = games[i:i+batch_size]
-        prompt = (
-            "Te paso una lista de juegos en formato JSON. "
-            "Devuélveme una lista JSON de booleanos (true si el juego tiene contenido sexual, false si es seguro para todos los públicos). "
-            "Solo responde la lista JSON, sin explicación ni texto extra. "
-            "Ejemplo de respuesta: [false, true, false]. "
-            "Lista de juegos: "
-            + json.dumps(batch, ensure_ascii=False)
+    late = 0
+    for batch, future in zip(batches, futures):
+        if future.done() and not future.cancelled():
+            results.extend(future.result())
+        else:
+            late += 1
+            results.extend([None] * len(batch))
+    if late:
+        logger.warning(
+            f"{late} de {len(batches)} lotes de moderación superaron el plazo de {deadline}s"
         )
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
-        headers = {"Content-Type": "application/json"}
-        data = {
-            "contents": [{"parts": [{"text": prompt}]}]
-        }
-        params = {"key": GOOGLE_AI_API_KEY}
-        try:
-            resp = requests.post(url, headers=headers, params=params, json=data, timeout=30)
-            resp.raise_for_status()
-            text = resp.json()["candidates"][0]["content"]["parts"][0]["text"]
-            # Buscar la primera lista JSON en la respuesta
-            start = text.find('[')
-            end = text.find(']', start)
-            if start != -1 and end != -1:
-                json_str = text[start:end+1]
-                try:
-                    batch_result = json.loads(json_str)
-                    if isinstance(batch_result, list) and len(batch_result) == len(batch):
-                        results.extend(batch_result)
-                    else:
-                        results.extend([False] * len(batch))
-                except Exception:
-                    results.extend([False] * len(batch))
-            else:
-                results.extend([False] * len(batch))
-        except Exception:
-            results.extend([False] * len(batch))
+    logger.info(f"Moderación de {len(games)} juegos en {len(batches)} lotes: {time.monotonic() - started:.2f}s")
     return results
@@ -0,0 +1,58 @@
+from typing import Any, Dict
+from urllib.parse import urlsplit
+import asyncio
+import contextlib
+import time
+
+class _HostState:
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.spacing_lock = asyncio.Lock()
+        self.next_start = 0.0
+        self.requests = 0
+
+class HostScheduler:
+    """
+    Planificador de peticiones por host para scrapers asíncronos.
+
+    Limita cuántas peticiones hay en curso a la vez contra cada host y garantiza una
+    separación mínima entre el inicio de dos peticiones al mismo host, en lugar de
+    dormir un tiempo fijo antes de cada llamada. Debe crearse dentro del bucle de
+    eventos que lo va a usar.
+    """
+
+    def __init__(self, max_concurrency: int = 4, min_interval: float = 0.5):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self._hosts: Dict[str, _HostState] = {}
+        self._started = time.monotonic()
+
+    def _state(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.max_concurrency)
+        return self._hosts[host]
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str):
+        """Espera turno para `url` y mantiene ocupado uno de los huecos de su host durante la petición"""
+        state = self._state(url)
+        async with state.semaphore:
+            async with state.spacing_lock:
+                now = time.monotonic()
+                wait = state.next_start - now
+                state.next_start = max(now, state.next_start) + self.min_interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+            state.requests += 1
+            yield
+
+    def stats(self) -> Dict[str, Any]:
+        """Peticiones realizadas y ritmo medio (páginas por segundo) desde la creación"""
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        total = sum(state.requests for state in self._hosts.values())
+        return {
+            "paginas_descargadas": total,
+            "duracion_segundos": round(elapsed, 1),
+            "paginas_por_segundo": round(total / elapsed, 2),
+        }
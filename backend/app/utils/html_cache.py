@@ -0,0 +1,195 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Directorio backend/: las rutas relativas de la caché se resuelven desde aquí y no
+# desde el directorio de trabajo del proceso
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Cada cuántas escrituras se comprueba el tamaño de la caché
+PRUNE_EVERY = 100
+
+class HtmlCache:
+    """
+    Caché en disco de páginas HTML, direccionada por contenido.
+
+    - `objects/<sha256 del HTML>.html`: cuerpo de cada página; dos URLs con el mismo
+      contenido comparten fichero.
+    - `index/<sha256 de la URL>.json`: URL, `ETag`, `Last-Modified`, hash del cuerpo y,
+      opcionalmente, el resultado ya parseado junto con la versión del parser.
+
+    Permite enviar peticiones condicionales y, ante un 304, reutilizar el resultado
+    parseado sin volver a parsear. También sirve para reproducir un scraping sin red.
+
+    Con `max_bytes` la caché está acotada: cada PRUNE_EVERY escrituras se eliminan las
+    entradas menos recientes hasta que los cuerpos guardados ocupan como mucho ese tamaño.
+    Los métodos hacen E/S de disco bloqueante; desde código asíncrono deben llamarse con
+    `asyncio.to_thread`.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 0):
+        root_path = Path(root)
+        self.root = root_path if root_path.is_absolute() else BACKEND_DIR / root_path
+        self.max_bytes = max_bytes
+        self._objects = self.root / "objects"
+        self._index = self.root / "index"
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Clave estable de una URL con sus parámetros"""
+        full_url = f"{url}?{urlencode(sorted((params or {}).items()))}" if params else url
+        return hashlib.sha256(full_url.encode("utf-8")).hexdigest()
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Metadatos guardados para la clave o None"""
+        try:
+            with open(self._index / f"{key}.json", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Entrada de caché HTML ilegible {key}: {str(e)}")
+            return None
+
+    def read(self, entry: Dict[str, Any]) -> Optional[str]:
+        """Cuerpo HTML de una entrada"""
+        try:
+            return (self._objects / f"{entry['content_hash']}.html").read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Cabeceras `If-None-Match` / `If-Modified-Since` para revalidar una entrada"""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        html: str,
+        headers: Any,
+        parsed: Any = None,
+        parser_version: Optional[str] = None,
+    ) -> None:
+        """Guarda el cuerpo (si es nuevo) y los metadatos de una respuesta 200"""
+        body = html.encode("utf-8")
+        content_hash = hashlib.sha256(body).hexdigest()
+        object_path = self._objects / f"{content_hash}.html"
+        if not object_path.exists():
+            self._write_atomic(object_path, body)
+        entry = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_hash": content_hash,
+            "fetched_at": datetime.utcnow().isoformat(),
+        }
+        if parser_version is not None:
+            entry["parsed"] = {"version": parser_version, "data": parsed}
+        self._write_atomic(self._index / f"{key}.json", json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self._writes += 1
+            due = self.max_bytes > 0 and self._writes % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Elimina las entradas menos recientes (por fecha de escritura del índice) hasta que
+        los cuerpos guardados ocupan como mucho `max_bytes`, junto con los cuerpos que ya
+        no referencia ninguna entrada.
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        if self.max_bytes <= 0 or not self._index.exists():
+            return 0
+        entries = []
+        for path in self._index.glob("*.json"):
+            try:
+                modified = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            entry = self.get(path.stem)
+            entries.append((modified, path, entry.get("content_hash") if entry else None))
+        entries.sort(key=lambda item: item[0])
+
+        sizes = {}
+        for path in self._objects.glob("*.html") if self._objects.exists() else []:
+            try:
+                sizes[path.stem] = path.stat().st_size
+            except FileNotFoundError:
+                continue
+        references: Dict[str, int] = {}
+        for _, _, content_hash in entries:
+            if content_hash:
+                references[content_hash] = references.get(content_hash, 0) + 1
+
+        def drop_object(content_hash: str) -> int:
+            (self._objects / f"{content_hash}.html").unlink(missing_ok=True)
+            return sizes.pop(content_hash, 0)
+
+        # Cuerpos huérfanos (p. ej. de una poda interrumpida)
+        total = sum(sizes.values())
+        for content_hash in [h for h in sizes if h not in references]:
+            total -= drop_object(content_hash)
+
+        removed = 0
+        for _, path, content_hash in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            removed += 1
+            if content_hash:
+                references[content_hash] -= 1
+                if references[content_hash] <= 0:
+                    total -= drop_object(content_hash)
+        if removed:
+            logger.info(f"Caché HTML podada: {removed} entradas eliminadas, {total} bytes en uso")
+        return removed
+
+    def touch(self, key: str, entry: Dict[str, Any], parsed: Any = None, parser_version: Optional[str] = None) -> None:
+        """Actualiza una entrada revalidada con un 304 (fecha y, si se indica, resultado parseado)"""
+        entry = {**entry, "fetched_at": datetime.utcnow().isoformat()}
+        if parser_version is not None:
+            entry["parsed"] = {"version": parser_version, "data": parsed}
+        self._write_atomic(self._index / f"{key}.json", json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+    def iter_pages(self, url_prefix: str = "") -> Iterator[Tuple[str, str]]:
+        """Recorre las páginas guardadas cuya URL empieza por `url_prefix`, como pares (url, html)"""
+        if not self._index.exists():
+            return
+        for path in sorted(self._index.glob("*.json")):
+            entry = self.get(path.stem)
+            if entry and entry["url"].startswith(url_prefix):
+                html = self.read(entry)
+                if html is not None:
+                    yield entry["url"], html
@@ -0,0 +1,530 @@
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from .google_ai import ai_moderation_available, classify_games_sexual_content, MODERATION_MODEL
+from .keyword_matcher import KeywordMatcher
+from .moderation_worker import ModerationWorker
+
+logger = logging.getLogger(__name__)
+
+VerdictKey = Tuple[int, str]
+
+# Valores de la columna `moderation_status` de juegos_steam y juegos_favoritos
+MODERATION_APPROVED = "approved"
+MODERATION_BLOCKED = "blocked"
+MODERATION_PENDING = "pending"
+
+# Versión de las reglas de moderación (triaje y palabras clave); se guarda junto al veredicto
+MODERATION_POLICY_VERSION = "1"
+
+# Juegos de RAWG conocidos que son seguros aunque su título active alguna palabra clave
+SAFE_GAME_IDS = frozenset({3328, 4200, 5286, 12020, 22509, 28, 4291, 32, 802, 58175})
+
+# Palabras clave de alta prioridad: en el título bastan para bloquear
+HIGH_PRIORITY_KEYWORDS = [
+    "porn", "hentai", "xxx", "nsfw", "erotic", "sexual content",
+    "nudity", "adult only", "strip", "sex"
+]
+
+# Lista común de palabras clave sexuales (señales débiles: el juego se considera dudoso)
+SEXUAL_KEYWORDS = [
+    "sexual", "nudity", "adult", "erotic", "porn", "hentai", "ecchi", 
+    "fetish", "provocative", "explicit", "mature", "xxx", "nsfw", "ntr", 
+    "sensual", "seductive", "intimate", "suggestive", "lewd", "obscene",
+    # Términos adicionales
+    "girlfriend", "boyfriend", "dating", "romance", "sexy", "hot",
+    "love", "kiss", "touching", "strip", "undress", "lingerie", "bra",
+    "underwear", "bikini", "swimsuit", "pleasure", "desire", "passion",
+    "flirt", "seduce", "lust", "fantasy", "waifu", "huniepop", "dream daddy",
+    "hatoful", "boob", "breast", "butt", "ass", "grope", "panty", "thong",
+    "dating sim", "visual novel", "relationship", "body", "naked", "shower",
+    "bath", "beach", "model", "pose", "tease", "tempt", "virgin", "virgin*",
+    "hookup", "affair", "50 shades", "topless", "onlyfans", "dress up"
+]
+
+sexual_keyword_matcher = KeywordMatcher(SEXUAL_KEYWORDS)
+high_priority_matcher = KeywordMatcher(HIGH_PRIORITY_KEYWORDS)
+
+# Señales de RAWG para el triaje (slugs de tags, clasificación ESRB y géneros)
+BLOCK_TAG_SLUGS = frozenset({"sexual-content", "nudity", "hentai", "nsfw", "erotic", "porn", "adult"})
+SUSPICIOUS_TAG_SLUGS = frozenset({
+    "mature", "dating-sim", "romance", "visual-novel", "anime", "fanservice", "ecchi", "cute", "lgbtq",
+})
+BLOCK_ESRB_SLUGS = frozenset({"adults-only"})
+SAFE_ESRB_SLUGS = frozenset({"everyone", "everyone-10-plus", "early-childhood"})
+# Géneros que solo permiten aprobar localmente un juego con clasificación Teen (segunda señal);
+# sin clasificación ESRB el juego pasa por la IA. Se excluyen géneros amplios como estrategia,
+# arcade, puzle o cartas, donde también abunda el contenido adulto.
+SAFE_GENRE_SLUGS = frozenset({"racing", "sports", "family", "educational"})
+TEEN_ESRB_SLUG = "teen"
+
+def content_hash(game: Dict[str, Any]) -> str:
+    """Hash del contenido que ve el clasificador (nombre y descripción) y del modelo usado"""
+    payload = json.dumps(
+        {"name": game.get("name") or "", "description": game.get("description") or "", "model": MODERATION_MODEL},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class VerdictStore:
+    """
+    Almacén persistente de veredictos de moderación.
+
+    Los veredictos se guardan en la tabla `veredictos_moderacion` (clave: ID de RAWG
+    más hash del contenido) y se mantienen también en una caché LRU en memoria, de modo
+    que un veredicto ya conocido se resuelve con una consulta a diccionario.
+    """
+
+    def __init__(self, max_memory_entries: int = 10000):
+        self._memory: "OrderedDict[VerdictKey, bool]" = OrderedDict()
+        self._max_memory_entries = max_memory_entries
+        self._lock = threading.Lock()
+
+    def _remember(self, verdicts: Dict[VerdictKey, bool]) -> None:
+        with self._lock:
+            for key, value in verdicts.items():
+                self._memory[key] = value
+                self._memory.move_to_end(key)
+            while len(self._memory) > self._max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[VerdictKey]) -> Dict[VerdictKey, bool]:
+        """Devuelve los veredictos conocidos para las claves dadas (memoria y, si falta, BD)"""
+        found: Dict[VerdictKey, bool] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    found[key] = self._memory[key]
+                    self._memory.move_to_end(key)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if not missing:
+            return found
+
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                models.VeredictoModeracion.rawg_id,
+                models.VeredictoModeracion.hash_contenido,
+                models.VeredictoModeracion.es_sexual,
+            ).filter(
+                tuple_(models.VeredictoModeracion.rawg_id, models.VeredictoModeracion.hash_contenido).in_(missing)
+            ).all()
+            from_db = {(row.rawg_id, row.hash_contenido): row.es_sexual for row in rows}
+            self._remember(from_db)
+            found.update(from_db)
+        except Exception as e:
+            logger.error(f"Error leyendo veredictos de moderación: {str(e)}")
+        finally:
+            db.close()
+        return found
+
+    def put_many(self, verdicts: Dict[VerdictKey, bool], model: str = MODERATION_MODEL) -> None:
+        """Guarda veredictos nuevos en memoria y en la base de datos"""
+        if not verdicts:
+            return
+        self._remember(verdicts)
+
+        db = SessionLocal()
+        try:
+            stmt = insert(models.VeredictoModeracion).values([
+                {"rawg_id": rawg_id, "hash_contenido": digest, "es_sexual": bool(is_sexual), "modelo": model}
+                for (rawg_id, digest), is_sexual in verdicts.items()
+            ])
+            db.execute(stmt.on_conflict_do_nothing(index_elements=["rawg_id", "hash_contenido"]))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error guardando veredictos de moderación: {str(e)}")
+        finally:
+            db.close()
+
+def _slugs(refs) -> set:
+    return {ref.get("slug") for ref in refs or [] if isinstance(ref, dict) and ref.get("slug")}
+
+def has_explicit_keywords(game: Dict[str, Any]) -> bool:
+    """
+    Detección por palabras clave de alta prioridad (criterio poco estricto).
+
+    Bloquea si el título contiene alguna, o si la descripción contiene al menos dos
+    distintas; los juegos de SAFE_GAME_IDS nunca se bloquean.
+    """
+    if game.get("id") in SAFE_GAME_IDS:
+        return False
+    if high_priority_matcher.search(game.get("name")):
+        return True
+    return len(high_priority_matcher.find_all(game.get("description"))) >= 2
+
+def flag_explicit_games(games: List[Dict[str, Any]]) -> List[bool]:
+    """Versión por lotes de `has_explicit_keywords` para una página de juegos"""
+    return [has_explicit_keywords(game) for game in games]
+
+def _has_weak_signal(game: Dict[str, Any], tags: set, description_matches: int) -> bool:
+    return bool(description_matches or tags & SUSPICIOUS_TAG_SLUGS or sexual_keyword_matcher.search(game.get("name")))
+
+def local_verdict(game: Dict[str, Any]) -> bool:
+    """
+    Veredicto sin IA para un juego que el triaje deja como dudoso.
+
+    Se usa cuando el juego no puede esperar al clasificador (sin API key): se ocultan
+    los que tienen alguna señal débil y se muestran los que solo carecían de una señal
+    clara de seguridad.
+    """
+    description_matches = len(high_priority_matcher.find_all(game.get("description")))
+    return _has_weak_signal(game, _slugs(game.get("tags")), description_matches)
+
+# Quién decide un veredicto local; se guarda en `moderation_model` en lugar del modelo de IA
+DECIDED_BY_ALLOWLIST = "triage-allowlist"
+DECIDED_BY_ESRB = "triage-esrb"
+DECIDED_BY_TAGS = "triage-tags"
+DECIDED_BY_GENRE = "triage-genre"
+DECIDED_BY_KEYWORD = "keyword"
+
+def triage_decision(game: Dict[str, Any]) -> Tuple[Optional[bool], Optional[str]]:
+    """
+    Igual que `triage_game`, pero indica también qué regla ha decidido.
+
+    Returns:
+        Tupla (veredicto, regla); la regla es None si el juego es dudoso
+    """
+    if game.get("id") in SAFE_GAME_IDS:
+        return False, DECIDED_BY_ALLOWLIST
+
+    esrb = (game.get("esrb_rating") or {}).get("slug")
+    if esrb in BLOCK_ESRB_SLUGS:
+        return True, DECIDED_BY_ESRB
+
+    tags = _slugs(game.get("tags"))
+    if tags & BLOCK_TAG_SLUGS:
+        return True, DECIDED_BY_TAGS
+
+    if high_priority_matcher.search(game.get("name")):
+        return True, DECIDED_BY_KEYWORD
+
+    description_matches = len(high_priority_matcher.find_all(game.get("description")))
+    if description_matches >= 2:
+        return True, DECIDED_BY_KEYWORD
+
+    # Cualquier señal débil deja el juego en manos de la IA
+    if _has_weak_signal(game, tags, description_matches):
+        return None, None
+
+    if esrb in SAFE_ESRB_SLUGS:
+        return False, DECIDED_BY_ESRB
+    if esrb == TEEN_ESRB_SLUG and _slugs(game.get("genres")) & SAFE_GENRE_SLUGS:
+        return False, DECIDED_BY_GENRE
+    return None, None
+
+def triage_game(game: Dict[str, Any]) -> Optional[bool]:
+    """
+    Clasifica localmente los casos evidentes antes de recurrir a la IA.
+
+    Usa la lista de juegos seguros, la clasificación ESRB, los tags y géneros de RAWG
+    y las palabras clave.
+
+    Returns:
+        True si el juego debe bloquearse, False si es claramente seguro
+        o None si es dudoso y debe decidirlo el clasificador de IA
+    """
+    return triage_decision(game)[0]
+
+# Instancia global
+verdict_store = VerdictStore(settings.MODERATION_MEMORY_CACHE_SIZE)
+
+def _resolve_known(games: List[Dict[str, Any]]):
+    """
+    Resuelve los veredictos que no necesitan a la IA (triaje y veredictos guardados).
+
+    Returns:
+        Tupla (veredictos por índice, claves por índice, índices sin veredicto,
+        regla de triaje por índice de los juegos resueltos localmente)
+    """
+    flags: Dict[int, bool] = {}
+    decided_by: Dict[int, str] = {}
+    ambiguous = []
+    for i, game in enumerate(games):
+        verdict, rule = triage_decision(game)
+        if verdict is None:
+            ambiguous.append(i)
+        else:
+            flags[i] = verdict
+            decided_by[i] = rule
+
+    keys: Dict[int, Optional[VerdictKey]] = {
+        i: (games[i]["id"], content_hash(games[i])) if games[i].get("id") is not None else None for i in ambiguous
+    }
+    known = verdict_store.get_many([key for key in keys.values() if key is not None])
+    for i in ambiguous:
+        if keys[i] is not None and keys[i] in known:
+            flags[i] = known[keys[i]]
+
+    pending = [i for i in ambiguous if i not in flags]
+    return flags, keys, pending, decided_by
+
+def _classify_pending(
+    games: List[Dict[str, Any]], keys: Dict[int, Optional[VerdictKey]], pending: List[int]
+) -> Dict[int, Optional[bool]]:
+    """Envía a la IA los juegos sin veredicto y guarda los resultados válidos (None = lote fallido)"""
+    games_for_ai = [
+        {"name": games[i].get("name", ""), "description": games[i].get("description", "")} for i in pending
+    ]
+    results = classify_games_sexual_content(games_for_ai, fallback=None)
+    new_verdicts = {}
+    for i, is_sexual in zip(pending, results):
+        if is_sexual is not None and keys[i] is not None:
+            new_verdicts[keys[i]] = bool(is_sexual)
+    verdict_store.put_many(new_verdicts)
+    return dict(zip(pending, results))
+
+def classify_games(games: List[Dict[str, Any]]) -> List[bool]:
+    """
+    Indica qué juegos de RAWG tienen contenido sexual, esperando a la IA si hace falta.
+
+    Los casos evidentes se resuelven con `triage_game`. Del resto, solo los juegos sin
+    veredicto previo se envían al clasificador de IA; sus resultados se guardan salvo
+    que el lote haya fallado o no haya respondido a tiempo. Esos juegos se ocultan en
+    esta respuesta (igual que los pendientes del modo "async") y no se persisten.
+
+    Args:
+        games: Juegos con al menos `id`, `name` y opcionalmente `description`
+
+    Returns:
+        Lista de booleanos alineada con `games` (True = contenido sexual)
+    """
+    flags, keys, pending, decided_by = _resolve_known(games)
+    triaged = len(decided_by)
+    if pending:
+        unknown = 0
+        for i, is_sexual in _classify_pending(games, keys, pending).items():
+            if is_sexual is None:
+                unknown += 1
+            flags[i] = True if is_sexual is None else bool(is_sexual)
+        if unknown:
+            logger.warning(f"Moderación: {unknown} juegos sin veredicto de la IA se ocultan")
+    logger.info(
+        f"Moderación: {triaged} resueltos por triaje, "
+        f"{len(games) - triaged - len(pending)} veredictos cacheados, {len(pending)} enviados a la IA"
+    )
+
+    return [flags[i] for i in range(len(games))]
+
+def stored_game_for_moderation(
+    nombre: str,
+    descripcion: Optional[str] = None,
+    generos: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None,
+    rawg_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Adapta un juego de nuestras tablas (nombres de géneros y tags) al formato que usa el triaje.
+
+    Solo los juegos de RAWG llevan `id`, ya que la caché de veredictos usa IDs de RAWG.
+    """
+    def as_refs(names):
+        return [{"slug": "-".join(str(name).lower().split())} for name in names or []]
+
+    return {
+        "id": rawg_id,
+        "name": nombre or "",
+        "description": descripcion or "",
+        "genres": as_refs(generos),
+        "tags": as_refs(tags),
+    }
+
+def moderation_statuses(games: List[Dict[str, Any]]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Calcula el `moderation_status` de juegos que se van a guardar en la base de datos.
+
+    Se usa en la ingesta, donde se puede esperar a la IA. Los juegos que la IA no ha
+    podido clasificar (lote fallido o sin API key) quedan como "pending".
+
+    Returns:
+        Lista de tuplas (estado, quién decidió) alineada con `games`: la regla de triaje,
+        MODERATION_MODEL si decidió la IA (también con veredicto cacheado) o None si está pendiente
+    """
+    flags, keys, pending, decided_by = _resolve_known(games)
+    results: Dict[int, Optional[bool]] = dict(flags)
+    if pending:
+        try:
+            results.update(_classify_pending(games, keys, pending))
+        except Exception as e:
+            logger.error(f"No se pudieron clasificar {len(pending)} juegos en la ingesta: {str(e)}")
+            results.update({i: None for i in pending})
+    decisions = []
+    for i in range(len(games)):
+        if results[i] is None:
+            decisions.append((MODERATION_PENDING, None))
+        else:
+            status = MODERATION_BLOCKED if results[i] else MODERATION_APPROVED
+            decisions.append((status, decided_by.get(i, MODERATION_MODEL)))
+    return decisions
+
+def moderation_columns(status: str, decided_by: Optional[str]) -> Dict[str, Any]:
+    """Valores de las columnas de moderación para un estado y quién lo decidió"""
+    return {
+        "moderation_status": status,
+        "moderation_model": decided_by,
+        "moderation_version": MODERATION_POLICY_VERSION,
+    }
+
+def visible_filter(model):
+    """Condición SQL para excluir los juegos bloqueados (las filas sin moderar siguen visibles)"""
+    return model.moderation_status.is_distinct_from(MODERATION_BLOCKED)
+
+def backfill_moderation(db: Session, model, batch_size: int = 50, max_games: int = 1000) -> Dict[str, int]:
+    """
+    Modera las filas de `model` sin estado o en estado "pending".
+
+    Las filas se moderan sin ID de RAWG (sin lista de juegos seguros ni caché de veredictos),
+    ya que la clave primaria de juegos_favoritos no siempre es un ID de RAWG.
+
+    Args:
+        db: Sesión de base de datos
+        model: JuegosScrapeadoDeSteamParaRecomendaiones o JuegosFavoritosDeUsuarioQueProvienenDeRawg
+        batch_size: Juegos por lote (un commit por lote)
+        max_games: Número máximo de filas a procesar en esta llamada
+
+    Returns:
+        Número de filas por estado resultante
+    """
+    counts = {MODERATION_APPROVED: 0, MODERATION_BLOCKED: 0, MODERATION_PENDING: 0}
+    last_id = 0
+    processed = 0
+    while processed < max_games:
+        rows = db.query(model).filter(
+            (model.moderation_status.is_(None)) | (model.moderation_status == MODERATION_PENDING),
+            model.id > last_id,
+        ).order_by(model.id).limit(min(batch_size, max_games - processed)).all()
+        if not rows:
+            break
+        decisions = moderation_statuses([
+            # El id de juegos_favoritos solo coincide con el de RAWG en algunas altas (otras usan
+            # el autoincremental o el id de Steam): sin saber el origen no se usa como ID de RAWG
+            stored_game_for_moderation(row.nombre, row.descripcion, row.generos, row.tags)
+            for row in rows
+        ])
+        for row, (status, decided_by) in zip(rows, decisions):
+            for column, value in moderation_columns(status, decided_by).items():
+                setattr(row, column, value)
+            counts[status] += 1
+        db.commit()
+        last_id = rows[-1].id
+        processed += len(rows)
+    return counts
+
+class ModerationBackfill:
+    """
+    Ejecuta `backfill_moderation` sobre las dos tablas en un hilo aparte, con su propia
+    sesión, y guarda el resultado de la última ejecución para consultarlo después.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Dict[str, Any] = {"en_curso": False, "iniciado_en": None, "finalizado_en": None, "resultado": None, "error": None}
+
+    def start(self, max_games: int) -> bool:
+        """
+        Lanza el backfill en segundo plano.
+
+        Returns:
+            False si este proceso ya tiene un backfill en marcha
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        self._state = {
+            "en_curso": True, "iniciado_en": datetime.utcnow().isoformat(), "finalizado_en": None,
+            "resultado": None, "error": None,
+        }
+
+        def run():
+            db = SessionLocal()
+            try:
+                result = {
+                    "juegos_steam": backfill_moderation(db, models.JuegosScrapeadoDeSteamParaRecomendaiones, max_games=max_games),
+                    "juegos_favoritos": backfill_moderation(db, models.JuegosFavoritosDeUsuarioQueProvienenDeRawg, max_games=max_games),
+                }
+                self._state.update(resultado=result)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error en el backfill de moderación: {str(e)}")
+                self._state.update(error=str(e))
+            finally:
+                db.close()
+                self._state.update(en_curso=False, finalizado_en=datetime.utcnow().isoformat())
+                self._lock.release()
+
+        threading.Thread(target=run, name="moderation-backfill", daemon=True).start()
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """Estado del backfill en curso o resultado del último"""
+        return dict(self._state)
+
+# Instancia global
+moderation_backfill = ModerationBackfill()
+
+# Cola de moderación en segundo plano (modo "async")
+moderation_worker = ModerationWorker(classify_games, batch_size=settings.MODERATION_WORKER_BATCH_SIZE)
+
+def moderate_games(games: List[Dict[str, Any]]) -> List[bool]:
+    """
+    Indica qué juegos de RAWG deben ocultarse por contenido sexual.
+
+    Con MODERATION_MODE="blocking" espera a la IA (`classify_games`). Con "async" responde
+    solo con los veredictos ya conocidos: los juegos sin veredicto se ocultan y se encolan
+    en `moderation_worker`, de modo que aparecerán en peticiones posteriores. Los que no
+    se pueden encolar (sin `id` o con la cola llena) se clasifican en la propia petición,
+    y sin API key de la IA los dudosos se resuelven con `local_verdict`.
+    Con MODERATION_SHADOW_MODE activado no se oculta nada; solo se registra lo que se habría filtrado.
+
+    Args:
+        games: Juegos con al menos `id`, `name` y opcionalmente `description`
+
+    Returns:
+        Lista de booleanos alineada con `games` (True = ocultar)
+    """
+    if settings.MODERATION_MODE == "async":
+        flags, keys, pending, _ = _resolve_known(games)
+        if pending and not ai_moderation_available():
+            # Sin API key el trabajador nunca daría veredicto: se decide localmente
+            logger.warning(f"Moderación: sin clasificador de IA, {len(pending)} juegos dudosos se resuelven localmente")
+            for i in pending:
+                flags[i] = local_verdict(games[i])
+            pending = []
+        elif pending:
+            rejected = [pending[position] for position in moderation_worker.enqueue([games[i] for i in pending])]
+            if rejected:
+                # Sin ID o con la cola llena no volverían a intentarse: se clasifican en esta petición
+                for i, is_sexual in _classify_pending(games, keys, rejected).items():
+                    flags[i] = True if is_sexual is None else bool(is_sexual)
+                pending = [i for i in pending if i not in flags]
+            logger.info(
+                f"Moderación: {len(pending)} juegos encolados, {len(rejected)} clasificados en la petición"
+            )
+            for i in pending:
+                flags[i] = True
+        result = [flags[i] for i in range(len(games))]
+    else:
+        pending = []
+        result = classify_games(games)
+
+    if settings.MODERATION_SHADOW_MODE:
+        blocked = [game.get("name") for i, (game, hidden) in enumerate(zip(games, result)) if hidden and i not in pending]
+        if blocked or pending:
+            logger.info(
+                f"[shadow] La moderación habría ocultado {len(blocked)} juegos {blocked} "
+                f"y {len(pending)} pendientes de veredicto"
+            )
+        return [False] * len(games)
+    return result
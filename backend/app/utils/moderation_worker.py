@@ -0,0 +1,108 @@
+from typing import Any, Callable, Dict, List
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Campos de cada juego que necesita el handler: el triaje usa tags, ESRB y géneros
+MODERATION_FIELDS = ("id", "name", "description", "tags", "esrb_rating", "genres")
+
+class ModerationWorker:
+    """
+    Cola de moderación en segundo plano.
+
+    Las peticiones encolan los juegos que aún no tienen veredicto y responden sin
+    esperar; un hilo dedicado los agrupa en lotes y se los pasa a `handler`, que los
+    clasifica y guarda los veredictos para las peticiones siguientes.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Dict[str, Any]]], Any],
+        batch_size: int = 50,
+        max_queue: int = 5000,
+        fields=MODERATION_FIELDS,
+    ):
+        self._handler = handler
+        self._fields = tuple(fields)
+        self._batch_size = batch_size
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._processed = 0
+        self._dropped = 0
+        self._errors = 0
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="moderation-worker", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, games: List[Dict[str, Any]]) -> List[int]:
+        """
+        Encola juegos para moderarlos en segundo plano.
+
+        De cada juego se encolan los campos de `fields`. Los juegos que ya están en cola
+        se ignoran (recibirán veredicto igualmente); los que no tienen `id` o no caben en
+        la cola no se encolan y quien llama debe resolverlos por otra vía.
+
+        Returns:
+            Posiciones en `games` de los juegos que no se han podido encolar
+        """
+        rejected = []
+        queued = 0
+        for position, game in enumerate(games):
+            game_id = game.get("id")
+            if game_id is None:
+                rejected.append(position)
+                continue
+            with self._lock:
+                if game_id in self._pending:
+                    continue
+                self._pending.add(game_id)
+            try:
+                self._queue.put_nowait({field: game[field] for field in self._fields if field in game})
+                queued += 1
+            except queue.Full:
+                rejected.append(position)
+                with self._lock:
+                    self._pending.discard(game_id)
+                    self._dropped += 1
+        if queued:
+            self._ensure_started()
+        return rejected
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._handler(batch)
+                with self._lock:
+                    self._processed += len(batch)
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                logger.error(f"Error moderando un lote de {len(batch)} juegos en segundo plano: {str(e)}")
+            finally:
+                with self._lock:
+                    for game in batch:
+                        self._pending.discard(game["id"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado de la cola, para la vista de administración"""
+        with self._lock:
+            return {
+                "activo": self._thread is not None and self._thread.is_alive(),
+                "en_cola": len(self._pending),
+                "procesados": self._processed,
+                "descartados": self._dropped,
+                "lotes_fallidos": self._errors,
+            }
@@ -0,0 +1,43 @@
+import threading
+import time
+from typing import Optional
+
+class RateLimiter:
+    """
+    Limitador de tipo token bucket, seguro entre hilos.
+
+    Permite ráfagas de hasta `burst` peticiones y después `rate` peticiones por segundo.
+    Si `rate` es 0 o negativo, no limita.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera hasta que haya un token disponible.
+        
+        Args:
+            timeout: Espera máxima en segundos; None espera lo necesario
+            
+        Returns:
+            True si se obtuvo el token, False si habría que esperar más de `timeout`
+        """
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if timeout is not None and wait > timeout:
+                return False
+            # Reservar el token aunque todavía no exista; la espera se hace fuera del lock
+            self._tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return True
@@ -1,9 +1,21 @@
+import copy
 import requests
 import random
 import time
 import os
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional
 import logging
+import threading
+from ..config import settings
+from .circuit_breaker import CircuitBreakerRegistry, CircuitOpenError
+from .rawg_projection import slim_page
+from .rate_limiter import RateLimiter
+from .ttl_cache import TTLCache
+
+class RetryableStatusError(Exception):
+    """Respuesta de RAWG con un código que merece reintento (429 o 5xx)"""
 
 class RawgApi:
     def __init__(self):
@@ -14,6 +26,104 @@ class RawgApi:
         self.api_key = os.environ.get("RAWG_API_KEY", "your_default_api_key")
         self.base_url = "https://api.rawg.io/api"
         
+        # Un circuit breaker por endpoint para que una caída de RAWG no agote los workers
+        self.breakers = CircuitBreakerRegistry(
+            failure_threshold=settings.RAWG_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=settings.RAWG_BREAKER_RECOVERY_SECONDS,
+        )
+        # Últimas respuestas válidas, servidas mientras el circuito está abierto
+        self._fallback_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._fallback_lock = threading.Lock()
+        # Limitador de las descargas concurrentes de varios juegos, compartido por todos los hilos;
+        # las peticiones sueltas de las rutas no pasan por él para no hacer cola detrás del reparto
+        self.rate_limiter = RateLimiter(settings.RAWG_MAX_REQUESTS_PER_SECOND, burst=settings.RAWG_MULTIGET_CONCURRENCY)
+        # Caché de detalles de juegos por ID
+        self._detail_cache = TTLCache(settings.RAWG_DETAIL_CACHE_TTL_SECONDS, settings.RAWG_DETAIL_CACHE_SIZE)
+        # Hilos compartidos por todas las descargas de varios juegos (se crean bajo demanda)
+        self._multiget_executor = ThreadPoolExecutor(
+            max_workers=settings.RAWG_MULTIGET_CONCURRENCY, thread_name_prefix="rawg-multiget"
+        )
+    
+    def _get(self, endpoint: str, path: str, params: Optional[Dict[str, Any]] = None,
+             project: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Realiza un GET a RAWG protegido por el circuit breaker del endpoint.
+        
+        Los errores de red, timeouts y respuestas 429/5xx se reintentan con backoff
+        exponencial limitado y jitter. Si el circuito está abierto, se devuelve la última
+        respuesta válida para la misma petición o se lanza CircuitOpenError sin esperar.
+        
+        Args:
+            endpoint: Nombre lógico del endpoint (clave del circuit breaker)
+            path: Ruta relativa a la URL base de RAWG
+            params: Parámetros de la petición (sin la clave API)
+            project: Proyección a aplicar a la respuesta antes de cachearla y devolverla
+            
+        Returns:
+            El JSON de la respuesta
+        """
+        params = dict(params or {})
+        cache_key = (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+        breaker = self.breakers.get(endpoint)
+        
+        if not breaker.allow_request():
+            with self._fallback_lock:
+                cached = self._fallback_cache.get(cache_key)
+            if cached is not None:
+                # Copia: las rutas modifican la respuesta (proyección, precios, filtros)
+                return copy.deepcopy(cached)
+            raise CircuitOpenError(f"Circuito '{endpoint}' abierto")
+        
+        # En half_open solo se hace la llamada de prueba, sin reintentos
+        retries = settings.RAWG_MAX_RETRIES if breaker.state == breaker.CLOSED else 0
+        params["key"] = self.api_key
+        last_error = None
+        
+        for attempt in range(retries + 1):
+            healthy = False
+            try:
+                response = requests.get(f"{self.base_url}{path}", params=params, timeout=settings.RAWG_TIMEOUT_SECONDS)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RetryableStatusError(f"RAWG respondió {response.status_code}")
+                # Un 4xx significa que RAWG está sano aunque la petición no sea válida
+                breaker.record_success()
+                healthy = True
+                response.raise_for_status()
+                data = response.json()
+                if project:
+                    data = project(data)
+                self._remember(cache_key, data)
+                return data
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                    RetryableStatusError) as e:
+                last_error = e
+                if attempt < retries:
+                    # Backoff exponencial limitado con "full jitter"
+                    delay = min(settings.RAWG_RETRY_MAX_DELAY, settings.RAWG_RETRY_BASE_DELAY * (2 ** attempt))
+                    time.sleep(random.uniform(0, delay))
+            except Exception:
+                # Cualquier otro error antes de saber que RAWG responde (p. ej. TooManyRedirects)
+                # cuenta como fallo; si no, la llamada de prueba de half_open quedaría sin liberar
+                if not healthy:
+                    breaker.record_failure()
+                raise
+        
+        breaker.record_failure()
+        raise last_error
+    
+    def _remember(self, cache_key: tuple, data: Any) -> None:
+        """
+        Guarda una copia de la última respuesta válida de una petición (LRU acotada).
+
+        Se guarda una copia porque quien llama recibe `data` y puede modificarlo.
+        """
+        data = copy.deepcopy(data)
+        with self._fallback_lock:
+            self._fallback_cache[cache_key] = data
+            self._fallback_cache.move_to_end(cache_key)
+            while len(self._fallback_cache) > settings.RAWG_FALLBACK_CACHE_SIZE:
+                self._fallback_cache.popitem(last=False)
+        
     def get_games(self, page: int = 1, page_size: int = 20) -> Optional[Dict[str, Any]]:
         """
         Obtiene una lista paginada de juegos.
@@ -26,15 +136,11 @@ class RawgApi:
             Diccionario con la respuesta de la API o None si hay un error
         """
         try:
-            url = f"{self.base_url}/games"
             params = {
-                "key": self.api_key,
                 "page": page,
                 "page_size": page_size
             }
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get("games", "/games", params, project=slim_page)
         except Exception as e:
             logging.error(f"Error al obtener juegos: {str(e)}")
             return None
@@ -52,16 +158,12 @@ class RawgApi:
             Diccionario con resultados de búsqueda o None si hay un error
         """
         try:
-            url = f"{self.base_url}/games"
             params = {
-                "key": self.api_key,
                 "search": query,
                 "page": page,
                 "page_size": page_size
             }
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get("games", "/games", params, project=slim_page)
         except Exception as e:
             logging.error(f"Error al buscar juegos: {str(e)}")
             return None
@@ -74,18 +176,63 @@ class RawgApi:
             game_id: ID del juego en la API de RAWG
             
         Returns:
-            Diccionario con los detalles del juego o None si hay un error
+            Copia de los detalles del juego (el llamador puede modificarla) o None si hay un error
         """
+        cached = self._detail_cache.get(game_id)
+        if cached is not None:
+            return copy.deepcopy(cached)
         try:
-            url = f"{self.base_url}/games/{game_id}"
-            params = {"key": self.api_key}
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            data = self._get("game_detail", f"/games/{game_id}")
+            self._detail_cache.set(game_id, data)
+            return copy.deepcopy(data)
         except Exception as e:
             logging.error(f"Error al obtener detalles del juego: {str(e)}")
             return None
     
+    def _get_game_limited(self, game_id: int) -> Optional[Dict[str, Any]]:
+        """
+        `get_game` para el reparto de `get_games_by_ids`, sujeto al limitador de peticiones.
+        
+        Si no hay hueco dentro de la espera máxima configurada, el juego se da por no
+        disponible en lugar de dejar la petición del usuario esperando.
+        """
+        if self._detail_cache.get(game_id) is None and \
+                not self.rate_limiter.acquire(timeout=settings.RAWG_RATE_LIMIT_MAX_WAIT_SECONDS):
+            logging.warning(f"Limitador de RAWG saturado; se omiten los detalles del juego {game_id}")
+            return None
+        return self.get_game(game_id)
+    
+    def get_games_by_ids(self, game_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Obtiene los detalles de varios juegos a la vez.
+        
+        Responde primero desde la caché de detalles y descarga los que faltan de forma
+        concurrente, respetando el limitador de peticiones a RAWG. Los juegos que no
+        consiguen turno dentro de RAWG_RATE_LIMIT_MAX_WAIT_SECONDS se devuelven como None.
+        
+        Args:
+            game_ids: IDs de los juegos en la API de RAWG
+            
+        Returns:
+            Lista alineada con `game_ids` con una copia de los detalles de cada juego o None
+            si no se pudo obtener
+        """
+        found: Dict[int, Optional[Dict[str, Any]]] = {}
+        misses = []
+        for game_id in dict.fromkeys(game_ids):
+            cached = self._detail_cache.get(game_id)
+            if cached is not None:
+                found[game_id] = cached
+            else:
+                misses.append(game_id)
+        
+        if misses:
+            for game_id, data in zip(misses, self._multiget_executor.map(self._get_game_limited, misses)):
+                found[game_id] = data
+        
+        # Un ID repetido recibe su propia copia
+        return [copy.deepcopy(found.get(game_id)) for game_id in game_ids]
+    
     def get_game_screenshots(self, game_id: int) -> Optional[List[Dict[str, Any]]]:
         """
         Obtiene las capturas de pantalla de un juego específico.
@@ -97,11 +244,7 @@ class RawgApi:
             Lista de diccionarios con información de capturas de pantalla o None si hay un error
         """
         try:
-            url = f"{self.base_url}/games/{game_id}/screenshots"
-            params = {"key": self.api_key}
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get("game_screenshots", f"/games/{game_id}/screenshots")
             return data.get("results", [])
         except Exception as e:
             logging.error(f"Error al obtener capturas de pantalla: {str(e)}")
@@ -125,16 +268,12 @@ class RawgApi:
             next_page = None
             
             for current_page in range(page, page + max_pages):
-                url = f"{self.base_url}/games"
                 params = {
-                    "key": self.api_key,
                     "ordering": "-added",  # Ordenar por más recientemente añadidos
                     "page": current_page,
                     "page_size": page_size
                 }
-                response = requests.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
+                data = self._get("games", "/games", params, project=slim_page)
                 
                 all_results.extend(data.get("results", []))
                 
@@ -177,15 +316,11 @@ class RawgApi:
             
             for _ in range(attempts):
                 random_page = random.randint(1, max_page)
-                url = f"{self.base_url}/games"
                 params = {
-                    "key": self.api_key,
                     "page": random_page,
                     "page_size": 20
                 }
-                response = requests.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
+                data = self._get("games", "/games", params, project=slim_page)
                 
                 if data.get("results"):
                     games.extend(data.get("results", []))
@@ -221,16 +356,12 @@ class RawgApi:
             Diccionario con juegos del género especificado o None si hay un error
         """
         try:
-            url = f"{self.base_url}/games"
             params = {
-                "key": self.api_key,
                 "genres": genre_id,
                 "page": page,
                 "page_size": page_size
             }
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get("games", "/games", params, project=slim_page)
         except Exception as e:
             logging.error(f"Error al obtener juegos por género: {str(e)}")
             return None
@@ -248,16 +379,12 @@ class RawgApi:
             Diccionario con juegos que coincidan con los géneros o None si hay un error
         """
         try:
-            url = f"{self.base_url}/games"
             params = {
-                "key": self.api_key,
                 "genres": ",".join(genre_slugs),
                 "page": page,
                 "page_size": page_size
             }
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get("games", "/games", params, project=slim_page)
         except Exception as e:
             logging.error(f"Error al obtener juegos por géneros: {str(e)}")
             return None
@@ -273,14 +400,7 @@ class RawgApi:
             Diccionario con juegos filtrados o None si hay un error
         """
         try:
-            url = f"{self.base_url}/games"
-            # Agregar la clave API a los parámetros
-            filter_params = params.copy()
-            filter_params["key"] = self.api_key
-            
-            response = requests.get(url, params=filter_params)
-            response.raise_for_status()
-            return response.json()
+            return self._get("games", "/games", params, project=slim_page)
         except Exception as e:
             logging.error(f"Error al obtener juegos filtrados: {str(e)}")
             return None
@@ -293,11 +413,7 @@ class RawgApi:
             Diccionario con géneros disponibles o None si hay un error
         """
         try:
-            url = f"{self.base_url}/genres"
-            params = {"key": self.api_key}
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get("genres", "/genres")
         except Exception as e:
             logging.error(f"Error al obtener géneros: {str(e)}")
             return None
@@ -0,0 +1,342 @@
+from sqlalchemy import func, tablesample, text
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from datetime import datetime, date
+from typing import List, Dict, Any, Optional
+import logging
+import threading
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from .rawg_api import rawg_api
+
+logger = logging.getLogger(__name__)
+
+Catalogo = models.JuegoCatalogoRawg
+Estado = models.SincronizacionCatalogoRawg
+
+# Ordenaciones de RAWG que podemos resolver con los índices de la réplica
+_ORDERINGS = {
+    "name": Catalogo.nombre.asc(),
+    "-name": Catalogo.nombre.desc(),
+    "rating": Catalogo.rating.asc(),
+    "-rating": Catalogo.rating.desc(),
+    "released": Catalogo.lanzamiento.asc(),
+    "-released": Catalogo.lanzamiento.desc(),
+    "updated": Catalogo.actualizado_rawg.asc(),
+    "-updated": Catalogo.actualizado_rawg.desc(),
+}
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", ""))
+    except ValueError:
+        return None
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+class RawgCatalog:
+    """Réplica local del listado de juegos de RAWG con sincronización incremental"""
+
+    def __init__(self):
+        self._sync_lock = threading.Lock()
+        # Una vez completo el catálogo no vuelve a estar incompleto: no hace falta consultarlo más
+        self._complete = False
+
+    def _to_row(self, game: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        """Convierte un juego del listado de RAWG en una fila de la réplica"""
+        genres = [
+            {"id": g.get("id"), "name": g.get("name"), "slug": g.get("slug")}
+            for g in game.get("genres") or []
+        ]
+        platforms = [
+            {"platform": {
+                "id": p["platform"].get("id"),
+                "name": p["platform"].get("name"),
+                "slug": p["platform"].get("slug"),
+            }}
+            for p in game.get("platforms") or [] if p.get("platform")
+        ]
+        return {
+            "id": game["id"],
+            "nombre": game.get("name", ""),
+            "slug": game.get("slug"),
+            "generos": genres,
+            "genero_ids": [g["id"] for g in genres if g["id"] is not None],
+            "plataformas": platforms,
+            "plataforma_ids": [p["platform"]["id"] for p in platforms if p["platform"]["id"] is not None],
+            "rating": game.get("rating"),
+            "lanzamiento": _parse_date(game.get("released")),
+            "imagen_fondo": game.get("background_image"),
+            "actualizado_rawg": _parse_datetime(game.get("updated")),
+            "sincronizado_en": now,
+        }
+
+    def _to_game(self, row) -> Dict[str, Any]:
+        """Convierte una fila de la réplica al formato del listado de RAWG"""
+        return {
+            "id": row.id,
+            "name": row.nombre,
+            "slug": row.slug,
+            "background_image": row.imagen_fondo,
+            "released": row.lanzamiento.isoformat() if row.lanzamiento else None,
+            "rating": row.rating or 0,
+            "genres": row.generos or [],
+            "platforms": row.plataformas or [],
+        }
+
+    def _upsert(self, db: Session, games: List[Dict[str, Any]]) -> int:
+        """Inserta o actualiza una página de juegos en una única sentencia"""
+        now = datetime.utcnow()
+        rows = {g["id"]: self._to_row(g, now) for g in games if g.get("id")}
+        if not rows:
+            return 0
+        stmt = insert(Catalogo).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Catalogo.id],
+            set_={column: stmt.excluded[column] for column in rows[next(iter(rows))] if column != "id"},
+        )
+        db.execute(stmt)
+        return len(rows)
+
+    def _state(self, db: Session) -> Any:
+        """Fila de progreso de la sincronización, bloqueada hasta el siguiente commit"""
+        state = db.query(Estado).filter(Estado.id == 1).with_for_update().first()
+        if state is None:
+            db.execute(insert(Estado).values(id=1, pagina=1, completo=False).on_conflict_do_nothing())
+            state = db.query(Estado).filter(Estado.id == 1).with_for_update().first()
+        return state
+
+    def sync(self, db: Session, max_pages: Optional[int] = None, page_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Sincroniza la réplica con RAWG recorriendo el listado ordenado por "-updated".
+
+        Cada recorrido empieza en la página 1 y termina al llegar a un juego anterior a la
+        marca del último recorrido completo (o al final del listado la primera vez). Si se
+        alcanza `max_pages` antes, la siguiente ejecución continúa por la página pendiente,
+        así que el catálogo inicial se completa en varias ejecuciones. La marca solo avanza
+        al terminar un recorrido, de modo que ningún juego queda sin sincronizar.
+
+        Cada página se procesa con la fila de progreso bloqueada: dos sincronizaciones
+        simultáneas se reparten las páginas en lugar de repetirlas.
+
+        Args:
+            db: Sesión de base de datos
+            max_pages: Número máximo de páginas a recorrer
+            page_size: Número de juegos por página
+
+        Returns:
+            Diccionario con estadísticas de la sincronización
+        """
+        max_pages = max_pages or settings.RAWG_CATALOG_SYNC_MAX_PAGES
+        page_size = page_size or settings.RAWG_CATALOG_SYNC_PAGE_SIZE
+        stats = {"paginas": 0, "juegos_sincronizados": 0, "completado": False}
+
+        for _ in range(max_pages):
+            state = self._state(db)
+            page, watermark = state.pagina, state.marca
+            data = rawg_api.get_games_with_filters({
+                "ordering": "-updated",
+                "page": page,
+                "page_size": page_size,
+            })
+            if not data:
+                db.rollback()
+                logger.error(f"Sincronización interrumpida en la página {page}")
+                break
+
+            games = data.get("results", [])
+            if page == 1:
+                updated_values = [_parse_datetime(g.get("updated")) for g in games]
+                state.marca_en_curso = max((u for u in updated_values if u), default=None)
+            fresh = []
+            reached_watermark = False
+            for game in games:
+                updated = _parse_datetime(game.get("updated"))
+                if watermark and updated and updated < watermark:
+                    reached_watermark = True
+                    break
+                fresh.append(game)
+
+            stats["juegos_sincronizados"] += self._upsert(db, fresh)
+            stats["paginas"] += 1
+            if reached_watermark or not data.get("next"):
+                # Recorrido terminado: el siguiente empieza de nuevo por los más recientes
+                state.marca = state.marca_en_curso or watermark
+                state.pagina = 1
+                state.completo = True
+                stats["completado"] = True
+            else:
+                state.pagina = page + 1
+            state.actualizado_en = datetime.utcnow()
+            db.commit()
+            if stats["completado"]:
+                break
+
+        logger.info(f"Catálogo sincronizado: {stats['juegos_sincronizados']} juegos en {stats['paginas']} páginas")
+        return stats
+
+    def start_background_sync(self, max_pages: Optional[int] = None) -> bool:
+        """
+        Lanza una sincronización en un hilo aparte, con su propia sesión.
+
+        Returns:
+            False si este proceso ya tiene una sincronización en marcha
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            db = SessionLocal()
+            try:
+                self.sync(db, max_pages=max_pages)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error sincronizando el catálogo de RAWG: {str(e)}")
+            finally:
+                db.close()
+                self._sync_lock.release()
+
+        threading.Thread(target=run, name="rawg-catalog-sync", daemon=True).start()
+        return True
+
+    def is_complete(self, db: Session) -> bool:
+        """Indica si el catálogo se ha recorrido entero al menos una vez (solo entonces responde la réplica)"""
+        if self._complete:
+            return True
+        try:
+            self._complete = bool(db.query(Estado.completo).filter(Estado.id == 1).scalar())
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error consultando el progreso del catálogo local: {str(e)}")
+        return self._complete
+
+    def status(self, db: Session) -> Dict[str, Any]:
+        """Devuelve el tamaño de la réplica, el progreso de la sincronización y sus fechas"""
+        total, watermark, last_sync = db.query(
+            func.count(Catalogo.id),
+            func.max(Catalogo.actualizado_rawg),
+            func.max(Catalogo.sincronizado_en),
+        ).one()
+        state = db.query(Estado).filter(Estado.id == 1).first()
+        return {
+            "habilitado": settings.RAWG_CATALOG_ENABLED,
+            "juegos": total,
+            "completo": bool(state and state.completo),
+            "pagina_pendiente": state.pagina if state else 1,
+            "sincronizando": self._sync_lock.locked(),
+            "ultima_actualizacion_rawg": watermark.isoformat() if watermark else None,
+            "ultima_sincronizacion": last_sync.isoformat() if last_sync else None,
+        }
+
+    def query_games(
+        self,
+        db: Session,
+        page: int = 1,
+        page_size: int = 20,
+        genres: Optional[List[int]] = None,
+        platforms: Optional[List[int]] = None,
+        search: Optional[str] = None,
+        ordering: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Consulta la réplica con la misma forma de respuesta que el listado de RAWG.
+
+        La réplica no responde hasta que el catálogo está completo, ni para el orden por
+        defecto de un listado sin búsqueda: RAWG lo ordena por relevancia y ese orden no
+        se puede reproducir con los campos replicados. Una búsqueda sin orden explícito se
+        ordena por similitud de trigramas (`pg_trgm`) entre el nombre y el texto buscado.
+
+        Returns:
+            Diccionario paginado o None si la réplica no puede responder (fallo de caché),
+            en cuyo caso el llamador debe consultar RAWG en vivo
+        """
+        if not settings.RAWG_CATALOG_ENABLED:
+            return None
+        if ordering and ordering not in _ORDERINGS:
+            return None
+        if not ordering and not search:
+            return None
+        if not self.is_complete(db):
+            return None
+
+        try:
+            query = db.query(Catalogo)
+            if genres:
+                query = query.filter(Catalogo.genero_ids.overlap(genres))
+            if platforms:
+                query = query.filter(Catalogo.plataforma_ids.overlap(platforms))
+            if search:
+                query = query.filter(Catalogo.nombre.ilike(f"%{search}%"))
+
+            total = query.count()
+            offset = (page - 1) * page_size
+            if offset >= total:
+                return None
+
+            # Búsqueda sin orden explícito: por similitud de trigramas con el texto buscado,
+            # lo más parecido a la relevancia de RAWG que se puede calcular con el índice del nombre
+            order = _ORDERINGS[ordering] if ordering else func.similarity(Catalogo.nombre, search).desc()
+            rows = query.order_by(order, Catalogo.id).offset(offset).limit(page_size).all()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error consultando el catálogo local: {str(e)}")
+            return None
+
+        base = f"{rawg_api.base_url}/games?page_size={page_size}"
+        return {
+            "count": total,
+            "next": f"{base}&page={page + 1}" if offset + page_size < total else None,
+            "previous": f"{base}&page={page - 1}" if page > 1 else None,
+            "results": [self._to_game(row) for row in rows],
+        }
+
+    def random_games(self, db: Session, count: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obtiene juegos aleatorios de la réplica.
+
+        En lugar de ordenar la tabla entera por `random()`, se toma una muestra por bloques
+        (`TABLESAMPLE SYSTEM`) de unas 10 veces los juegos pedidos, según el número de filas
+        estimado por Postgres, y solo esa muestra se baraja. La muestra es como mínimo del 1 %
+        para que abarque bastantes bloques y no quede vacía por azar.
+
+        Returns:
+            Lista de juegos o None si la réplica está incompleta o no tiene suficientes juegos
+        """
+        if not settings.RAWG_CATALOG_ENABLED or not self.is_complete(db):
+            return None
+        try:
+            estimated = db.execute(
+                text("SELECT reltuples FROM pg_class WHERE oid = 'catalogo_rawg'::regclass")
+            ).scalar() or 0
+            percent = min(100.0, max(1.0, 100.0 * count * 10 / estimated)) if estimated > 0 else 100.0
+            sample = aliased(Catalogo, tablesample(Catalogo.__table__, func.system(percent)))
+            rows = db.query(sample).order_by(func.random()).limit(count).all()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error consultando el catálogo local: {str(e)}")
+            return None
+        if len(rows) < count:
+            return None
+        return [self._to_game(row) for row in rows]
+
+# Instancia global
+rawg_catalog = RawgCatalog()
+
+if __name__ == "__main__":
+    # Permite lanzar la sincronización desde cron: python -m app.utils.rawg_catalog
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        print(rawg_catalog.sync(db))
+    finally:
+        db.close()
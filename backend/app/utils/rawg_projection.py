@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+
+# Campos de nivel superior que conservamos de cada juego de un listado de RAWG.
+# Se aplica antes de cachear, así que todo lo que no esté aquí nunca llega a memoria.
+STORED_GAME_FIELDS = (
+    "id", "name", "slug", "background_image", "released", "updated", "rating",
+    "ratings_count", "metacritic", "description", "genres", "platforms", "tags",
+    "esrb_rating",
+)
+
+# Campos que se devuelven al navegador por defecto (los del esquema GameResult)
+DEFAULT_RESPONSE_FIELDS = ("id", "name", "background_image", "released", "rating", "genres", "price")
+
+def _slim_ref(ref: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Reduce una referencia anidada de RAWG (género, tag, ESRB...) a id, nombre y slug"""
+    if not ref:
+        return ref
+    return {"id": ref.get("id"), "name": ref.get("name"), "slug": ref.get("slug")}
+
+def slim_game(game: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Proyecta un juego de un listado de RAWG a los campos que usamos.
+
+    Descarta `stores`, `short_screenshots`, `ratings` y demás estructuras grandes,
+    y reduce géneros, tags, plataformas y clasificación ESRB a id, nombre y slug.
+    """
+    slim = {field: game[field] for field in STORED_GAME_FIELDS if field in game}
+    if "genres" in slim:
+        slim["genres"] = [_slim_ref(g) for g in slim["genres"] or []]
+    if "tags" in slim:
+        slim["tags"] = [_slim_ref(t) for t in slim["tags"] or []]
+    if "platforms" in slim:
+        slim["platforms"] = [
+            {"platform": _slim_ref(p.get("platform"))} for p in slim["platforms"] or [] if p.get("platform")
+        ]
+    if "esrb_rating" in slim:
+        slim["esrb_rating"] = _slim_ref(slim["esrb_rating"])
+    return slim
+
+def slim_page(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplica `slim_game` a todos los resultados de una página de RAWG"""
+    if not isinstance(data, dict) or "results" not in data:
+        return data
+    return {**data, "results": [slim_game(g) for g in data.get("results") or []]}
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Interpreta el parámetro `fields=` (lista separada por comas).
+
+    Sin valor se usan los campos de GameResult; los campos desconocidos se ignoran
+    y el `id` se incluye siempre.
+    """
+    if not fields:
+        return list(DEFAULT_RESPONSE_FIELDS)
+    allowed = set(STORED_GAME_FIELDS) | set(DEFAULT_RESPONSE_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip() in allowed]
+    return ["id"] + [f for f in requested if f != "id"]
+
+def project_games(games: List[Dict[str, Any]], fields: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Proyecta una lista de juegos a los campos de respuesta pedidos.
+
+    Devuelve diccionarios nuevos, por lo que es seguro usarla sobre instantáneas cacheadas.
+    """
+    selected = parse_fields(fields)
+    return [{field: game[field] for field in selected if field in game} for game in games]
@@ -3,6 +3,7 @@ from collections import Counter
 from typing import List, Dict, Any
 import logging
 from .. import models
+from .moderation import visible_filter
 
 logger = logging.getLogger(__name__)
 
@@ -104,8 +105,10 @@ class RecommendationEngine:
                 logger.warning(f"No se pudieron determinar preferencias para usuario {user_id}")
                 return []
             
-            # Obtener juegos de la base de datos que estén dentro del presupuesto
-            query = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones)
+            # Obtener juegos de la base de datos que estén dentro del presupuesto y no estén bloqueados
+            query = db.query(models.JuegosScrapeadoDeSteamParaRecomendaiones).filter(
+                visible_filter(models.JuegosScrapeadoDeSteamParaRecomendaiones)
+            )
             
             if max_price is not None and max_price > 0:
                 query = query.filter(models.JuegosScrapeadoDeSteamParaRecomendaiones.precio <= max_price)
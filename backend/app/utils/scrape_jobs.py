@@ -0,0 +1,565 @@
+from sqlalchemy import literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+import multiprocessing
+import threading
+import time
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from .moderation import moderation_statuses, moderation_columns, stored_game_for_moderation
+from .steam_scraper import steam_scraper
+
+logger = logging.getLogger(__name__)
+
+Trabajo = models.TrabajoScraping
+Cursor = models.CursorScraping
+Juego = models.JuegosScrapeadoDeSteamParaRecomendaiones
+Rechazo = models.RechazoSteam
+Reclamacion = models.ReclamacionSteam
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+# Un trabajo activo sin latido durante este tiempo se considera muerto (p. ej. reinicio del servidor);
+# lo mismo vale para un término reclamado cuyo cursor no avanza
+STALE_AFTER = timedelta(minutes=10)
+
+# Contadores que se suman entre los trabajadores de un scraping repartido
+SUMMED_COUNTERS = (
+    "total_consultados", "juegos_validos", "juegos_duplicados", "juegos_actualizados", "juegos_excluidos", "errores",
+    "paginas_descargadas", "juegos_guardados",
+)
+
+class ScrapeJobConflict(Exception):
+    """Se lanza al intentar iniciar un scraping masivo cuando ya hay otro en marcha"""
+
+    def __init__(self, job_id: Optional[int]):
+        detail = f" (trabajo {job_id})" if job_id is not None else ""
+        super().__init__(f"Ya hay un scraping masivo en curso{detail}")
+        self.job_id = job_id
+
+def job_to_dict(job: Trabajo) -> Dict[str, Any]:
+    """Representación del trabajo para la API"""
+    return {
+        "id": job.id,
+        "estado": job.estado,
+        "min_juegos_nuevos": job.min_juegos_nuevos,
+        "trabajadores": job.trabajadores,
+        "contadores": job.contadores or {},
+        "mensaje": job.mensaje,
+        "cancelacion_solicitada": job.cancelar,
+        "creado_en": job.creado_en.isoformat() if job.creado_en else None,
+        "iniciado_en": job.iniciado_en.isoformat() if job.iniciado_en else None,
+        "actualizado_en": job.actualizado_en.isoformat() if job.actualizado_en else None,
+        "finalizado_en": job.finalizado_en.isoformat() if job.finalizado_en else None,
+    }
+
+# Columnas que escribe la ingesta del scraper; un juego ya guardado (mismo steam_app_id)
+# se actualiza con los valores nuevos en lugar de descartarse
+SCRAPED_COLUMNS = ("nombre", "generos", "precio", "descripcion", "tags", "imagen_principal", "steam_app_id")
+MODERATION_COLUMNS = ("moderation_status", "moderation_model", "moderation_version")
+
+def upsert_scraped_games(db: Session, games: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Inserta o actualiza un lote de juegos con un único `INSERT ... ON CONFLICT (steam_app_id)
+    DO UPDATE`. Los juegos sin `steam_app_id` siempre se insertan. No hace commit.
+
+    Returns:
+        (insertados, actualizados)
+    """
+    if not games:
+        return 0, 0
+    decisions = moderation_statuses([
+        stored_game_for_moderation(g.get("nombre"), g.get("descripcion"), g.get("generos"), g.get("tags"))
+        for g in games
+    ])
+    # Postgres no permite actualizar la misma fila dos veces en una sentencia: el último gana
+    rows = {}
+    now = datetime.utcnow()
+    for i, (game, (status_value, decided_by)) in enumerate(zip(games, decisions)):
+        row = {column: game.get(column) for column in SCRAPED_COLUMNS}
+        row.update(moderation_columns(status_value, decided_by))
+        row["scrapeado_en"] = now
+        rows[row["steam_app_id"] if row["steam_app_id"] is not None else ("sin_id", i)] = row
+    
+    stmt = insert(Juego).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Juego.steam_app_id],
+        set_={
+            column: stmt.excluded[column]
+            for column in SCRAPED_COLUMNS + MODERATION_COLUMNS + ("scrapeado_en",)
+            if column != "steam_app_id"
+        },
+    ).returning(literal_column("xmax = 0"))  # xmax = 0 solo en las filas recién insertadas
+    inserted_flags = [row[0] for row in db.execute(stmt)]
+    inserted = sum(1 for flag in inserted_flags if flag)
+    return inserted, len(inserted_flags) - inserted
+
+def store_scraped_games(db: Session, games: List[Dict[str, Any]], batch_size: int = 500) -> int:
+    """
+    Modera y guarda juegos scrapeados en lotes multi-fila, con un commit por lote.
+
+    Returns:
+        Número de juegos añadidos (los actualizados no cuentan)
+    """
+    added_count = 0
+    updated_count = 0
+    for i in range(0, len(games), batch_size):
+        inserted, updated = upsert_scraped_games(db, games[i:i+batch_size])
+        db.commit()
+        added_count += inserted
+        updated_count += updated
+    logger.info(f"Guardados {added_count} juegos nuevos y actualizados {updated_count} existentes")
+    return added_count
+
+def load_start_pages(db: Session, terms: List[str]) -> Dict[str, int]:
+    """
+    Página por la que reanudar cada término según los cursores guardados.
+
+    Los términos agotados se omiten; cuando todos lo están se empieza un nuevo ciclo
+    desde la página 1.
+    """
+    cursors = {cursor.termino: cursor for cursor in db.query(Cursor).filter(Cursor.termino.in_(terms)).all()}
+    if terms and all(term in cursors and cursors[term].agotado for term in terms):
+        logger.info("Todos los términos de búsqueda están agotados; se reinician los cursores")
+        db.query(Cursor).filter(Cursor.termino.in_(terms)).delete(synchronize_session=False)
+        db.commit()
+        cursors = {}
+    return {
+        term: cursors[term].pagina if term in cursors else 1
+        for term in terms
+        if term not in cursors or not cursors[term].agotado
+    }
+
+def load_known_app_ids(db: Session) -> Tuple[Set[int], Set[int]]:
+    """
+    IDs de Steam que el scraper no necesita volver a descargar y los que debe refrescar.
+
+    Returns:
+        (conocidos, a refrescar): conocidos son los guardados hace menos de
+        STEAM_REFRESH_TTL_DAYS días y los descartados hace menos de STEAM_REJECTION_TTL_DAYS;
+        a refrescar, los guardados hace más tiempo (o sin fecha de scraping)
+    """
+    now = datetime.utcnow()
+    refresh_cutoff = now - timedelta(days=settings.STEAM_REFRESH_TTL_DAYS)
+    fresh = db.query(Juego.steam_app_id).filter(Juego.steam_app_id.isnot(None), Juego.scrapeado_en >= refresh_cutoff)
+    rejection_cutoff = now - timedelta(days=settings.STEAM_REJECTION_TTL_DAYS)
+    rejected = db.query(Rechazo.steam_app_id).filter(Rechazo.rechazado_en >= rejection_cutoff)
+    known = {row[0] for row in fresh.union(rejected).all()}
+    stale = db.query(Juego.steam_app_id).filter(
+        Juego.steam_app_id.isnot(None),
+        or_(Juego.scrapeado_en.is_(None), Juego.scrapeado_en < refresh_cutoff),
+    )
+    return known, {row[0] for row in stale.all()} - known
+
+def store_rejections(db: Session, rejected: List[Tuple[int, str]]) -> None:
+    """Registra (o renueva) los juegos descartados por el scraper; no hace commit"""
+    if not rejected:
+        return
+    now = datetime.utcnow()
+    rows = {app_id: {"steam_app_id": app_id, "motivo": reason, "rechazado_en": now} for app_id, reason in rejected}
+    stmt = insert(Rechazo).values(list(rows.values()))
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[Rechazo.steam_app_id],
+        set_={"motivo": stmt.excluded.motivo, "rechazado_en": stmt.excluded.rechazado_en},
+    ))
+
+def save_checkpoint(
+    db: Session,
+    term: str,
+    next_page: int,
+    exhausted: bool,
+    games: List[Dict[str, Any]],
+    rejected: Optional[List[Tuple[int, str]]] = None,
+) -> int:
+    """
+    Guarda los juegos nuevos y los descartados de una página y avanza el cursor del término.
+
+    Returns:
+        Número de juegos guardados
+    """
+    added = store_scraped_games(db, games) if games else 0
+    store_rejections(db, rejected or [])
+    stmt = insert(Cursor).values(termino=term, pagina=next_page, agotado=exhausted, actualizado_en=datetime.utcnow())
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[Cursor.termino],
+        set_={"pagina": stmt.excluded.pagina, "agotado": stmt.excluded.agotado, "actualizado_en": stmt.excluded.actualizado_en},
+    ))
+    db.commit()
+    return added
+
+def ensure_cursors(db: Session, terms: List[str]) -> None:
+    """Crea los cursores que falten para poder reclamar los términos fila a fila"""
+    if not terms:
+        return
+    stmt = insert(Cursor).values([{"termino": term, "pagina": 1, "agotado": False} for term in terms])
+    db.execute(stmt.on_conflict_do_nothing(index_elements=[Cursor.termino]))
+    db.commit()
+
+def claim_terms(db: Session, worker: str, terms: List[str], limit: int) -> Dict[str, int]:
+    """
+    Reclama hasta `limit` términos no agotados y libres (o con un reclamo abandonado).
+
+    `FOR UPDATE SKIP LOCKED` hace que dos trabajadores que reclaman a la vez obtengan
+    términos distintos sin esperarse entre sí.
+
+    Returns:
+        Página por la que continuar cada término reclamado
+    """
+    cutoff = datetime.utcnow() - STALE_AFTER
+    cursors = (
+        db.query(Cursor)
+        .filter(Cursor.termino.in_(terms), Cursor.agotado.is_(False))
+        .filter(or_(Cursor.reclamado_por.is_(None), Cursor.actualizado_en < cutoff))
+        .order_by(Cursor.termino)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = {}
+    for cursor in cursors:
+        cursor.reclamado_por = worker
+        cursor.actualizado_en = datetime.utcnow()
+        claimed[cursor.termino] = cursor.pagina
+    db.commit()
+    return claimed
+
+def release_terms(db: Session, terms: List[str], worker: str) -> None:
+    db.query(Cursor).filter(Cursor.termino.in_(terms), Cursor.reclamado_por == worker).update(
+        {"reclamado_por": None}, synchronize_session=False
+    )
+    db.commit()
+
+def claim_app_ids(job_id: int, app_ids: List[int]) -> Set[int]:
+    """Reserva para este trabajador los IDs que ningún otro ha reservado en el mismo trabajo"""
+    if not app_ids:
+        return set()
+    db = SessionLocal()
+    try:
+        stmt = insert(Reclamacion).values([{"trabajo_id": job_id, "steam_app_id": app_id} for app_id in set(app_ids)])
+        stmt = stmt.on_conflict_do_nothing().returning(Reclamacion.steam_app_id)
+        claimed = {row[0] for row in db.execute(stmt)}
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+def _sum_counters(counters: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {key: sum(c.get(key, 0) for c in counters) for key in SUMMED_COUNTERS}
+
+def clamp_workers(workers: Optional[int]) -> int:
+    """
+    Limita los procesos de un trabajo a STEAM_MAX_CONCURRENCY_PER_HOST: cada proceso hace
+    como mínimo una petición a la vez, así que con más procesos que ese límite el conjunto
+    lo superaría.
+    """
+    return max(1, min(workers or settings.STEAM_SCRAPE_WORKERS, settings.STEAM_MAX_CONCURRENCY_PER_HOST))
+
+def run_scrape_shard(job_id: int, worker: str, shards: int) -> None:
+    """
+    Trabajador de un scraping masivo: reclama su parte de los términos de búsqueda y los
+    recorre, repitiendo hasta que no quedan libres, se alcanza el objetivo del trabajo o
+    se cancela. Cada trabajador recorre un término como mucho una vez por trabajo; con
+    un solo trabajador se reclaman todos los términos de una vez.
+
+    Con `shards` > 1 se ejecuta en su propio proceso; los límites por host se reparten
+    entre los trabajadores para que el conjunto respete los de un solo proceso (por eso
+    `shards` nunca supera STEAM_MAX_CONCURRENCY_PER_HOST, ver `clamp_workers`).
+    """
+    db = SessionLocal()
+    try:
+        if shards > 1:
+            steam_scraper.max_concurrency = max(1, settings.STEAM_MAX_CONCURRENCY_PER_HOST // shards)
+            steam_scraper.min_interval = settings.STEAM_MIN_REQUEST_INTERVAL * shards
+        
+        # Los juegos con ID de Steam se identifican por ese ID (y se refrescan al caducar);
+        # los nombres solo evitan duplicar las altas manuales, que no lo tienen
+        existing_names = {row[0] for row in db.query(Juego.nombre).filter(Juego.steam_app_id.is_(None)).all()}
+        known_app_ids, refresh_app_ids = load_known_app_ids(db)
+        logger.info(
+            f"Trabajo {job_id} ({worker}): {len(known_app_ids)} IDs de Steam conocidos no se volverán a descargar; "
+            f"{len(refresh_app_ids)} guardados hace más de {settings.STEAM_REFRESH_TTL_DAYS} días se refrescarán"
+        )
+        
+        terms_per_claim = -(-len(steam_scraper.search_terms) // shards)
+        finished_terms: List[Dict[str, Any]] = []
+        visited: Set[str] = set()
+        while True:
+            job = db.query(Trabajo).filter(Trabajo.id == job_id).first()
+            db.commit()
+            remaining = job.min_juegos_nuevos - (job.contadores or {}).get("juegos_guardados", 0)
+            if job.cancelar or remaining <= 0:
+                break
+            pending_terms = [term for term in steam_scraper.search_terms if term not in visited]
+            start_pages = claim_terms(db, worker, pending_terms, terms_per_claim)
+            if not start_pages:
+                break
+            visited.update(start_pages)
+            
+            # Los juegos se guardan página a página junto con el cursor de su término
+            saved = {"count": 0}
+            
+            def on_checkpoint(term, next_page, exhausted, games, rejected):
+                saved["count"] += save_checkpoint(db, term, next_page, exhausted, games, rejected)
+            
+            def on_progress(counters):
+                current = {**counters, "juegos_guardados": saved["count"]}
+                return scrape_job_runner.report(job_id, worker, finished_terms + [current], current)
+            
+            try:
+                scrape_results = steam_scraper.scrape_bulk_indie_games(
+                    min_new_games=remaining,
+                    existing_names=existing_names,
+                    on_progress=on_progress,
+                    start_pages=start_pages,
+                    on_checkpoint=on_checkpoint,
+                    known_app_ids=known_app_ids,
+                    on_claim=(lambda app_ids: claim_app_ids(job_id, app_ids)) if shards > 1 else None,
+                    refresh_app_ids=refresh_app_ids,
+                )
+            finally:
+                release_terms(db, list(start_pages), worker)
+            stats = scrape_results["stats"]
+            stats["juegos_guardados"] = saved["count"]
+            finished_terms.append(stats)
+            # Los IDs y nombres nuevos (y los ya refrescados) de estos términos no deben volver a descargarse en el siguiente
+            scraped_ids = {g["steam_app_id"] for g in scrape_results["results"] + scrape_results["refreshed"] if g.get("steam_app_id")}
+            known_app_ids.update(scraped_ids)
+            refresh_app_ids.difference_update(scraped_ids)
+            existing_names.update(g["nombre"] for g in scrape_results["results"])
+            if scrape_job_runner.report(job_id, worker, finished_terms, stats) or stats.get("cancelado"):
+                break
+    finally:
+        db.close()
+
+class ScrapeJobRunner:
+    """
+    Ejecuta los scrapings masivos de Steam fuera de las peticiones HTTP.
+
+    La API solo crea el trabajo en `trabajos_scraping`; lo ejecuta un proceso trabajador
+    aparte (`python -m app.utils.scrape_jobs`) o, con STEAM_SCRAPE_RUNNER="thread", un
+    hilo del propio proceso de la API. El estado y los contadores de cada trabajo se
+    guardan en la tabla, de modo que cualquier proceso puede consultarlos o solicitar su
+    cancelación. El índice único parcial `ux_trabajos_scraping_activo` garantiza en la
+    base de datos que solo haya un trabajo activo a la vez, aunque haya varias réplicas.
+    """
+
+    def _active_job(self, db: Session) -> Optional[Trabajo]:
+        job = db.query(Trabajo).filter(Trabajo.estado.in_(ACTIVE_STATES)).order_by(Trabajo.id.desc()).first()
+        if job is None:
+            return None
+        heartbeat = job.actualizado_en or job.creado_en
+        if heartbeat and datetime.utcnow() - heartbeat > STALE_AFTER:
+            if job.estado == JOB_QUEUED:
+                job.mensaje = "Ningún trabajador recogió el trabajo"
+            else:
+                job.mensaje = "El trabajo dejó de dar señales de vida"
+            job.estado = JOB_FAILED
+            job.finalizado_en = datetime.utcnow()
+            db.commit()
+            return None
+        return job
+
+    def start(self, db: Session, min_new_games: int, workers: Optional[int] = None) -> Trabajo:
+        """
+        Encola un trabajo de scraping repartido entre `workers` procesos (por defecto
+        STEAM_SCRAPE_WORKERS, como mucho STEAM_MAX_CONCURRENCY_PER_HOST). Con STEAM_SCRAPE_RUNNER="thread" se lanza además en un
+        hilo de este proceso; si no, lo recoge el proceso trabajador.
+
+        Raises:
+            ScrapeJobConflict: Si ya hay un trabajo activo
+        """
+        active = self._active_job(db)
+        if active is not None:
+            raise ScrapeJobConflict(active.id)
+        now = datetime.utcnow()
+        job = Trabajo(
+            estado=JOB_QUEUED,
+            min_juegos_nuevos=min_new_games,
+            trabajadores=clamp_workers(workers),
+            contadores={},
+            creado_en=now,
+            actualizado_en=now,
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Otra petición ha creado un trabajo activo entre la comprobación y el INSERT
+            db.rollback()
+            active = self._active_job(db)
+            raise ScrapeJobConflict(active.id if active is not None else None)
+        db.refresh(job)
+
+        if settings.STEAM_SCRAPE_RUNNER == "thread":
+            threading.Thread(target=self.run_next, name=f"scrape-job-{job.id}", daemon=True).start()
+        return job
+
+    def claim_next(self) -> Optional[int]:
+        """
+        Reclama el trabajo en cola más antiguo y lo marca como en curso.
+
+        `FOR UPDATE SKIP LOCKED` hace que dos trabajadores no recojan el mismo trabajo.
+
+        Returns:
+            ID del trabajo reclamado o None si no hay ninguno en cola
+        """
+        db = SessionLocal()
+        try:
+            job = (
+                db.query(Trabajo)
+                .filter(Trabajo.estado == JOB_QUEUED)
+                .order_by(Trabajo.id)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                db.commit()
+                return None
+            now = datetime.utcnow()
+            job.estado = JOB_CANCELLED if job.cancelar else JOB_RUNNING
+            job.iniciado_en = now
+            job.actualizado_en = now
+            if job.cancelar:
+                job.finalizado_en = now
+                job.mensaje = "Cancelado antes de empezar"
+            db.commit()
+            return None if job.cancelar else job.id
+        finally:
+            db.close()
+
+    def run_next(self) -> Optional[int]:
+        """Ejecuta el siguiente trabajo en cola, si lo hay, y devuelve su ID"""
+        job_id = self.claim_next()
+        if job_id is not None:
+            self._run(job_id)
+        return job_id
+
+    def serve(self, poll_interval: Optional[float] = None) -> None:
+        """Bucle del proceso trabajador: ejecuta los trabajos en cola según van llegando"""
+        poll_interval = poll_interval or settings.STEAM_SCRAPE_POLL_SECONDS
+        logger.info(f"Trabajador de scraping esperando trabajos (cada {poll_interval}s)")
+        while True:
+            try:
+                job_id = self.run_next()
+            except Exception as e:
+                logger.error(f"Error recogiendo trabajos de scraping: {str(e)}")
+                job_id = None
+            if job_id is None:
+                time.sleep(poll_interval)
+
+    def cancel(self, db: Session, job_id: int) -> Optional[Trabajo]:
+        """Solicita la cancelación de un trabajo; devuelve None si no existe"""
+        job = db.query(Trabajo).filter(Trabajo.id == job_id).with_for_update().first()
+        if job is not None and job.estado in ACTIVE_STATES:
+            job.cancelar = True
+            if job.estado == JOB_QUEUED:
+                # Ningún trabajador lo ha recogido todavía: se cancela directamente
+                job.estado = JOB_CANCELLED
+                job.mensaje = "Cancelado antes de empezar"
+                job.finalizado_en = datetime.utcnow()
+            db.commit()
+            db.refresh(job)
+        return job
+
+    def _update(self, job_id: int, **fields) -> bool:
+        """Actualiza el trabajo en su propia sesión y devuelve si se ha pedido cancelarlo"""
+        db = SessionLocal()
+        try:
+            job = db.query(Trabajo).filter(Trabajo.id == job_id).first()
+            for field, value in fields.items():
+                setattr(job, field, value)
+            job.actualizado_en = datetime.utcnow()
+            db.commit()
+            return bool(job.cancelar)
+        finally:
+            db.close()
+
+    def report(self, job_id: int, worker: str, terms: List[Dict[str, Any]], current: Dict[str, Any]) -> bool:
+        """
+        Publica los contadores de un trabajador y devuelve si se ha pedido cancelar.
+
+        La fila del trabajo se bloquea durante la actualización para que los trabajadores
+        de un scraping repartido no se pisen los contadores entre sí.
+        """
+        db = SessionLocal()
+        try:
+            job = db.query(Trabajo).filter(Trabajo.id == job_id).with_for_update().first()
+            workers = dict((job.contadores or {}).get("trabajadores") or {})
+            workers[worker] = {**current, **_sum_counters(terms)}
+            job.contadores = {**_sum_counters(list(workers.values())), "trabajadores": workers}
+            job.actualizado_en = datetime.utcnow()
+            db.commit()
+            return bool(job.cancelar)
+        finally:
+            db.close()
+
+    def _run(self, job_id: int) -> None:
+        db = SessionLocal()
+        try:
+            job = db.query(Trabajo).filter(Trabajo.id == job_id).first()
+            # Los trabajos encolados antes del límite pueden pedir más procesos de los permitidos
+            shards = clamp_workers(job.trabajadores or 1)
+            
+            # Reanudar por donde se quedó el último trabajo; cada término se reclama por separado
+            load_start_pages(db, steam_scraper.search_terms)
+            ensure_cursors(db, steam_scraper.search_terms)
+            # Solo hay un trabajo activo: los reclamos que queden son de trabajos interrumpidos
+            db.query(Cursor).filter(Cursor.reclamado_por.isnot(None)).update({"reclamado_por": None}, synchronize_session=False)
+            db.commit()
+            
+            if shards == 1:
+                run_scrape_shard(job_id, "w0", 1)
+                failed = []
+            else:
+                context = multiprocessing.get_context("spawn")
+                processes = [
+                    context.Process(target=run_scrape_shard, args=(job_id, f"w{i}", shards), name=f"scrape-job-{job_id}-w{i}")
+                    for i in range(shards)
+                ]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+                failed = [process.name for process in processes if process.exitcode != 0]
+            
+            db.expire_all()
+            job = db.query(Trabajo).filter(Trabajo.id == job_id).first()
+            stats = job.contadores or {}
+            if failed:
+                self._update(
+                    job_id, estado=JOB_FAILED, finalizado_en=datetime.utcnow(),
+                    mensaje=f"Fallaron los trabajadores {', '.join(failed)}; añadidos {stats.get('juegos_guardados', 0)} juegos",
+                )
+            else:
+                self._update(
+                    job_id,
+                    estado=JOB_CANCELLED if job.cancelar else JOB_COMPLETED,
+                    mensaje=f"Añadidos {stats.get('juegos_guardados', 0)} juegos nuevos",
+                    finalizado_en=datetime.utcnow(),
+                )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error en el trabajo de scraping {job_id}: {str(e)}")
+            self._update(job_id, estado=JOB_FAILED, mensaje=str(e), finalizado_en=datetime.utcnow())
+        finally:
+            db.query(Reclamacion).filter(Reclamacion.trabajo_id == job_id).delete(synchronize_session=False)
+            db.commit()
+            db.close()
+
+# Instancia global
+scrape_job_runner = ScrapeJobRunner()
+
+if __name__ == "__main__":
+    # Proceso trabajador de los scrapings masivos: python -m app.utils.scrape_jobs
+    logging.basicConfig(level=logging.INFO)
+    scrape_job_runner.serve()
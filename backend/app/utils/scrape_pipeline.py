@@ -0,0 +1,357 @@
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import time
+import httpx
+from .host_scheduler import HostScheduler
+
+logger = logging.getLogger(__name__)
+
+# Como máximo se recorren estas páginas por término en cada ejecución
+MAX_PAGES_PER_TERM = 30
+
+class StageMetrics:
+    """Contadores de una etapa del pipeline: elementos, tiempo ocupado y profundidad de su cola"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.in_flight = 0
+        self.queue_max = 0
+        self._queue_total = 0
+        self._queue_samples = 0
+
+    def observe_queue(self, depth: int) -> None:
+        self.queue_max = max(self.queue_max, depth)
+        self._queue_total += depth
+        self._queue_samples += 1
+
+    def start(self) -> float:
+        self.in_flight += 1
+        return time.perf_counter()
+
+    def finish(self, started: float, items: int = 1) -> None:
+        self.in_flight -= 1
+        self.items += items
+        self.busy += time.perf_counter() - started
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        """
+        `ocupacion` es la fracción del tiempo en que los trabajadores de la etapa estuvieron
+        ocupados: la etapa con mayor ocupación y cola de entrada llena es el cuello de botella.
+        """
+        elapsed = max(elapsed, 1e-6)
+        return {
+            "trabajadores": self.workers,
+            "procesados": self.items,
+            "por_segundo": round(self.items / elapsed, 2),
+            "ocupacion": round(min(self.busy / (elapsed * max(self.workers, 1)), 1.0), 2),
+            "cola_max": self.queue_max,
+            "cola_media": round(self._queue_total / self._queue_samples, 1) if self._queue_samples else 0,
+        }
+
+def parse_app_id(value: Any) -> Optional[int]:
+    """ID numérico de una aplicación de Steam, o None si no lo es (p. ej. packs con varios IDs)"""
+    value = str(value or "").strip()
+    return int(value) if value.isdigit() else None
+
+# Métricas de la etapa de parseo de la ejecución en curso; las tareas del pipeline la
+# heredan al crearse y `SteamScraper._run_parser` registra en ella cada parseo
+parse_stage_metrics: ContextVar[Optional[StageMetrics]] = ContextVar("parse_stage_metrics", default=None)
+
+class _Page:
+    """Página de resultados en curso; se guarda cuando todos sus candidatos se han procesado"""
+
+    __slots__ = ("term", "number", "exhausted", "pending", "complete", "games", "rejected")
+
+    def __init__(self, term: str, number: int, pending: int = 0, exhausted: bool = False):
+        self.term = term
+        self.number = number
+        self.exhausted = exhausted
+        self.pending = pending
+        self.complete = True
+        self.games: List[Dict[str, Any]] = []
+        self.rejected: List[Tuple[int, str]] = []
+
+class ScrapePipeline:
+    """
+    Scraping masivo dividido en etapas unidas por colas acotadas.
+
+    listado (páginas de búsqueda) -> detalles (páginas de juego, parseadas en el pool de
+    procesos de `steam_parser`) -> escritura (checkpoints agrupados en lotes)
+
+    Cada etapa tiene su propio número de trabajadores; cuando una cola se llena la etapa
+    anterior espera, así que el ritmo lo marca la etapa más lenta. Las páginas de un
+    término se guardan en orden: el cursor solo avanza sobre páginas completas.
+    """
+
+    def __init__(
+        self,
+        scraper: Any,
+        client: httpx.AsyncClient,
+        scheduler: HostScheduler,
+        min_new_games: int,
+        existing: Set[str],
+        known: Set[int],
+        refresh: Set[int],
+        start_pages: Optional[Dict[str, int]],
+        report_progress: Callable[[Dict[str, Any]], Awaitable[bool]],
+        checkpoint: Callable[[str, int, bool, List[Dict[str, Any]], List[Tuple[int, str]]], Awaitable[None]],
+        listing_workers: int,
+        detail_workers: int,
+        parser_workers: int,
+        queue_size: int,
+        write_batch_pages: int,
+        progress_every: int,
+        claim: Optional[Callable[[List[int]], Awaitable[Set[int]]]] = None,
+    ):
+        self.scraper = scraper
+        self.client = client
+        self.scheduler = scheduler
+        self.min_new_games = min_new_games
+        self.existing = existing
+        self.known = known
+        self.refresh = refresh
+        self.start_pages = start_pages
+        self.report_progress = report_progress
+        self.checkpoint = checkpoint
+        self.listing_workers = listing_workers
+        self.detail_workers = detail_workers
+        self.queue_size = queue_size
+        self.write_batch_pages = write_batch_pages
+        self.progress_every = progress_every
+        self.claim = claim
+
+        self.results = {
+            "total_consultados": 0,
+            "juegos_validos": 0,
+            "juegos_duplicados": 0,
+            "juegos_actualizados": 0,
+            "juegos_excluidos": 0,
+            "errores": 0
+        }
+        self.valid_games: List[Dict[str, Any]] = []
+        self.refreshed_games: List[Dict[str, Any]] = []
+        self.cancelled = False
+        self.metrics = {
+            "listado": StageMetrics("listado", listing_workers),
+            "detalles": StageMetrics("detalles", detail_workers),
+            "parseo": StageMetrics("parseo", parser_workers),
+            "escritura": StageMetrics("escritura", 1),
+        }
+        self._pages: Dict[str, List[_Page]] = {}
+        self._frozen: Dict[str, int] = {}
+        self._term_locks: Dict[str, asyncio.Lock] = {}
+        self._processed = 0
+        self._write_error: Optional[Exception] = None
+
+    def stage_stats(self) -> Dict[str, Dict[str, Any]]:
+        elapsed = self.scheduler.stats()["duracion_segundos"]
+        return {name: metrics.snapshot(elapsed) for name, metrics in self.metrics.items()}
+
+    async def _progress(self) -> None:
+        if await self.report_progress({**self.results, "etapas": self.stage_stats()}):
+            self.cancelled = True
+            self._stop.set()
+
+    async def _advance(self, term: str) -> None:
+        """Envía a escritura, en orden, las páginas terminadas al principio de la lista del término"""
+        async with self._term_locks[term]:
+            pages = self._pages[term]
+            while pages and pages[0].pending == 0:
+                page = pages.pop(0)
+                frozen = self._frozen.get(term)
+                if frozen is not None:
+                    next_page, exhausted = frozen, False
+                elif page.exhausted:
+                    next_page, exhausted = page.number, True
+                elif page.complete:
+                    next_page, exhausted = page.number + 1, False
+                else:
+                    # La página se revisará de nuevo: el cursor no la sobrepasa en esta ejecución
+                    self._frozen[term] = next_page = page.number
+                    exhausted = False
+                self.metrics["escritura"].observe_queue(self._write_queue.qsize())
+                await self._write_queue.put((term, next_page, exhausted, page.games, page.rejected))
+
+    async def _lister(self, terms: List[Tuple[str, int]]) -> None:
+        while terms and not self._stop.is_set():
+            term, number = terms.pop(0)
+            max_pages = number + MAX_PAGES_PER_TERM - 1
+            while number <= max_pages and not self._stop.is_set():
+                started = self.metrics["listado"].start()
+                games_list = await self.scraper._fetch_browse_page_async(self.client, self.scheduler, term, number)
+                self.metrics["listado"].finish(started)
+
+                if not games_list:
+                    logger.info(f"No hay más juegos para el término '{term}' o se alcanzó el final de resultados")
+                    self._pages[term].append(_Page(term, number, exhausted=True))
+                    await self._advance(term)
+                    break
+
+                self.results["total_consultados"] += len(games_list)
+
+                # Verificar primero si el juego ya se conoce para evitar procesamiento innecesario
+                candidates = []
+                for game in games_list:
+                    if not game.get("app_id"):
+                        continue
+                    app_id = parse_app_id(game["app_id"])
+                    if app_id in self.known or game.get("nombre") in self.existing:
+                        self.results["juegos_duplicados"] += 1
+                        continue
+                    if app_id is not None:
+                        self.known.add(app_id)
+                    candidates.append(game)
+
+                if self.claim is not None and candidates:
+                    # Otros procesos recorren otros términos: solo se descargan los IDs reservados aquí
+                    app_ids = [parse_app_id(game["app_id"]) for game in candidates]
+                    claimed = await self.claim([app_id for app_id in app_ids if app_id is not None])
+                    kept = [game for game, app_id in zip(candidates, app_ids) if app_id is None or app_id in claimed]
+                    self.results["juegos_duplicados"] += len(candidates) - len(kept)
+                    candidates = kept
+
+                page = _Page(term, number, pending=len(candidates))
+                self._pages[term].append(page)
+                for i, game in enumerate(candidates):
+                    if self._stop.is_set():
+                        # Candidatos sin encolar: la página queda incompleta
+                        page.pending -= len(candidates) - i
+                        page.complete = False
+                        for skipped in candidates[i:]:
+                            self.known.discard(parse_app_id(skipped["app_id"]))
+                        break
+                    self.metrics["detalles"].observe_queue(self._detail_queue.qsize())
+                    await self._detail_queue.put((page, game))
+                if not candidates:
+                    await self._progress()
+                await self._advance(term)
+                number += 1
+
+    def _collect(self, page: _Page, game: Dict[str, Any], game_details: Any) -> None:
+        app_id = parse_app_id(game["app_id"])
+        if isinstance(game_details, Exception):
+            self.results["errores"] += 1
+            self.known.discard(app_id)  # Se reintentará en otra ejecución
+        elif not game_details:
+            self.results["juegos_excluidos"] += 1
+            if app_id is not None:
+                page.rejected.append((app_id, "excluido"))
+        elif app_id in self.refresh:
+            # Juego ya guardado cuya copia ha caducado: se actualiza sin contar para el objetivo
+            self.refreshed_games.append(game_details)
+            page.games.append(game_details)
+            self.refresh.discard(app_id)
+            self.results["juegos_actualizados"] += 1
+        elif game_details["nombre"] in self.existing:
+            self.results["juegos_duplicados"] += 1
+            if app_id is not None:
+                page.rejected.append((app_id, "duplicado"))
+        elif self.results["juegos_validos"] < self.min_new_games:
+            self.valid_games.append(game_details)
+            page.games.append(game_details)
+            self.existing.add(game_details["nombre"])
+            self.results["juegos_validos"] += 1
+            if self.results["juegos_validos"] % 10 == 0:
+                logger.info(f"Progreso: {self.results['juegos_validos']}/{self.min_new_games} juegos nuevos encontrados")
+            if self.results["juegos_validos"] >= self.min_new_games:
+                self._stop.set()
+        else:
+            # Juego válido que no cabe en el objetivo: la página se revisará de nuevo
+            page.complete = False
+            self.known.discard(app_id)
+
+    async def _detail_worker(self) -> None:
+        while True:
+            item = await self._detail_queue.get()
+            if item is None:
+                break
+            page, game = item
+            if self._stop.is_set():
+                page.complete = False
+                self.known.discard(parse_app_id(game["app_id"]))
+            else:
+                started = self.metrics["detalles"].start()
+                try:
+                    game_details = await self.scraper._fetch_game_details_async(self.client, self.scheduler, game["app_id"])
+                except Exception as e:
+                    game_details = e
+                self.metrics["detalles"].finish(started)
+                self._collect(page, game, game_details)
+                self._processed += 1
+                if self._processed % self.progress_every == 0:
+                    await self._progress()
+            page.pending -= 1
+            await self._advance(page.term)
+
+    async def _writer(self) -> None:
+        done = False
+        while not done:
+            item = await self._write_queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Agrupar lo que ya esté esperando: un checkpoint por término y lote
+            while len(batch) < self.write_batch_pages and not self._write_queue.empty():
+                item = self._write_queue.get_nowait()
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+
+            merged: Dict[str, List[Any]] = {}
+            for term, next_page, exhausted, games, rejected in batch:
+                if term in merged:
+                    entry = merged[term]
+                    entry[0], entry[1] = next_page, exhausted
+                    entry[2] = entry[2] + games
+                    entry[3] = entry[3] + rejected
+                else:
+                    merged[term] = [next_page, exhausted, list(games), list(rejected)]
+            if self._write_error is not None:
+                continue  # Tras un fallo solo se vacía la cola para no bloquear al resto de etapas
+            started = self.metrics["escritura"].start()
+            try:
+                for term, (next_page, exhausted, games, rejected) in merged.items():
+                    await self.checkpoint(term, next_page, exhausted, games, rejected)
+            except Exception as e:
+                logger.error(f"Error guardando resultados del scraping: {str(e)}")
+                self._write_error = e
+                self._stop.set()
+            finally:
+                self.metrics["escritura"].finish(started, len(batch))
+
+    async def run(self) -> None:
+        self._stop = asyncio.Event()
+        self._detail_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        parse_stage_metrics.set(self.metrics["parseo"])
+
+        terms = [
+            (term, self.start_pages[term] if self.start_pages is not None else 1)
+            for term in self.scraper.search_terms
+            if self.start_pages is None or term in self.start_pages
+        ]
+        for term, _ in terms:
+            self._pages[term] = []
+            self._term_locks[term] = asyncio.Lock()
+
+        writer = asyncio.create_task(self._writer())
+        detail_tasks = [asyncio.create_task(self._detail_worker()) for _ in range(self.detail_workers)]
+        try:
+            await asyncio.gather(*(self._lister(terms) for _ in range(self.listing_workers)))
+            for _ in detail_tasks:
+                await self._detail_queue.put(None)
+            await asyncio.gather(*detail_tasks)
+            await self._progress()
+        finally:
+            for task in detail_tasks:
+                task.cancel()
+            await self._write_queue.put(None)
+            await writer
+        if self._write_error is not None:
+            raise self._write_error
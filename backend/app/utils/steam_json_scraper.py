@@ -0,0 +1,165 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import re
+import httpx
+from .host_scheduler import HostScheduler
+from .steam_scraper import SteamScraper, SteamFetchError
+
+logger = logging.getLogger(__name__)
+
+# Resultados por página de la búsqueda JSON (la búsqueda HTML devuelve unos 25)
+SEARCH_PAGE_SIZE = 100
+
+# El ID de la aplicación solo aparece en la URL de la cápsula de cada resultado
+_APP_ID_IN_LOGO = re.compile(r"/apps/(\d+)/")
+
+# Descriptores de contenido de appdetails que equivalen a los tags excluidos
+CONTENT_DESCRIPTOR_TAGS = {
+    1: "Nudity",
+    3: "Sexual Content",
+    4: "Sexual Content",
+}
+
+class SteamJsonScraper(SteamScraper):
+    """
+    Scraper de Steam que usa los endpoints JSON de la tienda en lugar de su HTML.
+
+    - Búsqueda: `/search/results/?json=1`, con páginas de SEARCH_PAGE_SIZE resultados.
+    - Detalles: `/api/appdetails`, con nombre, descripción, imagen, precio, géneros,
+      categorías y descriptores de contenido ya estructurados.
+
+    Reutiliza el bucle de scraping masivo y los filtros de `SteamScraper`; no hay
+    parseo de HTML ni caché HTML.
+    """
+
+    def _search_params(self, term: str, page: int) -> Dict[str, Any]:
+        return {
+            "term": term,
+            "category1": 998,  # Código para juegos
+            "start": (page - 1) * SEARCH_PAGE_SIZE,
+            "count": SEARCH_PAGE_SIZE,
+            "json": 1,
+            "ignore_preferences": 1,
+        }
+
+    async def _fetch_json(
+        self, client: httpx.AsyncClient, scheduler: HostScheduler, url: str, params: Dict[str, Any]
+    ) -> Optional[Any]:
+        """Descarga un documento JSON respetando el planificador del host; devuelve None si falla"""
+        async with scheduler.slot(url):
+            response = await client.get(url, params=params)
+        if response.status_code != 200:
+            logger.error(f"Error al obtener {url}: Código {response.status_code}")
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            logger.error(f"Respuesta no es JSON: {response.headers.get('Content-Type')}")
+            return None
+
+    async def _fetch_browse_page_async(
+        self, client: httpx.AsyncClient, scheduler: HostScheduler, tag: str, page: int
+    ) -> List[Dict[str, Any]]:
+        try:
+            data = await self._fetch_json(client, scheduler, f"{self.base_url}/search/results/", self._search_params(tag, page))
+            return parse_search_results(data)
+        except Exception as e:
+            logger.error(f"Error scrapeando la página {page} del tag {tag}: {str(e)}")
+            return []
+
+    async def _fetch_game_details_async(
+        self, client: httpx.AsyncClient, scheduler: HostScheduler, app_id: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            data = await self._fetch_json(
+                client, scheduler, f"{self.base_url}/api/appdetails", {"appids": app_id, "l": "english"}
+            )
+            entry = (data or {}).get(str(app_id))
+            if not entry or not entry.get("success"):
+                raise SteamFetchError(f"appdetails no devolvió datos para el juego {app_id}")
+            return self.build_game_details(appdetails_to_fields(entry["data"]), app_id)
+        except Exception as e:
+            logger.error(f"Error obteniendo detalles del juego {app_id}: {str(e)}")
+            raise
+
+def parse_search_results(data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convierte una página de la búsqueda JSON al formato de `parse_browse_page` (sin precio)"""
+    games = []
+    for item in (data or {}).get("items") or []:
+        match = _APP_ID_IN_LOGO.search(item.get("logo") or "")
+        if not match:
+            continue  # Packs y suscripciones no tienen página de aplicación
+        app_id = match.group(1)
+        games.append({
+            "app_id": app_id,
+            "nombre": item.get("name") or "Unknown",
+            "url": f"https://store.steampowered.com/app/{app_id}/",
+            "precio_texto": "",
+        })
+    return games
+
+def appdetails_to_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte el `data` de appdetails a los campos que espera `SteamScraper.build_game_details`"""
+    tags = [g["description"] for g in data.get("genres") or [] if g.get("description")]
+    tags += [c["description"] for c in data.get("categories") or [] if c.get("description")]
+    for descriptor in (data.get("content_descriptors") or {}).get("ids") or []:
+        tag = CONTENT_DESCRIPTOR_TAGS.get(descriptor)
+        if tag and tag not in tags:
+            tags.append(tag)
+
+    price = data.get("price_overview") or {}
+    if data.get("is_free") or not price:
+        price_text = "Free"
+    else:
+        # `final` viene en céntimos; el texto formateado depende de la región
+        price_text = f"{price.get('final', 0) / 100:.2f}"
+
+    return {
+        "nombre": data.get("name") or "Unknown",
+        "tags": tags,
+        "descripcion": data.get("short_description") or "",
+        "imagen": data.get("header_image") or "",
+        "precio_texto": price_text,
+    }
+
+def fixture_transport(fixtures_dir: str) -> httpx.MockTransport:
+    """
+    Transporte HTTP que sirve la búsqueda JSON y appdetails desde ficheros locales,
+    para ejecutar el scraper sin red.
+
+    - `search_<término>_<start>.json`: página de búsqueda (espacios del término como `_`)
+    - `appdetails_<app_id>.json`: respuesta de appdetails
+
+    Las páginas o juegos sin fichero se responden como vacíos o inexistentes.
+    """
+    root = Path(fixtures_dir)
+
+    def load(name: str) -> Optional[Any]:
+        path = root / name
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        if request.url.path.startswith("/search/results"):
+            term = params.get("term", "").replace(" ", "_")
+            data = load(f"search_{term}_{params.get('start', '0')}.json")
+            return httpx.Response(200, json=data or {"items": []})
+        if request.url.path.startswith("/api/appdetails"):
+            # Como la API real, admite varios IDs cuando solo se piden precios
+            data = {}
+            for app_id in params.get("appids", "").split(","):
+                data.update(load(f"appdetails_{app_id}.json") or {app_id: {"success": False}})
+            if params.get("filters") == "price_overview":
+                for entry in data.values():
+                    if entry.get("success"):
+                        price = entry["data"].get("price_overview")
+                        entry["data"] = {"price_overview": price} if price else []
+            return httpx.Response(200, json=data)
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
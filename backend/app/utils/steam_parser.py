@@ -0,0 +1,97 @@
+"""
+Extracción de datos de las páginas HTML de la tienda de Steam con XPath sobre lxml.
+
+Sustituye a BeautifulSoup: lxml construye el árbol en C sin crear un objeto Python
+por nodo, y las expresiones XPath se compilan una sola vez. Las funciones son de
+nivel de módulo y reciben y devuelven tipos simples para poder ejecutarse en un
+pool de procesos.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+import threading
+from lxml import etree, html as lxml_html
+from ..config import settings
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_BROWSE_ROWS = etree.XPath("//*[@id='search_resultsRows']/a")
+_BROWSE_TITLE = etree.XPath(f"(.//*[{_has_class('title')}])[1]")
+_BROWSE_PRICE = etree.XPath(f"(.//*[{_has_class('search_price')}])[1]")
+
+_APP_NAME = etree.XPath(f"(//*[{_has_class('apphub_AppName')}])[1]")
+_APP_TAGS = etree.XPath(f"//*[{_has_class('app_tag')}]")
+_APP_DESCRIPTION = etree.XPath(f"(//*[{_has_class('game_description_snippet')}])[1]")
+_APP_IMAGE_FULL = etree.XPath(f"(//*[{_has_class('game_header_image_full')}])[1]/@src")
+_APP_IMAGE = etree.XPath(f"(//*[{_has_class('game_header_image')}])[1]/@src")
+_APP_PRICE = etree.XPath(
+    f"(//*[{_has_class('game_purchase_price')} or {_has_class('discount_final_price')}])[1]"
+)
+
+def _text(elements: List[Any]) -> Optional[str]:
+    return elements[0].text_content().strip() if elements else None
+
+_HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+def _parse(html: str):
+    # lxml no acepta str con declaración de codificación; se le pasan bytes en UTF-8
+    return lxml_html.fromstring(html.encode("utf-8"), parser=_HTML_PARSER) if html and html.strip() else None
+
+def parse_browse_html(html: str) -> List[Dict[str, Any]]:
+    """
+    Extrae los juegos de una página de búsqueda de Steam.
+    
+    Returns:
+        Lista de diccionarios con `app_id`, `nombre`, `url` y `precio_texto`
+    """
+    root = _parse(html)
+    if root is None:
+        return []
+    games = []
+    for row in _BROWSE_ROWS(root):
+        app_id = row.get("data-ds-appid")
+        if not app_id:
+            continue
+        games.append({
+            "app_id": app_id,
+            "nombre": _text(_BROWSE_TITLE(row)) or "Unknown",
+            "url": row.get("href", ""),
+            "precio_texto": _text(_BROWSE_PRICE(row)) or "",
+        })
+    return games
+
+def extract_game_fields(html: str) -> Dict[str, Any]:
+    """
+    Extrae de la página de un juego solo los campos que usamos, sin aplicar filtros.
+    
+    Returns:
+        Diccionario con `nombre`, `tags`, `descripcion`, `imagen` y `precio_texto`
+    """
+    root = _parse(html)
+    if root is None:
+        return {"nombre": "Unknown", "tags": [], "descripcion": "", "imagen": "", "precio_texto": "Free"}
+    image = _APP_IMAGE_FULL(root) or _APP_IMAGE(root)
+    return {
+        "nombre": _text(_APP_NAME(root)) or "Unknown",
+        "tags": [tag.text_content().strip() for tag in _APP_TAGS(root)],
+        "descripcion": _text(_APP_DESCRIPTION(root)) or "",
+        "imagen": image[0] if image else "",
+        "precio_texto": _text(_APP_PRICE(root)) or "Free",
+    }
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def parser_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Pool de procesos para el parseo, creado en el primer uso.
+    
+    Devuelve None si `STEAM_PARSER_WORKERS` es 0, en cuyo caso se parsea en el propio proceso.
+    """
+    global _pool
+    if settings.STEAM_PARSER_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.STEAM_PARSER_WORKERS)
+        return _pool
@@ -0,0 +1,150 @@
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import httpx
+from .. import models
+from ..config import settings
+from .host_scheduler import HostScheduler
+from .moderation import visible_filter
+from .steam_scraper import steam_scraper
+
+logger = logging.getLogger(__name__)
+
+Juego = models.JuegosScrapeadoDeSteamParaRecomendaiones
+Usuario = models.Usuario
+
+def parse_price_overview(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Precio y descuento de una entrada de appdetails con `filters=price_overview`.
+
+    Returns:
+        {"precio", "descuento"} (los juegos gratuitos devuelven `data: []`) o None si
+        el juego ya no está disponible en la tienda
+    """
+    if not entry or not entry.get("success"):
+        return None
+    data = entry.get("data")
+    price = data.get("price_overview") if isinstance(data, dict) else None
+    if not price:
+        return {"precio": 0.0, "descuento": 0}
+    return {"precio": round(price.get("final", 0) / 100, 2), "descuento": int(price.get("discount_percent") or 0)}
+
+class SteamPriceRefresher:
+    """
+    Refresco incremental de precios de los juegos de Steam guardados.
+
+    Solo consulta `price_overview` de appdetails, que admite muchos IDs por petición,
+    en lugar de volver a scrapear la página de cada juego. Se priorizan los juegos que
+    son candidatos para más usuarios (los que caben en su `precio_max`) y, a igualdad,
+    los que llevan más tiempo sin comprobarse.
+    """
+
+    def select_games(self, db: Session, max_games: int) -> List[Any]:
+        """Juegos a comprobar en esta ejecución, por orden de prioridad"""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.STEAM_PRICE_REFRESH_MIN_AGE_HOURS)
+        candidate_users = (
+            db.query(func.count(Usuario.id))
+            .filter(or_(Usuario.precio_max.is_(None), Usuario.precio_max >= Juego.precio))
+            .correlate(Juego)
+            .scalar_subquery()
+        )
+        return (
+            db.query(Juego.id, Juego.steam_app_id, Juego.precio, Juego.descuento)
+            .filter(Juego.steam_app_id.isnot(None), visible_filter(Juego))
+            .filter(or_(Juego.precio_actualizado_en.is_(None), Juego.precio_actualizado_en < cutoff))
+            .order_by(candidate_users.desc(), Juego.precio_actualizado_en.asc().nullsfirst())
+            .limit(max_games)
+            .all()
+        )
+
+    async def fetch_prices(self, app_ids: List[int], batch_size: int) -> Dict[int, Optional[Dict[str, Any]]]:
+        """Consulta los precios en lotes de `batch_size` IDs, respetando los límites de Steam"""
+        scheduler = HostScheduler(settings.STEAM_MAX_CONCURRENCY_PER_HOST, settings.STEAM_MIN_REQUEST_INTERVAL)
+        url = f"{steam_scraper.base_url}/api/appdetails"
+
+        async def fetch_batch(client: httpx.AsyncClient, batch: List[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+            params = {"appids": ",".join(str(app_id) for app_id in batch), "filters": "price_overview", "cc": settings.STEAM_PRICE_COUNTRY}
+            try:
+                async with scheduler.slot(url):
+                    response = await client.get(url, params=params)
+                response.raise_for_status()
+                data = response.json() or {}
+            except Exception as e:
+                logger.error(f"Error consultando precios de {len(batch)} juegos: {str(e)}")
+                return {}
+            return {app_id: parse_price_overview(data.get(str(app_id))) for app_id in batch}
+
+        async with httpx.AsyncClient(
+            timeout=settings.STEAM_REQUEST_TIMEOUT_SECONDS, transport=steam_scraper.transport
+        ) as client:
+            results = await asyncio.gather(*(
+                fetch_batch(client, app_ids[i:i+batch_size]) for i in range(0, len(app_ids), batch_size)
+            ))
+        prices = {}
+        for result in results:
+            prices.update(result)
+        return prices
+
+    def refresh(self, db: Session, max_games: Optional[int] = None, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Comprueba el precio de los juegos más prioritarios y guarda los cambios.
+
+        Cada lote se escribe con un UPDATE agrupado por clave primaria que solo toca
+        `precio`, `descuento` y `precio_actualizado_en`.
+
+        Returns:
+            Diccionario con estadísticas del refresco
+        """
+        max_games = max_games or settings.STEAM_PRICE_REFRESH_MAX_GAMES
+        batch_size = batch_size or settings.STEAM_PRICE_REFRESH_BATCH_SIZE
+        games = self.select_games(db, max_games)
+        stats = {"comprobados": 0, "cambiados": 0, "no_disponibles": 0, "errores": 0}
+        if not games:
+            return stats
+
+        prices = asyncio.run(self.fetch_prices([g.steam_app_id for g in games], batch_size))
+        now = datetime.utcnow()
+        updates = []
+        for game in games:
+            if game.steam_app_id not in prices:
+                stats["errores"] += 1
+                continue
+            stats["comprobados"] += 1
+            price = prices[game.steam_app_id]
+            if price is None:
+                # Retirado de la tienda: se conserva el último precio y se pospone la comprobación
+                stats["no_disponibles"] += 1
+                updates.append({"id": game.id, "precio_actualizado_en": now})
+                continue
+            if price["precio"] != game.precio or price["descuento"] != (game.descuento or 0):
+                stats["cambiados"] += 1
+            updates.append({"id": game.id, **price, "precio_actualizado_en": now})
+
+        # Filas agrupadas por columnas escritas: el UPDATE masivo exige el mismo conjunto en cada lote
+        for columns in ({"id", "precio_actualizado_en"}, {"id", "precio", "descuento", "precio_actualizado_en"}):
+            rows = [row for row in updates if set(row) == columns]
+            for i in range(0, len(rows), batch_size):
+                db.execute(update(Juego), rows[i:i+batch_size])
+                db.commit()
+
+        logger.info(
+            f"Precios de Steam refrescados: {stats['comprobados']} comprobados, {stats['cambiados']} cambiados, "
+            f"{stats['no_disponibles']} no disponibles, {stats['errores']} con error"
+        )
+        return stats
+
+# Instancia global
+steam_price_refresher = SteamPriceRefresher()
+
+if __name__ == "__main__":
+    # Permite programar el refresco desde cron: python -m app.utils.steam_prices
+    from ..database import SessionLocal
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        print(steam_price_refresher.refresh(db))
+    finally:
+        db.close()
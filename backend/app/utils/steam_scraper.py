@@ -1,329 +1,441 @@
-import requests
-from bs4 import BeautifulSoup
+import httpx
+import asyncio
 import logging
-import time
-import random
-from typing import List, Dict, Any, Optional
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Set, Tuple
 import re
+from ..config import settings
+from .host_scheduler import HostScheduler
+from .html_cache import HtmlCache
+from .scrape_pipeline import ScrapePipeline, parse_app_id, parse_stage_metrics
+from .steam_parser import extract_game_fields, parse_browse_html, parser_pool
 
 logger = logging.getLogger(__name__)
 
+class SteamFetchError(Exception):
+    """Se lanza cuando no se ha podido obtener la página de un juego (a diferencia de un juego descartado)"""
+
+# Valor devuelto por `_fetch_parsed` cuando no hay página que parsear
+_NOT_FETCHED = object()
+
+
 class SteamScraper:
     """Clase para scrapear juegos indies de Steam directamente de la página web"""
     
+    # Versión de `parse_browse_page`/`parse_game_details`; al cambiarla se invalidan
+    # los resultados parseados guardados en la caché HTML (el HTML se reaprovecha)
+    PARSER_VERSION = "1"
+    
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept-Language": "en-US,en;q=0.9",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
             "Referer": "https://store.steampowered.com/",
             "Connection": "keep-alive"
-        })
+        }
+        # Cookies básicas que Steam suele esperar
+        self.cookies = {
+            'birthtime': '786240001',  # Fecha de nacimiento para contenido maduro
+            'mature_content': '1',      # Aceptar contenido maduro
+            'lastagecheckage': '1-1-1995', # Fecha verificación edad
+        }
         # Configurar la base de URLs más actualizada
         self.base_url = "https://store.steampowered.com"
         # Tags a incluir (siempre debe tener Indie)
         self.include_tags = ["Indie"]
         # Tags a excluir
         self.exclude_tags = ["Sexual Content", "Nudity", "NSFW", "Adult", "Mature"]
-        
-        # Inicializar cookie para simular una sesión normal de navegador
-        self._init_session()
+        # Términos de búsqueda para el scraping masivo
+        self.search_terms = ["indie", "indie game", "indie roguelike", "indie adventure", "indie rpg", "indie platformer"]
+        # Caché en disco del HTML descargado (ver STEAM_HTML_CACHE_MODE)
+        self.html_cache_mode = settings.STEAM_HTML_CACHE_MODE
+        self.html_cache = HtmlCache(
+            settings.STEAM_HTML_CACHE_DIR, max_bytes=settings.STEAM_HTML_CACHE_MAX_MB * 1024 * 1024
+        ) if self.html_cache_mode != "off" else None
+        # Límites de cortesía con Steam; un scraping repartido en varios procesos los divide entre ellos
+        self.max_concurrency = settings.STEAM_MAX_CONCURRENCY_PER_HOST
+        self.min_interval = settings.STEAM_MIN_REQUEST_INTERVAL
+        # Transporte HTTP del cliente asíncrono (None = red real; permite sustituirlo por fixtures)
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
     
-    def _init_session(self):
-        """Inicializa la sesión con cookies necesarias para navegar por Steam"""
-        try:
-            # Visitar la página principal para obtener cookies
-            self.session.get(self.base_url)
-            
-            # Configurar cookies básicas que Steam suele esperar
-            self.session.cookies.update({
-                'birthtime': '786240001',  # Fecha de nacimiento para contenido maduro
-                'mature_content': '1',      # Aceptar contenido maduro
-                'lastagecheckage': '1-1-1995', # Fecha verificación edad
-            })
-            
-            logger.info("Sesión inicializada con cookies básicas")
-            
-        except Exception as e:
-            logger.error(f"Error inicializando la sesión: {str(e)}")
+    def _browse_params(self, tag: str, page: int) -> Dict[str, Any]:
+        return {
+            "term": tag,
+            "category1": 998,  # Código para juegos
+            "page": page,
+            "ignore_preferences": 1
+        }
     
-    def get_games_from_browse_page(self, tag="indie", page=1) -> List[Dict[str, Any]]:
+    def parse_browse_page(self, html: str, tag: str = "indie", page: int = 1) -> List[Dict[str, Any]]:
         """
-        Obtiene lista de juegos desde la página de navegación de Steam
+        Extrae la lista de juegos del HTML de una página de búsqueda de Steam
         
         Args:
-            tag: Tag principal a buscar (por defecto: indie)
-            page: Número de página a scrapear
-            
+            html: HTML de la página de búsqueda
+            tag: Término buscado (solo para los logs)
+            page: Número de página (solo para los logs)
+        
         Returns:
             Lista de diccionarios con información básica de juegos
         """
-        games_list = []
+        games_list = parse_browse_html(html)
         
-        try:
-            # Construcción de URL actualizada según la estructura actual de Steam
-            url = f"{self.base_url}/search/"
-            
-            params = {
-                "term": tag,
-                "category1": 998,  # Código para juegos
-                "page": page,
-                "ignore_preferences": 1
-            }
-            
-            # Añadir retraso aleatorio para parecer tráfico humano
-            time.sleep(random.uniform(2.0, 4.0))
-            
-            logger.info(f"Consultando: {url} con params: {params}")
-            
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            # Verificar si recibimos contenido HTML válido
-            if "text/html" not in response.headers.get("Content-Type", ""):
-                logger.error(f"Respuesta no es HTML: {response.headers.get('Content-Type')}")
-                return []
-            
-            # Parsear HTML
-            soup = BeautifulSoup(response.text, "lxml")
-            
-            # Buscar todos los contenedores de juegos en la estructura actual
-            game_containers = soup.select("#search_resultsRows > a")
-            
-            if not game_containers:
-                logger.warning(f"No se encontraron juegos en la página {page} con el tag {tag}")
-                logger.warning(f"Selector '#search_resultsRows > a' no encontró resultados")
-                return []
-            
-            logger.info(f"Encontrados {len(game_containers)} contenedores de juegos")
-            
-            for container in game_containers:
-                try:
-                    # Extraer ID del juego de la URL
-                    app_id = container.get("data-ds-appid")
-                    if not app_id:
-                        continue
-                    
-                    # Extraer nombre del juego
-                    title_elem = container.select_one(".title")
-                    title = title_elem.text.strip() if title_elem else "Unknown"
-                    
-                    # Extraer precio
-                    price_elem = container.select_one(".search_price")
-                    price_text = price_elem.text.strip() if price_elem else ""
-                    
-                    # Verificar si tiene tags indie (los extraeremos en detalle después)
-                    games_list.append({
-                        "app_id": app_id,
-                        "nombre": title,
-                        "url": container.get("href", ""),
-                        "precio_texto": price_text
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error procesando un juego en la lista: {str(e)}")
-            
-            logger.info(f"Extraídos {len(games_list)} juegos de la página {page} con el tag {tag}")
-            return games_list
-            
-        except Exception as e:
-            logger.error(f"Error scrapeando la página {page} del tag {tag}: {str(e)}")
+        if not games_list:
+            logger.warning(f"No se encontraron juegos en la página {page} con el tag {tag}")
             return []
+        
+        logger.info(f"Extraídos {len(games_list)} juegos de la página {page} con el tag {tag}")
+        return games_list
     
-    def get_game_details(self, app_id: str) -> Optional[Dict[str, Any]]:
+    def parse_game_details(self, html: str, app_id: str) -> Optional[Dict[str, Any]]:
         """
-        Obtiene detalles completos de un juego scrapeando su página
+        Extrae los detalles de un juego del HTML de su página y aplica los filtros de tags
         
         Args:
+            html: HTML de la página del juego
             app_id: ID del juego en Steam
-            
+        
         Returns:
-            Diccionario con detalles del juego o None si hay error
+            Diccionario con detalles del juego o None si no es indie o tiene contenido excluido
         """
-        try:
-            # Retraso para evitar bloqueos
-            time.sleep(random.uniform(2.0, 4.0))
-            
-            url = f"{self.base_url}/app/{app_id}/"
-            
-            logger.info(f"Consultando detalles del juego ID: {app_id} en {url}")
-            
-            response = self.session.get(url)
-            if response.status_code != 200:
-                logger.error(f"Error al obtener página del juego {app_id}: Código {response.status_code}")
-                return None
-            
-            soup = BeautifulSoup(response.text, "lxml")
-            
-            # Extraer nombre del juego
-            title_elem = soup.select_one(".apphub_AppName")
-            title = title_elem.text.strip() if title_elem else "Unknown"
-            
-            # Obtener todos los tags/categorías
-            tags = []
-            tag_elements = soup.select(".app_tag")
-            
-            if not tag_elements:
-                logger.warning(f"No se encontraron tags para el juego {title} (ID: {app_id})")
-            
-            for tag_elem in tag_elements:
-                tag_text = tag_elem.text.strip()
-                tags.append(tag_text)
-            
-            logger.info(f"Tags encontrados para {title}: {tags}")
-            
-            # Verificar si tiene los tags requeridos (debe ser Indie)
-            has_required_tags = any(include_tag.lower() in [t.lower() for t in tags] for include_tag in self.include_tags)
-            
-            if not has_required_tags:
-                logger.info(f"El juego {title} (ID: {app_id}) no es indie, se omite")
-                return None
-            
-            # Verificar si tiene tags excluidos
-            has_excluded_tags = any(any(exclude_tag.lower() in t.lower() for exclude_tag in self.exclude_tags) for t in tags)
-            
-            if has_excluded_tags:
-                logger.info(f"El juego {title} (ID: {app_id}) tiene contenido excluido, se omite")
-                return None
-            
-            # Extraer descripción
-            desc_elem = soup.select_one(".game_description_snippet")
-            description = desc_elem.text.strip() if desc_elem else ""
-            
-            # Extraer imagen principal
-            img_elem = soup.select_one(".game_header_image_full") or soup.select_one(".game_header_image")
-            image_url = img_elem.get("src") if img_elem else ""
-            
-            # Extraer precio
-            price_elem = soup.select_one(".game_purchase_price") or soup.select_one(".discount_final_price")
-            price_text = price_elem.text.strip() if price_elem else "Free"
-            
-            # Convertir precio a número
-            price = 0.0
-            if price_text != "Free":
-                # Eliminar símbolos de moneda y convertir a float
-                price_match = re.search(r'(\d+[.,]?\d*)', price_text)
-                if price_match:
-                    price = float(price_match.group(1).replace(',', '.'))
-            
-            # Generar géneros (usamos los tags como géneros)
-            genres = [tag for tag in tags if tag not in self.exclude_tags][:5]  # Limitar a 5 géneros
-            
-            # Asegurar que los tipos de datos sean correctos para la base de datos
-            result = {
-                "nombre": str(title)[:255],  # Limitar longitud para la base de datos
-                "generos": [str(g)[:50] for g in genres][:10],  # Limitar cantidad y longitud
-                "precio": float(price),
-                "descripcion": str(description)[:1000],  # Limitar longitud
-                "tags": [str(t)[:50] for t in tags][:20],  # Limitar cantidad y longitud
-                "imagen_principal": str(image_url)[:500]  # Limitar longitud
-            }
-            
-            logger.info(f"Obtenidos detalles completos para el juego '{title}' (ID: {app_id})")
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error obteniendo detalles del juego {app_id}: {str(e)}")
-            return None
+        return self.build_game_details(extract_game_fields(html), app_id)
     
-    def scrape_bulk_indie_games(self, min_new_games: int = 100, existing_names=None) -> Dict[str, Any]:
+    def build_game_details(self, fields: Dict[str, Any], app_id: str) -> Optional[Dict[str, Any]]:
         """
-        Scrapea juegos indies de Steam de forma masiva asegurando un mínimo de juegos nuevos
+        Aplica los filtros de tags a los campos extraídos de la página de un juego
+        y los normaliza para la base de datos
         
         Args:
-            min_new_games: Número mínimo de juegos NUEVOS a añadir (por defecto: 100)
-            existing_names: Lista de nombres de juegos que ya existen en la base de datos
-            
+            fields: Resultado de `extract_game_fields`
+            app_id: ID del juego en Steam
+        
         Returns:
-            Diccionario con resultados del scraping
+            Diccionario con detalles del juego o None si no es indie o tiene contenido excluido
         """
-        results = {
-            "total_consultados": 0,
-            "juegos_validos": 0,
-            "juegos_duplicados": 0,
-            "juegos_excluidos": 0,
-            "errores": 0
+        title = fields["nombre"]
+        tags = fields["tags"]
+        
+        if not tags:
+            logger.warning(f"No se encontraron tags para el juego {title} (ID: {app_id})")
+        
+        logger.info(f"Tags encontrados para {title}: {tags}")
+        
+        # Verificar si tiene los tags requeridos (debe ser Indie)
+        has_required_tags = any(include_tag.lower() in [t.lower() for t in tags] for include_tag in self.include_tags)
+        
+        if not has_required_tags:
+            logger.info(f"El juego {title} (ID: {app_id}) no es indie, se omite")
+            return None
+        
+        # Verificar si tiene tags excluidos
+        has_excluded_tags = any(any(exclude_tag.lower() in t.lower() for exclude_tag in self.exclude_tags) for t in tags)
+        
+        if has_excluded_tags:
+            logger.info(f"El juego {title} (ID: {app_id}) tiene contenido excluido, se omite")
+            return None
+        
+        description = fields["descripcion"]
+        image_url = fields["imagen"]
+        price_text = fields["precio_texto"]
+        
+        # Convertir precio a número
+        price = 0.0
+        if price_text != "Free":
+            # Eliminar símbolos de moneda y convertir a float
+            price_match = re.search(r'(\d+[.,]?\d*)', price_text)
+            if price_match:
+                price = float(price_match.group(1).replace(',', '.'))
+        
+        # Generar géneros (usamos los tags como géneros)
+        genres = [tag for tag in tags if tag not in self.exclude_tags][:5]  # Limitar a 5 géneros
+        
+        # Asegurar que los tipos de datos sean correctos para la base de datos
+        result = {
+            "nombre": str(title)[:255],  # Limitar longitud para la base de datos
+            "generos": [str(g)[:50] for g in genres][:10],  # Limitar cantidad y longitud
+            "precio": float(price),
+            "descripcion": str(description)[:1000],  # Limitar longitud
+            "tags": [str(t)[:50] for t in tags][:20],  # Limitar cantidad y longitud
+            "imagen_principal": str(image_url)[:500],  # Limitar longitud
+            "steam_app_id": parse_app_id(app_id)
         }
         
-        # Si no se proporciona lista de nombres existentes, inicializar como vacía
-        if existing_names is None:
-            existing_names = []
+        logger.info(f"Obtenidos detalles completos para el juego '{title}' (ID: {app_id})")
+        return result
+    
+    async def _fetch_html(
+        self,
+        client: httpx.AsyncClient,
+        scheduler: HostScheduler,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Optional[httpx.Response]:
+        """Descarga una página respetando el planificador del host; devuelve None si no es HTML válido ni un 304"""
+        async with scheduler.slot(url):
+            response = await client.get(url, params=params, headers=headers)
+        if response.status_code == 304:
+            return response
+        if response.status_code != 200:
+            logger.error(f"Error al obtener {url}: Código {response.status_code}")
+            return None
+        if "text/html" not in response.headers.get("Content-Type", ""):
+            logger.error(f"Respuesta no es HTML: {response.headers.get('Content-Type')}")
+            return None
+        return response
+    
+    async def _fetch_parsed(
+        self,
+        client: httpx.AsyncClient,
+        scheduler: HostScheduler,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        parse: Callable[[str], Awaitable[Any]],
+        empty: Any = None,
+    ) -> Any:
+        """
+        Descarga y parsea una página pasando por la caché HTML en disco.
         
-        # Search terms para buscar juegos indies
-        search_terms = ["indie", "indie game", "indie roguelike", "indie adventure", "indie rpg", "indie platformer"]
-        valid_games = []
+        - "off": siempre se descarga y se parsea.
+        - "on": se revalida con `If-None-Match`/`If-Modified-Since`; con un 304 se
+          reutiliza el resultado parseado guardado si es de esta versión del parser.
+        - "replay": no se usa la red; se vuelve a parsear el HTML guardado.
+        """
+        cache = self.html_cache
+        if cache is None:
+            response = await self._fetch_html(client, scheduler, url, params)
+            return await parse(response.text) if response is not None and response.status_code == 200 else empty
+        
+        # La E/S de disco de la caché se hace en hilos para no bloquear el bucle de eventos
+        key = cache.key(url, params)
+        entry = await asyncio.to_thread(cache.get, key)
+        
+        if self.html_cache_mode == "replay":
+            html = await asyncio.to_thread(cache.read, entry) if entry else None
+            return await parse(html) if html is not None else empty
+        
+        response = await self._fetch_html(client, scheduler, url, params, cache.conditional_headers(entry))
+        if response is None:
+            return empty
+        
+        if response.status_code == 304 and entry:
+            cached = entry.get("parsed")
+            if cached and cached.get("version") == self.PARSER_VERSION:
+                return cached["data"]
+            html = await asyncio.to_thread(cache.read, entry)
+            if html is None:
+                return empty
+            parsed = await parse(html)
+            await asyncio.to_thread(cache.touch, key, entry, parsed, self.PARSER_VERSION)
+            return parsed
+        if response.status_code == 304:
+            return empty
+        
+        parsed = await parse(response.text)
+        await asyncio.to_thread(
+            cache.store, key, str(response.url), response.text, response.headers, parsed, self.PARSER_VERSION
+        )
+        return parsed
+    
+    async def _run_parser(self, func: Callable[[str], Any], html: str) -> Any:
+        """Ejecuta una función de `steam_parser` en el pool de procesos (o aquí mismo si no hay pool)"""
+        metrics = parse_stage_metrics.get()
+        started = metrics.start() if metrics else None
+        if metrics:
+            metrics.observe_queue(metrics.in_flight - 1)
+        try:
+            pool = parser_pool()
+            if pool is None:
+                return func(html)
+            return await asyncio.get_running_loop().run_in_executor(pool, func, html)
+        finally:
+            if metrics:
+                metrics.finish(started)
+    
+    async def _fetch_browse_page_async(
+        self, client: httpx.AsyncClient, scheduler: HostScheduler, tag: str, page: int
+    ) -> List[Dict[str, Any]]:
+        try:
+            return await self._fetch_parsed(
+                client, scheduler, f"{self.base_url}/search/", self._browse_params(tag, page),
+                lambda html: self._run_parser(parse_browse_html, html), empty=[],
+            )
+        except Exception as e:
+            logger.error(f"Error scrapeando la página {page} del tag {tag}: {str(e)}")
+            return []
+    
+    async def _fetch_game_details_async(
+        self, client: httpx.AsyncClient, scheduler: HostScheduler, app_id: str
+    ) -> Optional[Dict[str, Any]]:
+        async def parse(html: str) -> Optional[Dict[str, Any]]:
+            return self.build_game_details(await self._run_parser(extract_game_fields, html), app_id)
+        
+        try:
+            details = await self._fetch_parsed(
+                client, scheduler, f"{self.base_url}/app/{app_id}/", None, parse, empty=_NOT_FETCHED
+            )
+            if details is _NOT_FETCHED:
+                raise SteamFetchError(f"No se pudo obtener la página del juego {app_id}")
+            return details
+        except Exception as e:
+            logger.error(f"Error obteniendo detalles del juego {app_id}: {str(e)}")
+            raise
+    
+    async def scrape_bulk_indie_games_async(
+        self,
+        min_new_games: int = 100,
+        existing_names=None,
+        on_progress: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        start_pages: Optional[Dict[str, int]] = None,
+        on_checkpoint: Optional[Callable[[str, int, bool, List[Dict[str, Any]], List[Tuple[int, str]]], Any]] = None,
+        known_app_ids: Optional[Set[int]] = None,
+        on_claim: Optional[Callable[[List[int]], Set[int]]] = None,
+        refresh_app_ids: Optional[Set[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Versión asíncrona de `scrape_bulk_indie_games`.
+        
+        Para reanudar un scraping anterior, `start_pages` indica la página por la que
+        empezar cada término (los términos que no aparecen se omiten). Tras cada página
+        procesada se llama a `on_checkpoint(term, next_page, exhausted, new_games, rejected)`
+        con los juegos válidos encontrados en ella y los `(app_id, motivo)` descartados,
+        para que el llamador los guarde junto con el cursor. Si la página no se llega a
+        procesar entera, `next_page` sigue apuntando a ella.
+        
+        `known_app_ids` contiene los IDs de Steam guardados o descartados hace poco: sus
+        páginas de detalle no se descargan. El conjunto se amplía durante la ejecución,
+        así que un juego que aparece en varios términos se descarga una vez.
+        `refresh_app_ids` son los IDs ya guardados cuya copia ha caducado: se vuelven a
+        descargar y se entregan en `on_checkpoint` para actualizarlos, pero no cuentan
+        como juegos nuevos (contador `juegos_actualizados`, lista `refreshed`).
+        Si varios procesos scrapean a la vez, `on_claim(app_ids)` reserva los IDs y
+        devuelve los que este proceso puede descargar.
+        
+        `on_progress` recibe una copia de los contadores tras cada lote de detalles
+        (se ejecuta en un hilo aparte); si devuelve True el scraping se cancela y se
+        devuelven los juegos obtenidos hasta ese momento.
+        
+        El trabajo se reparte en etapas con colas acotadas (ver `ScrapePipeline`): listado,
+        detalles con parseo en el pool de procesos y escritura por lotes. El
+        `HostScheduler` limita las peticiones simultáneas a Steam
+        (STEAM_MAX_CONCURRENCY_PER_HOST) y la separación mínima entre ellas
+        (STEAM_MIN_REQUEST_INTERVAL), en lugar de dormir un tiempo fijo por llamada.
+        Las estadísticas incluyen en `etapas` el ritmo, la ocupación y la cola de cada etapa.
+        """
+        async def report_progress(counters: Dict[str, Any]) -> bool:
+            if on_progress is None:
+                return False
+            return bool(await asyncio.to_thread(on_progress, {**counters, **scheduler.stats()}))
+        
+        async def checkpoint(
+            term: str, next_page: int, exhausted: bool, new_games: List[Dict[str, Any]], rejected: List[Tuple[int, str]]
+        ) -> None:
+            if on_checkpoint is not None:
+                await asyncio.to_thread(on_checkpoint, term, next_page, exhausted, new_games, rejected)
+        
+        async def claim(app_ids: List[int]) -> Set[int]:
+            return await asyncio.to_thread(on_claim, app_ids)
+        
+        scheduler = HostScheduler(self.max_concurrency, self.min_interval)
         
         logger.info(f"Iniciando scraping masivo, objetivo: {min_new_games} juegos indies NUEVOS")
         
-        # Iterar por cada término de búsqueda
-        for term in search_terms:
-            page = 1
-            max_pages = 30  # Aumentar el máximo de páginas por búsqueda para tener más posibilidades de encontrar nuevos juegos
-            
-            while results["juegos_validos"] < min_new_games and page <= max_pages:
-                # Obtener lista de juegos de la página actual
-                games_list = self.get_games_from_browse_page(tag=term, page=page)
-                
-                if not games_list:
-                    logger.info(f"No hay más juegos para el término '{term}' o se alcanzó el final de resultados")
-                    break
-                
-                results["total_consultados"] += len(games_list)
-                page += 1
-                
-                # Procesar cada juego
-                for game in games_list:
-                    try:
-                        app_id = game.get("app_id")
-                        if not app_id:
-                            continue
-                        
-                        # Verificar primero si el nombre ya existe para evitar procesamiento innecesario
-                        if game.get("nombre") in existing_names:
-                            results["juegos_duplicados"] += 1
-                            continue
-                        
-                        # Obtener detalles completos
-                        game_details = self.get_game_details(app_id)
-                        
-                        if game_details:
-                            # Verificar si el nombre ya existe en la base de datos
-                            if game_details["nombre"] in existing_names:
-                                results["juegos_duplicados"] += 1
-                                continue
-                                
-                            valid_games.append(game_details)
-                            existing_names.append(game_details["nombre"])  # Añadir a la lista de nombres existentes
-                            results["juegos_validos"] += 1
-                            
-                            if results["juegos_validos"] % 10 == 0:
-                                logger.info(f"Progreso: {results['juegos_validos']}/{min_new_games} juegos nuevos encontrados")
-                            
-                            if results["juegos_validos"] >= min_new_games:
-                                logger.info(f"Alcanzado el objetivo de {min_new_games} juegos nuevos. Finalizando.")
-                                break
-                        else:
-                            results["juegos_excluidos"] += 1
-                    
-                    except Exception as e:
-                        logger.error(f"Error procesando juego: {str(e)}")
-                        results["errores"] += 1
-                
-                # Si ya tenemos suficientes juegos, salir del bucle de páginas
-                if results["juegos_validos"] >= min_new_games:
-                    break
-            
-            # Si ya tenemos suficientes juegos, salir del bucle de términos
-            if results["juegos_validos"] >= min_new_games:
-                break
-        
-        logger.info(f"Scraping completado: {results['juegos_validos']} juegos nuevos de {results['total_consultados']} consultados")
+        async with httpx.AsyncClient(
+            headers=self.headers,
+            cookies=self.cookies,
+            timeout=settings.STEAM_REQUEST_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            transport=self.transport,
+        ) as client:
+            pipeline = ScrapePipeline(
+                self,
+                client,
+                scheduler,
+                min_new_games,
+                # Si no se proporciona lista de nombres existentes, inicializar como vacía
+                existing=set(existing_names or []),
+                known=set(known_app_ids or ()),
+                refresh=set(refresh_app_ids or ()),
+                start_pages=start_pages,
+                report_progress=report_progress,
+                checkpoint=checkpoint,
+                listing_workers=settings.STEAM_PIPELINE_LISTING_WORKERS,
+                detail_workers=settings.STEAM_PIPELINE_DETAIL_WORKERS,
+                parser_workers=settings.STEAM_PARSER_WORKERS,
+                queue_size=settings.STEAM_PIPELINE_QUEUE_SIZE,
+                write_batch_pages=settings.STEAM_PIPELINE_WRITE_BATCH_PAGES,
+                # Informar del progreso (y atender cancelaciones) cada pocos juegos
+                progress_every=self.max_concurrency * 2,
+                claim=claim if on_claim is not None else None,
+            )
+            await pipeline.run()
+        
+        if pipeline.cancelled:
+            logger.info("Scraping cancelado")
+        elif pipeline.results["juegos_validos"] >= min_new_games:
+            logger.info(f"Alcanzado el objetivo de {min_new_games} juegos nuevos. Finalizando.")
+        
+        results = pipeline.results
+        valid_games = pipeline.valid_games
+        results.update(scheduler.stats())
+        results["cancelado"] = pipeline.cancelled
+        results["etapas"] = pipeline.stage_stats()
+        logger.info(
+            f"Scraping completado: {results['juegos_validos']} juegos nuevos de {results['total_consultados']} consultados "
+            f"({results['paginas_por_segundo']} páginas/s)"
+        )
         
         return {
             "results": valid_games,
+            "refreshed": pipeline.refreshed_games,
             "stats": results
         }
+    
+    def scrape_bulk_indie_games(
+        self,
+        min_new_games: int = 100,
+        existing_names=None,
+        on_progress: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        start_pages: Optional[Dict[str, int]] = None,
+        on_checkpoint: Optional[Callable[[str, int, bool, List[Dict[str, Any]], List[Tuple[int, str]]], Any]] = None,
+        known_app_ids: Optional[Set[int]] = None,
+        on_claim: Optional[Callable[[List[int]], Set[int]]] = None,
+        refresh_app_ids: Optional[Set[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Scrapea juegos indies de Steam de forma masiva asegurando un mínimo de juegos nuevos
+        
+        Ejecuta `scrape_bulk_indie_games_async` en un bucle de eventos propio, por lo que
+        debe llamarse desde un hilo sin bucle activo (p. ej. un endpoint síncrono).
+        
+        Args:
+            min_new_games: Número mínimo de juegos NUEVOS a añadir (por defecto: 100)
+            existing_names: Lista de nombres de juegos que ya existen en la base de datos
+            known_app_ids: IDs de Steam guardados o descartados hace poco, cuyos detalles no se descargan
+            refresh_app_ids: IDs de Steam guardados cuya copia ha caducado y se vuelven a descargar
+            on_claim: Reserva compartida de IDs cuando el scraping se reparte entre procesos
+            on_progress: Callback de progreso y cancelación (ver `scrape_bulk_indie_games_async`)
+            start_pages: Página inicial por término, para reanudar
+            on_checkpoint: Callback llamado tras cada página con los juegos nuevos y el cursor
+        
+        Returns:
+            Diccionario con resultados del scraping
+        """
+        return asyncio.run(self.scrape_bulk_indie_games_async(
+            min_new_games, existing_names, on_progress, start_pages, on_checkpoint, known_app_ids, on_claim,
+            refresh_app_ids,
+        ))
+
+def create_steam_scraper() -> SteamScraper:
+    """Crea el scraper del backend configurado en STEAM_SCRAPER_BACKEND (html, json o fixtures)"""
+    backend = settings.STEAM_SCRAPER_BACKEND
+    if backend in ("json", "fixtures"):
+        from .steam_json_scraper import SteamJsonScraper, fixture_transport
+        scraper = SteamJsonScraper()
+        if backend == "fixtures":
+            scraper.transport = fixture_transport(settings.STEAM_FIXTURES_DIR)
+        return scraper
+    return SteamScraper()
 
 # Instancia global
-steam_scraper = SteamScraper()
+steam_scraper = create_steam_scraper()
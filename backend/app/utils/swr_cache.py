@@ -0,0 +1,114 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class StaleWhileRevalidateCache:
+    """
+    Caché stale-while-revalidate para respuestas iguales para todos los usuarios.
+
+    Las peticiones reciben la última instantánea válida sin esperar; cuando la instantánea
+    supera su TTL blando se programa un refresco en segundo plano. Solo una clave que
+    todavía no tiene instantánea se carga dentro de la petición, una única vez aunque
+    lleguen varias peticiones a la vez (las demás esperan a esa misma carga).
+    """
+
+    def __init__(self, max_workers: int = 2, max_entries: int = 256):
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        # Carga en curso de cada clave (refresco en segundo plano o carga en frío)
+        self._inflight: Dict[Hashable, Future] = {}
+        self._warmups: Dict[Hashable, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="swr-refresh")
+
+    def get(self, key: Hashable, loader: Callable[[], Any], soft_ttl: float, default: Any = None) -> Any:
+        """
+        Devuelve la última instantánea de `key` y programa su refresco si está caducada.
+
+        Args:
+            key: Clave de la instantánea (debe incluir los parámetros de la petición)
+            loader: Función que obtiene un valor nuevo; si devuelve None se conserva el anterior
+            soft_ttl: Segundos tras los que la instantánea se refresca en segundo plano
+            default: Valor a devolver si no hay instantánea y la carga en frío no obtiene datos
+
+        Returns:
+            La instantánea almacenada (no debe modificarse) o `default`
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None:
+            value = self._load_once(key, loader)
+            return value if value is not None else default
+
+        if time.monotonic() - entry[1] >= soft_ttl:
+            self.refresh_async(key, loader)
+        return entry[0]
+
+    def _load_once(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Carga en frío de `key` en el hilo actual, o espera a la que ya esté en curso"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if owner:
+            self._load(key, loader, future)
+        return future.result()
+
+    def refresh_async(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        """Programa el refresco de `key` salvo que ya haya una carga en curso"""
+        with self._lock:
+            if key in self._inflight:
+                return
+            future = Future()
+            self._inflight[key] = future
+        self._executor.submit(self._load, key, loader, future)
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], future: Future) -> None:
+        value = None
+        try:
+            value = loader()
+            if value is None:
+                logger.warning(f"Refresco de {key} sin datos, se mantiene la instantánea anterior")
+                return
+            with self._lock:
+                if key not in self._entries and len(self._entries) >= self._max_entries:
+                    oldest = min(self._entries, key=lambda k: self._entries[k][1])
+                    del self._entries[oldest]
+                self._entries[key] = (value, time.monotonic())
+        except Exception as e:
+            logger.error(f"Error refrescando {key}: {str(e)}")
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(value)
+
+    def register_warmup(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        """Registra una instantánea que se precarga al arrancar (con SWR_WARM_UP_ON_STARTUP)"""
+        self._warmups[key] = loader
+
+    def warm_up(self) -> None:
+        """Programa en segundo plano la carga de todas las instantáneas registradas"""
+        for key, loader in self._warmups.items():
+            self.refresh_async(key, loader)
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve la antigüedad de cada instantánea, para diagnóstico"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "instantaneas": {str(key): round(now - fetched_at, 1) for key, (_, fetched_at) in self._entries.items()},
+                "refrescando": [str(key) for key in self._inflight],
+            }
+
+# Instancia global
+swr_cache = StaleWhileRevalidateCache()
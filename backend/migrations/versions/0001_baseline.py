@@ -0,0 +1,197 @@
+"""Esquema base
+
+Esquema completo de la aplicación: usuarios y favoritos, juegos de Steam (con las
+columnas de moderación, steam_app_id y precios), catálogo de RAWG, veredictos de
+moderación y las tablas del scraping masivo (trabajos, cursores, reclamaciones y
+rechazos).
+
+Las bases de datos creadas antes con `Base.metadata.create_all` no tienen tabla de
+versiones: esta migración solo crea las tablas, columnas e índices que les falten, así
+que basta con `python -m scripts.migrate` para adoptarlas.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _ensure_table(inspector, name, columns, indexes=()):
+    """
+    Crea la tabla con sus índices o, si ya existe, añade las columnas e índices que falten.
+
+    `indexes` son tuplas (nombre, columnas, opciones de `op.create_index`).
+    """
+    if inspector is None or not inspector.has_table(name):
+        op.create_table(name, *columns)
+        existing_indexes = set()
+    else:
+        existing_columns = {c["name"] for c in inspector.get_columns(name)}
+        for column in columns:
+            if isinstance(column, sa.Column) and column.name not in existing_columns:
+                op.add_column(name, column)
+        existing_indexes = {i["name"] for i in inspector.get_indexes(name)}
+    for index_name, index_columns, options in indexes:
+        if index_name not in existing_indexes:
+            op.create_index(index_name, name, index_columns, **options)
+
+
+def upgrade() -> None:
+    # Sin conexión (--sql) no se puede inspeccionar: se genera el esquema completo
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    _ensure_table(inspector, 'usuarios', [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('nick', sa.String()),
+        sa.Column('email', sa.String()),
+        sa.Column('contraseña', sa.String()),
+        sa.Column('precio_max', sa.Float()),
+    ], indexes=[
+        ('ix_usuarios_id', ['id'], {}),
+        ('ix_usuarios_nick', ['nick'], {'unique': True}),
+        ('ix_usuarios_email', ['email'], {'unique': True}),
+    ])
+
+    _ensure_table(inspector, 'juegos_steam', [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('nombre', sa.String()),
+        sa.Column('generos', postgresql.ARRAY(sa.String())),
+        sa.Column('precio', sa.Float()),
+        sa.Column('descripcion', sa.Text()),
+        sa.Column('tags', postgresql.ARRAY(sa.String())),
+        sa.Column('imagen_principal', sa.String()),
+        sa.Column('steam_app_id', sa.Integer()),
+        sa.Column('descuento', sa.Integer()),
+        sa.Column('precio_actualizado_en', sa.DateTime()),
+        sa.Column('moderation_status', sa.String()),
+        sa.Column('moderation_model', sa.String()),
+        sa.Column('moderation_version', sa.String()),
+    ], indexes=[
+        ('ix_juegos_steam_id', ['id'], {}),
+        ('ix_juegos_steam_nombre', ['nombre'], {}),
+        ('ix_juegos_steam_steam_app_id', ['steam_app_id'], {'unique': True}),
+        ('ix_juegos_steam_precio_actualizado_en', ['precio_actualizado_en'], {}),
+        ('ix_juegos_steam_moderation_status', ['moderation_status'], {}),
+    ])
+
+    _ensure_table(inspector, 'juegos_favoritos', [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('nombre', sa.String()),
+        sa.Column('imagen', sa.String()),
+        sa.Column('descripcion', sa.Text()),
+        sa.Column('generos', postgresql.ARRAY(sa.String())),
+        sa.Column('tags', postgresql.ARRAY(sa.String())),
+        sa.Column('moderation_status', sa.String()),
+        sa.Column('moderation_model', sa.String()),
+        sa.Column('moderation_version', sa.String()),
+    ], indexes=[
+        ('ix_juegos_favoritos_id', ['id'], {}),
+        ('ix_juegos_favoritos_nombre', ['nombre'], {}),
+        ('ix_juegos_favoritos_moderation_status', ['moderation_status'], {}),
+    ])
+
+    _ensure_table(inspector, 'usuario_juegos_favoritos', [
+        sa.Column('usuario_id', sa.Integer(), sa.ForeignKey('usuarios.id')),
+        sa.Column('juego_favorito_id', sa.Integer(), sa.ForeignKey('juegos_favoritos.id')),
+    ])
+
+    _ensure_table(inspector, 'catalogo_rawg', [
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('nombre', sa.String()),
+        sa.Column('slug', sa.String()),
+        sa.Column('generos', sa.JSON()),
+        sa.Column('genero_ids', postgresql.ARRAY(sa.Integer())),
+        sa.Column('plataformas', sa.JSON()),
+        sa.Column('plataforma_ids', postgresql.ARRAY(sa.Integer())),
+        sa.Column('rating', sa.Float()),
+        sa.Column('lanzamiento', sa.Date()),
+        sa.Column('imagen_fondo', sa.String()),
+        sa.Column('actualizado_rawg', sa.DateTime()),
+        sa.Column('sincronizado_en', sa.DateTime()),
+    ], indexes=[
+        ('ix_catalogo_rawg_id', ['id'], {}),
+        ('ix_catalogo_rawg_nombre', ['nombre'], {}),
+        ('ix_catalogo_rawg_slug', ['slug'], {}),
+        ('ix_catalogo_rawg_rating', ['rating'], {}),
+        ('ix_catalogo_rawg_lanzamiento', ['lanzamiento'], {}),
+        ('ix_catalogo_rawg_actualizado_rawg', ['actualizado_rawg'], {}),
+        ('ix_catalogo_rawg_genero_ids', ['genero_ids'], {'postgresql_using': 'gin'}),
+        ('ix_catalogo_rawg_plataforma_ids', ['plataforma_ids'], {'postgresql_using': 'gin'}),
+    ])
+
+    _ensure_table(inspector, 'veredictos_moderacion', [
+        sa.Column('rawg_id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('hash_contenido', sa.String(64), primary_key=True),
+        sa.Column('es_sexual', sa.Boolean(), nullable=False),
+        sa.Column('modelo', sa.String()),
+        sa.Column('creado_en', sa.DateTime()),
+    ])
+
+    # Las columnas NOT NULL llevan valor por defecto en el servidor para poder añadirlas
+    # a tablas que ya tienen filas
+    _ensure_table(inspector, 'trabajos_scraping', [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('estado', sa.String(), nullable=False, server_default='queued'),
+        sa.Column('min_juegos_nuevos', sa.Integer(), nullable=False),
+        sa.Column('trabajadores', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('contadores', sa.JSON()),
+        sa.Column('mensaje', sa.Text()),
+        sa.Column('cancelar', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('creado_en', sa.DateTime()),
+        sa.Column('iniciado_en', sa.DateTime()),
+        sa.Column('actualizado_en', sa.DateTime()),
+        sa.Column('finalizado_en', sa.DateTime()),
+    ], indexes=[
+        ('ix_trabajos_scraping_id', ['id'], {}),
+        ('ix_trabajos_scraping_estado', ['estado'], {}),
+    ])
+
+    _ensure_table(inspector, 'cursores_scraping', [
+        sa.Column('termino', sa.String(), primary_key=True),
+        sa.Column('pagina', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('agotado', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('actualizado_en', sa.DateTime()),
+        sa.Column('reclamado_por', sa.String()),
+    ])
+
+    _ensure_table(inspector, 'reclamaciones_steam', [
+        sa.Column('trabajo_id', sa.Integer(), sa.ForeignKey('trabajos_scraping.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('steam_app_id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('reclamado_en', sa.DateTime()),
+    ])
+
+    _ensure_table(inspector, 'rechazos_steam', [
+        sa.Column('steam_app_id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('motivo', sa.String()),
+        sa.Column('rechazado_en', sa.DateTime()),
+    ], indexes=[
+        ('ix_rechazos_steam_rechazado_en', ['rechazado_en'], {}),
+    ])
+
+
+def downgrade() -> None:
+    for table in (
+        'rechazos_steam',
+        'reclamaciones_steam',
+        'cursores_scraping',
+        'trabajos_scraping',
+        'veredictos_moderacion',
+        'catalogo_rawg',
+        'usuario_juegos_favoritos',
+        'juegos_favoritos',
+        'juegos_steam',
+        'usuarios',
+    ):
+        op.drop_table(table)
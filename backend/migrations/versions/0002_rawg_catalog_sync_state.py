@@ -0,0 +1,38 @@
+"""Progreso de la sincronización del catálogo de RAWG
+
+La réplica solo responde cuando se ha recorrido el catálogo entero; hasta entonces las
+rutas consultan RAWG en vivo. Las réplicas existentes empiezan sin marcar como
+completas, así que la siguiente sincronización vuelve a recorrerlas desde la página 1.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sincronizacion_catalogo_rawg',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('pagina', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('marca', sa.DateTime()),
+        sa.Column('marca_en_curso', sa.DateTime()),
+        sa.Column('completo', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('actualizado_en', sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sincronizacion_catalogo_rawg')
@@ -0,0 +1,42 @@
+"""Un único trabajo de scraping activo
+
+Índice único parcial sobre los trabajos en cola o en curso: la base de datos rechaza un
+segundo trabajo activo aunque lo creen a la vez dos procesos de la API. Antes de crearlo,
+los trabajos activos que no sean el más reciente se marcan como fallidos.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE trabajos_scraping SET estado = 'failed', finalizado_en = now() AT TIME ZONE 'utc', "
+        "mensaje = 'Descartado: había otro trabajo activo' "
+        "WHERE estado IN ('queued', 'running') AND id <> "
+        "(SELECT max(id) FROM trabajos_scraping WHERE estado IN ('queued', 'running'))"
+    )
+    op.create_index(
+        'ux_trabajos_scraping_activo',
+        'trabajos_scraping',
+        [sa.text("(estado IN ('queued', 'running'))")],
+        unique=True,
+        postgresql_where=sa.text("estado IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_trabajos_scraping_activo', table_name='trabajos_scraping')
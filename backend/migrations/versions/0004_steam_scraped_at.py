@@ -0,0 +1,32 @@
+"""Fecha de scraping de los juegos de Steam
+
+`juegos_steam.scrapeado_en` guarda la última descarga completa de cada juego. El scraper
+vuelve a descargar y actualiza los juegos guardados hace más de STEAM_REFRESH_TTL_DAYS
+días; las filas existentes quedan sin fecha y se refrescan la próxima vez que aparezcan.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('juegos_steam', sa.Column('scrapeado_en', sa.DateTime()))
+    op.create_index('ix_juegos_steam_scrapeado_en', 'juegos_steam', ['scrapeado_en'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_juegos_steam_scrapeado_en', table_name='juegos_steam')
+    op.drop_column('juegos_steam', 'scrapeado_en')
@@ -0,0 +1,35 @@
+"""Índice de trigramas sobre el nombre del catálogo de RAWG
+
+Las búsquedas de la réplica filtran con `nombre ILIKE '%texto%'`, que el índice B-tree de
+`nombre` no puede usar. Un índice GIN con `gin_trgm_ops` (extensión `pg_trgm`) resuelve esos
+filtros y la ordenación por similitud sin recorrer la tabla entera.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_catalogo_rawg_nombre_trgm', 'catalogo_rawg', ['nombre'],
+        postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    # La extensión se deja instalada: puede haber otros objetos que dependan de ella
+    op.drop_index('ix_catalogo_rawg_nombre_trgm', table_name='catalogo_rawg')
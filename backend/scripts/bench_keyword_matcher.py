@@ -0,0 +1,72 @@
+"""
+Micro-benchmark del filtro por palabras clave.
+
+Compara la implementación anterior de `has_sexual_content` (un `keyword in texto` por
+palabra clave, recorriendo título, descripción y su concatenación) con el buscador
+compilado de `app.utils.keyword_matcher` sobre páginas de juegos sintéticas.
+
+Uso (desde backend/):
+    python -m scripts.bench_keyword_matcher [--games 2000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.moderation import SEXUAL_KEYWORDS
+
+WORDS = (
+    "adventure quest dungeon explore ancient kingdom hero sword magic forest castle "
+    "puzzle racing strategy build craft survive island space station robot pixel "
+    "story friends village farm season harvest mystery detective city night rain"
+).split()
+
+def legacy_has_sexual_content(game, keywords=SEXUAL_KEYWORDS):
+    """Implementación anterior, conservada solo para comparar"""
+    if game.get("name"):
+        if any(keyword in game.get("name", "").lower() for keyword in keywords):
+            return True
+    if game.get("description"):
+        if any(keyword in game.get("description", "").lower() for keyword in keywords):
+            return True
+    combined_text = (game.get("name", "").lower() + " " + game.get("description", "").lower())
+    return any(keyword in combined_text for keyword in keywords)
+
+def make_games(count, description_words, seed=42):
+    rng = random.Random(seed)
+    games = []
+    for i in range(count):
+        words = [rng.choice(WORDS) for _ in range(description_words)]
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(SEXUAL_KEYWORDS).rstrip("*"))
+        games.append({
+            "id": i,
+            "name": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+            "description": " ".join(words),
+        })
+    return games
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    matcher = KeywordMatcher(SEXUAL_KEYWORDS)
+    print(f"{len(matcher.keywords)} palabras clave, {args.games} juegos, mejor de {args.repeat}")
+    print(f"{'descripción':>12} {'anterior (ms)':>14} {'compilado (ms)':>15} {'mejora':>8}")
+    for description_words in (0, 50, 200, 800):
+        games = make_games(args.games, description_words)
+        legacy = best_of(args.repeat, lambda: [legacy_has_sexual_content(g) for g in games])
+        compiled = best_of(args.repeat, lambda: matcher.search_games(games))
+        print(f"{description_words:>9} pal {legacy * 1000:>14.1f} {compiled * 1000:>15.1f} {legacy / compiled:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
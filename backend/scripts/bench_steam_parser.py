@@ -0,0 +1,123 @@
+"""
+Benchmark del parser de páginas de Steam.
+
+Compara la extracción anterior con BeautifulSoup (árbol completo + selectores CSS) con
+las expresiones XPath sobre lxml de `app.utils.steam_parser`, midiendo el tiempo por
+página y el pico de memoria de un parseo (tracemalloc) sobre páginas sintéticas con
+la estructura de la tienda. Comprueba además que ambos extraen lo mismo.
+
+tracemalloc solo ve la memoria reservada por Python: los objetos de BeautifulSoup
+cuentan entero, pero del árbol de lxml (libxml2) solo se ven los nodos que llegan
+a envolverse en objetos Python.
+
+Uso (desde backend/):
+    python -m scripts.bench_steam_parser [--pages 200] [--filler 400]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+from app.utils.steam_parser import extract_game_fields, parse_browse_html
+
+TAGS = ["Indie", "Adventure", "Pixel Graphics", "Roguelike", "RPG", "Atmospheric", "Story Rich", "Platformer"]
+
+def legacy_extract_game_fields(html):
+    """Extracción anterior con BeautifulSoup, conservada solo para comparar"""
+    soup = BeautifulSoup(html, "lxml")
+    title_elem = soup.select_one(".apphub_AppName")
+    desc_elem = soup.select_one(".game_description_snippet")
+    img_elem = soup.select_one(".game_header_image_full") or soup.select_one(".game_header_image")
+    price_elem = soup.select_one(".game_purchase_price") or soup.select_one(".discount_final_price")
+    return {
+        "nombre": title_elem.text.strip() if title_elem else "Unknown",
+        "tags": [t.text.strip() for t in soup.select(".app_tag")],
+        "descripcion": desc_elem.text.strip() if desc_elem else "",
+        "imagen": img_elem.get("src") if img_elem else "",
+        "precio_texto": price_elem.text.strip() if price_elem else "Free",
+    }
+
+def legacy_parse_browse_html(html):
+    soup = BeautifulSoup(html, "lxml")
+    games = []
+    for container in soup.select("#search_resultsRows > a"):
+        app_id = container.get("data-ds-appid")
+        if not app_id:
+            continue
+        title_elem = container.select_one(".title")
+        price_elem = container.select_one(".search_price")
+        games.append({
+            "app_id": app_id,
+            "nombre": title_elem.text.strip() if title_elem else "Unknown",
+            "url": container.get("href", ""),
+            "precio_texto": price_elem.text.strip() if price_elem else "",
+        })
+    return games
+
+def filler(rng, blocks):
+    # Las páginas reales son mayoritariamente menús, reseñas y scripts que no usamos
+    return "".join(
+        f'<div class="block responsive_apppage_details_left"><p class="review">Review {rng.random()}</p>'
+        f'<ul><li><a href="/tag/{i}">Link {i}</a></li><li><span>{"lorem ipsum " * 8}</span></li></ul></div>'
+        for i in range(blocks)
+    )
+
+def make_app_page(rng, app_id, blocks):
+    tags = "".join(f'<a class="app_tag" href="#">\n\t\t{t}\t\t</a>' for t in rng.sample(TAGS, 5))
+    return (
+        f"<html><head><title>Game {app_id}</title><script>var x = {app_id};</script></head><body>"
+        f"{filler(rng, blocks // 2)}"
+        f'<div class="apphub_AppName">Game {app_id}</div>'
+        f'<img class="game_header_image_full" src="https://cdn/{app_id}/header.jpg">'
+        f'<div class="game_description_snippet">\n  A short description of game {app_id}.\n</div>'
+        f'<div class="glance_tags popular_tags">{tags}</div>'
+        f'<div class="game_purchase_price price">\n  {rng.randint(1, 40)},99€\n</div>'
+        f"{filler(rng, blocks // 2)}</body></html>"
+    )
+
+def make_browse_page(rng, blocks):
+    rows = "".join(
+        f'<a href="https://store/app/{i}/" data-ds-appid="{i}" class="search_result_row">'
+        f'<div class="col search_name"><span class="title">Game {i}</span></div>'
+        f'<div class="col search_price responsive_secondrow">{i % 30},99€</div></a>'
+        for i in range(25)
+    )
+    return f"<html><body>{filler(rng, blocks)}<div id=\"search_resultsRows\">{rows}</div></body></html>"
+
+def measure(func, pages):
+    start = time.perf_counter()
+    for page in pages:
+        func(page)
+    per_page = (time.perf_counter() - start) / len(pages)
+    tracemalloc.start()
+    func(pages[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_page, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--filler", type=int, default=400, help="bloques de relleno por página")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    cases = [
+        ("juego", [make_app_page(rng, i, args.filler) for i in range(args.pages)],
+         legacy_extract_game_fields, extract_game_fields),
+        ("búsqueda", [make_browse_page(rng, args.filler) for _ in range(args.pages)],
+         legacy_parse_browse_html, parse_browse_html),
+    ]
+    print(f"{args.pages} páginas por caso, {len(cases[0][1][0]) // 1024} KiB por página de juego")
+    print(f"{'página':>9} {'bs4 (ms)':>9} {'lxml (ms)':>10} {'mejora':>7} {'bs4 pico (KiB)':>15} {'lxml pico (KiB)':>16}")
+    for name, pages, legacy, compiled in cases:
+        assert all(legacy(p) == compiled(p) for p in pages[:20]), f"Resultados distintos en páginas de {name}"
+        legacy_time, legacy_peak = measure(legacy, pages)
+        compiled_time, compiled_peak = measure(compiled, pages)
+        print(
+            f"{name:>9} {legacy_time * 1000:>9.2f} {compiled_time * 1000:>10.2f} {legacy_time / compiled_time:>6.1f}x "
+            f"{legacy_peak // 1024:>15} {compiled_peak // 1024:>16}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Aplica las migraciones de la base de datos (equivalente a `alembic upgrade head`).
+
+La API no crea ni modifica el esquema al arrancar: hay que ejecutar este comando al
+desplegar y después de actualizar el código, antes de levantar los workers. Sobre una
+base de datos creada con la versión anterior (create_all al importar) la migración base
+solo añade lo que falte.
+
+Uso (desde backend/):
+    python -m scripts.migrate [revisión] [--sql]
+"""
+import argparse
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("revision", nargs="?", default="head", help="Revisión destino (por defecto head)")
+    parser.add_argument("--sql", action="store_true", help="Mostrar el SQL en lugar de ejecutarlo")
+    args = parser.parse_args()
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    command.upgrade(config, args.revision, sql=args.sql)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Informe del tiempo de arranque de la API.
+
+Cada medición se hace en un intérprete nuevo, como al levantar un worker:
+
+- Importación completa de `app.main`, con el desglose por módulo de rutas que registra
+  la propia aplicación (acumulativo en el orden de registro: cada módulo incluye las
+  dependencias que importa por primera vez).
+- Importación aislada de cada módulo de rutas, con todas sus dependencias.
+
+Se ejecuta cada medición `--runs` veces y se muestra la mediana.
+
+Uso (desde backend/):
+    python -m scripts.startup_report [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+APP_PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main
+total = time.perf_counter() - start
+print(json.dumps({"total": total, "routers": app.main.router_import_times}))
+"""
+
+MODULE_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps(time.perf_counter() - start))
+"""
+
+def probe(code, *args):
+    result = subprocess.run([sys.executable, "-c", code, *args], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def ms(seconds):
+    return f"{seconds * 1000:8.1f} ms"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    app_runs = [probe(APP_PROBE) for _ in range(args.runs)]
+    routers = list(app_runs[0]["routers"])
+    print(f"Importación de app.main (mediana de {args.runs}): {ms(statistics.median(r['total'] for r in app_runs))}")
+    print()
+    print(f"{'módulo de rutas':<20}{'acumulado':>12}{'aislado':>12}")
+    for name in routers:
+        cumulative = statistics.median(r["routers"][name] for r in app_runs)
+        isolated = statistics.median(probe(MODULE_PROBE, f"app.routes.{name}") for _ in range(args.runs))
+        print(f"{name:<20}{ms(cumulative):>12}{ms(isolated):>12}")
+
+if __name__ == "__main__":
+    main()